@@ -0,0 +1,5 @@
+'''
+Benchmark suite of the data and rendering hot paths, run it with:
+
+    python -m benchmarks [--output FILE] [--compare BASELINE] [--saves N] [--only NAME]
+'''
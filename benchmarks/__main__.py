@@ -0,0 +1,42 @@
+'''
+This module runs the benchmark suite from the command line.
+'''
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks import fixtures, bench_data, bench_gui  # noqa: F401
+from benchmarks.runner import run_benchmarks, compare, save_results, load_results
+
+
+def main() -> None:
+    """
+    Run the benchmarks, save the results and compare them with a baseline.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description='Weather App benchmarks')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare with earlier results')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown reported as a regression')
+    parser.add_argument('--saves', type=int, default=fixtures.SYNTHETIC_SAVES,
+                        help='number of saves in synthetic archives')
+    parser.add_argument('--only', help='run only benchmarks whose name contains this text')
+    args = parser.parse_args()
+
+    fixtures.SYNTHETIC_SAVES = args.saves
+    results = run_benchmarks(args.only)
+    if args.output:
+        save_results(results, args.output)
+    if args.compare:
+        if compare(results, load_results(args.compare), args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+'''
+Benchmarks of data processing: forecast selection, time conversion, parsing, saving and loading.
+'''
+import json
+import os
+import tempfile
+from benchmarks.fixtures import load_saves, synthetic_saves
+from benchmarks.runner import benchmark
+from src import archive
+from src.model import Observation, Forecast
+from src.save_store import iter_saves
+from src.settings import SAVES_DIR
+from src.support import get_forecast_days, save_day_to_file
+from src.timeconv import format_time, format_series
+
+
+def _use_temporary_archive(directory: str) -> None:
+    """
+    Make save_day_to_file write to a throwaway archive.
+
+    Args:
+        directory (str): The temporary directory.
+
+    Returns:
+        None
+    """
+    archive._ARCHIVE = archive.WeatherArchive(os.path.join(directory, 'archive.sqlite3'))  # pylint: disable=protected-access
+
+@benchmark('get_forecast_days', number=500)
+def bench_get_forecast_days():
+    """
+    Prepare selecting the records of the following days of every saved forecast.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    forecasts = [forecast for _, forecast in load_saves()]
+    def run():
+        """
+        Select the records of the following days of every forecast.
+
+        Returns:
+            None
+        """
+        for forecast in forecasts:
+            get_forecast_days(forecast)
+    return run
+
+@benchmark('format_time/short_date', number=200)
+def bench_format_time_date():
+    """
+    Prepare formatting the dates of all saved forecast records.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    stamps = [(entry['dt'], forecast['city']['timezone'])
+              for _, forecast in load_saves() for entry in forecast['list']]
+    def run():
+        """
+        Format the date of every forecast record.
+
+        Returns:
+            None
+        """
+        for stamp, offset in stamps:
+            format_time(stamp, offset, 'short_date')
+    return run
+
+@benchmark('format_time/sunrise_sunset', number=200)
+def bench_format_time_sun():
+    """
+    Prepare formatting the sunrise and sunset of every save.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    weathers = [weather for weather, _ in load_saves()]
+    def run():
+        """
+        Format the sunrise and sunset times of every save.
+
+        Returns:
+            None
+        """
+        for weather in weathers:
+            format_time(weather['sys']['sunrise'], weather['timezone'], 'time')
+            format_time(weather['sys']['sunset'], weather['timezone'], 'time')
+    return run
+
+@benchmark('format_series/forecast', number=200)
+def bench_format_series():
+    """
+    Prepare formatting the times of every saved forecast as one series.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    series = [([entry['dt'] for entry in forecast['list']], forecast['city']['timezone'])
+              for _, forecast in load_saves()]
+    def run():
+        """
+        Format the times of every forecast.
+
+        Returns:
+            None
+        """
+        for stamps, offset in series:
+            format_series(stamps, offset, 'full')
+    return run
+
+@benchmark('save_day_to_file', number=20)
+def bench_save_day_to_file():
+    """
+    Prepare saving every save again to a temporary directory and archive.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    saves = load_saves()
+    directory = tempfile.mkdtemp()
+    _use_temporary_archive(directory)
+    def run():
+        """
+        Save every save.
+
+        Returns:
+            None
+        """
+        for weather, forecast in saves:
+            save_day_to_file(weather, forecast, directory)
+    return run
+
+@benchmark('load_save', number=50)
+def bench_load_save():
+    """
+    Prepare loading all saves of the saves directory.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    def run():
+        """
+        Load every save from the store and the JSON files.
+
+        Returns:
+            None
+        """
+        for _ in iter_saves(SAVES_DIR):
+            pass
+    return run
+
+@benchmark('model/parse', number=50)
+def bench_model_parse():
+    """
+    Prepare parsing every save into records.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    saves = load_saves()
+    def run():
+        """
+        Parse the weather and forecast of every save.
+
+        Returns:
+            None
+        """
+        for weather, forecast in saves:
+            Observation.from_payload(weather)
+            Forecast.from_payload(forecast)
+    return run
+
+@benchmark('synthetic/get_forecast_days', number=1, repeat=3)
+def bench_synthetic_forecast_days():
+    """
+    Prepare selecting the records of the following days of a synthetic archive.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    forecasts = [forecast for _, forecast in synthetic_saves()]
+    def run():
+        """
+        Select the records of the following days of every forecast.
+
+        Returns:
+            None
+        """
+        for forecast in forecasts:
+            get_forecast_days(forecast)
+    return run
+
+@benchmark('synthetic/decode_saves', number=1, repeat=3)
+def bench_synthetic_decode():
+    """
+    Prepare decoding the JSON of a synthetic archive.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    texts = [json.dumps(save) for save in synthetic_saves()]
+    def run():
+        """
+        Decode every save.
+
+        Returns:
+            None
+        """
+        for text in texts:
+            json.loads(text)
+    return run
+
+@benchmark('synthetic/archive_import', number=1, repeat=3)
+def bench_synthetic_archive_import():
+    """
+    Prepare importing a synthetic archive into a temporary database.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    saves = synthetic_saves()
+    directory = tempfile.mkdtemp()
+    def run():
+        """
+        Import all saves in one transaction.
+
+        Returns:
+            None
+        """
+        weather_archive = archive.WeatherArchive(os.path.join(directory, 'archive.sqlite3'))
+        weather_archive._insert([weather for weather, _ in saves], saves)  # pylint: disable=protected-access
+        weather_archive.close()
+    return run
+
+@benchmark('synthetic/archive_range_query', number=20)
+def bench_synthetic_archive_query():
+    """
+    Prepare a database with a synthetic archive.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    saves = synthetic_saves()
+    weather_archive = archive.WeatherArchive(os.path.join(tempfile.mkdtemp(), 'archive.sqlite3'))
+    weather_archive._insert([weather for weather, _ in saves], saves)  # pylint: disable=protected-access
+    start = saves[0][0]['dt']
+    def run():
+        """
+        Query a month of observations and forecasts of one city.
+
+        Returns:
+            None
+        """
+        weather_archive.observations('Rzym', start, start + 30 * 86400, 'IT')
+        weather_archive.forecasts('Rzym', start, start + 30 * 86400, 'IT')
+    return run
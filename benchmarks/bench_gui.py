@@ -0,0 +1,111 @@
+'''
+Benchmarks of rendering weather and forecast data in the main window.
+
+The window runs on Qt's offscreen platform and talks to the local stand-in server.
+'''
+import os
+import tempfile
+import threading
+from benchmarks.fixtures import load_saves
+from src.model import Observation, Forecast
+from benchmarks.runner import benchmark
+
+_WINDOW = None
+
+
+def get_window():
+    """
+    Create the main window once, with all network traffic going to the stand-in server.
+
+    Returns:
+        MyGUI: The main window.
+    """
+    global _WINDOW
+    if _WINDOW is None:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        # pylint: disable=import-outside-toplevel
+        from PyQt5.QtWidgets import QApplication
+        from src import program, support
+        from src.client import get_client
+        from src.standin import create_server
+
+        server = create_server(0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        client = get_client()
+        client.api_url = f'{url}/data/2.5'
+        client.icon_url = f'{url}/img/wn'
+        client.cache = None
+        support.ICON_CACHE.directory = tempfile.mkdtemp()
+
+        application = QApplication.instance() or QApplication([])
+        program.check_for_api_file = lambda: True
+        _WINDOW = program.MyGUI()
+        _WINDOW.application = application
+    return _WINDOW
+
+@benchmark('gui/update_informations', number=50)
+def bench_update_informations():
+    """
+    Prepare showing the weather of every save in the main window.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    window = get_window()
+    weathers = [Observation.from_payload(weather) for weather, _ in load_saves()]
+    def run():
+        """
+        Show the weather of every save.
+
+        Returns:
+            None
+        """
+        for weather in weathers:
+            window.update_informations(weather)
+        window.application.processEvents()
+    return run
+
+@benchmark('gui/update_forecast', number=50)
+def bench_update_forecast():
+    """
+    Prepare showing the forecast of every save in the main window.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    window = get_window()
+    forecasts = [Forecast.from_payload(forecast) for _, forecast in load_saves()]
+    def run():
+        """
+        Show the forecast of every save.
+
+        Returns:
+            None
+        """
+        for forecast in forecasts:
+            window.update_forecast(forecast)
+        window.application.processEvents()
+    return run
+
+@benchmark('gui/update_forecast_unchanged', number=200)
+def bench_update_forecast_unchanged():
+    """
+    Prepare showing a forecast that is already shown.
+
+    Returns:
+        Callable[[], None]: The timed function.
+    """
+    window = get_window()
+    forecast = Forecast.from_payload(load_saves()[0][1])
+    window.update_forecast(forecast)
+    def run():
+        """
+        Show the same forecast again.
+
+        Returns:
+            None
+        """
+        window.update_forecast(forecast)
+        window.application.processEvents()
+    return run
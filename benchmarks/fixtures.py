@@ -0,0 +1,47 @@
+'''
+This module is responsible for the data used by benchmarks.
+'''
+import json
+from src.save_store import iter_saves
+from src.settings import SAVES_DIR
+
+# The number of saves in synthetic archives, changed by the --saves option
+SYNTHETIC_SAVES = 10000
+
+
+def load_saves(directory: str = SAVES_DIR) -> list:
+    """
+    Load all saves.
+
+    Args:
+        directory (str): The directory of saves.
+
+    Returns:
+        list: A list of [weather, forecast] payloads sorted by name.
+    """
+    saves = sorted(iter_saves(directory), key=lambda save: save[0])
+    return [[weather, forecast] for _, weather, forecast in saves]
+
+def synthetic_saves(count: int = None) -> list:
+    """
+    Build a synthetic archive by shifting the real saves day by day.
+
+    Args:
+        count (int): The number of saves, SYNTHETIC_SAVES by default.
+
+    Returns:
+        list: A list of [weather, forecast] payloads.
+    """
+    count = SYNTHETIC_SAVES if count is None else count
+    saves = [json.dumps(save) for save in load_saves()]
+    result = []
+    for number in range(count):
+        weather, forecast = json.loads(saves[number % len(saves)])
+        shift = number // len(saves) * 86400
+        weather['dt'] += shift
+        weather['sys']['sunrise'] += shift
+        weather['sys']['sunset'] += shift
+        for entry in forecast['list']:
+            entry['dt'] += shift
+        result.append([weather, forecast])
+    return result
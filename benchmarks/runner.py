@@ -0,0 +1,143 @@
+'''
+This module is responsible for registering, running and comparing benchmarks.
+'''
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from typing import Callable, Optional
+
+BENCHMARKS: dict = {}
+
+
+def benchmark(name: str, number: int = 100, repeat: int = 5) -> Callable:
+    """
+    Register a benchmark.
+
+    The decorated function prepares the data and returns the callable that is timed.
+
+    Args:
+        name (str): The name of the benchmark.
+        number (int): The number of calls in one measurement.
+        repeat (int): The number of measurements.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def register(setup: Callable[[], Callable[[], None]]) -> Callable[[], Callable[[], None]]:
+        """
+        Register the setup function of a benchmark.
+
+        Args:
+            setup (Callable[[], Callable[[], None]]): The function returning the timed function.
+
+        Returns:
+            Callable[[], Callable[[], None]]: The setup function.
+        """
+        BENCHMARKS[name] = (setup, number, repeat)
+        return setup
+    return register
+
+def run_benchmarks(only: Optional[str] = None) -> dict:
+    """
+    Run all registered benchmarks.
+
+    Args:
+        only (Optional[str]): Run only benchmarks whose name contains this text.
+
+    Returns:
+        dict: The results with the environment under 'meta' and per-call seconds
+            of every benchmark under 'results'.
+    """
+    results = {}
+    for name, (setup, number, repeat) in BENCHMARKS.items():
+        if only is not None and only not in name:
+            continue
+        function = setup()
+        timings = [total / number for total in timeit.Timer(function).repeat(repeat, number)]
+        results[name] = {
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            'number': number,
+            'repeat': repeat
+        }
+        print(f"{name:<40}{results[name]['median'] * 1e6:14.1f} us")
+    return {'meta': environment(), 'results': results}
+
+def environment() -> dict:
+    """
+    Describe the environment of a benchmark run.
+
+    Returns:
+        dict: The time, Python version, platform and git commit.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ''
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'commit': commit
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare two benchmark runs by median time.
+
+    Args:
+        current (dict): The results of the current run.
+        baseline (dict): The results of the baseline run.
+        threshold (float): The relative slowdown treated as a regression, e.g. 0.2.
+
+    Returns:
+        list: The names of regressed benchmarks.
+    """
+    regressions = []
+    print(f"{'benchmark':<40}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            print(f"{name:<40}{'-':>14}{result['median'] * 1e6:12.1f}us{'new':>10}")
+            continue
+        change = result['median'] / old['median'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<40}{old['median'] * 1e6:12.1f}us{result['median'] * 1e6:12.1f}us"
+              f"{change * 100:+9.1f}%{flag}")
+    return regressions
+
+def save_results(results: dict, path: str) -> None:
+    """
+    Write benchmark results to a JSON file.
+
+    Args:
+        results (dict): The results.
+        path (str): The path of the file.
+
+    Returns:
+        None
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=4)
+
+def load_results(path: str) -> dict:
+    """
+    Read benchmark results from a JSON file.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        dict: The results.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
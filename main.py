@@ -2,8 +2,14 @@
 This is main module that starts program
 '''
 import sys
+import time
+START = time.perf_counter()
+import argparse
 from PyQt5.QtWidgets import QApplication, QMessageBox
-from src.program import MyGUI
+from src.settings import TRACE_ENABLED, AUTO_REFRESH_ENABLED, KIOSK_ENABLED, \
+    KIOSK_MEMORY_BUDGET
+from src.startup import PROFILER
+from src.tracing import TRACER
 
 sys.path.append('/src')
 
@@ -18,10 +24,77 @@ old_hook = sys.excepthook
 sys.excepthook = catch_exceptions
 #--------------------------------------------------------------
 
+def parse_args() -> argparse.Namespace:
+    """
+    Parse the program options, arguments meant for Qt are left alone.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description='Weather App')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='print the duration of every start-up phase')
+    parser.add_argument('--trace', action='store_true',
+                        help='record timings of searches to a JSON-lines trace')
+    parser.add_argument('--auto-refresh', action='store_true',
+                        help='refresh the shown city in the background')
+    parser.add_argument('--kiosk', action='store_true',
+                        help='run unattended with auto-refresh and bounded memory')
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        default=KIOSK_MEMORY_BUDGET // (1024 * 1024),
+                        help='memory budget of the kiosk mode in megabytes')
+    parser.add_argument('--api-url', help='base URL of the weather API')
+    parser.add_argument('--icon-url', help='base URL of the weather icons')
+    parser.add_argument('--gateway', metavar='URL',
+                        help='base URL of a local gateway (python -m src.gateway)')
+    traffic = parser.add_mutually_exclusive_group()
+    traffic.add_argument('--record', metavar='DIRECTORY', help='record HTTP traffic as fixtures')
+    traffic.add_argument('--replay', metavar='DIRECTORY', help='serve HTTP traffic from fixtures')
+    return parser.parse_known_args()[0]
+
+def configure_client(args: argparse.Namespace) -> None:
+    """
+    Point the shared weather client at the servers and transport chosen by the options.
+
+    Args:
+        args (argparse.Namespace): The parsed options.
+
+    Returns:
+        None
+    """
+    from src.client import get_client  # pylint: disable=import-outside-toplevel
+    from src.replay import install_replay, RECORD, REPLAY  # pylint: disable=import-outside-toplevel
+
+    client = get_client()
+    if args.gateway:
+        client.api_url = f"{args.gateway.rstrip('/')}/data/2.5"
+        client.icon_url = f"{args.gateway.rstrip('/')}/img/wn"
+    if args.api_url:
+        client.api_url = args.api_url.rstrip('/')
+    if args.icon_url:
+        client.icon_url = args.icon_url.rstrip('/')
+    if args.record:
+        install_replay(client.session, RECORD, args.record)
+    elif args.replay:
+        install_replay(client.session, REPLAY, args.replay)
+
 def main():
+    args = parse_args()
+    if args.startup_profile:
+        PROFILER.enable(START)
+        PROFILER.mark('qt imports')
 
     app = QApplication(sys.argv)
-    MyGUI()
+    PROFILER.mark('qt application')
+    # Imported here, so nothing heavy is loaded before the application exists
+    from src.program import MyGUI  # pylint: disable=import-outside-toplevel
+    PROFILER.mark('program imports')
+    if args.trace or TRACE_ENABLED:
+        TRACER.enable()
+    if args.gateway or args.api_url or args.icon_url or args.record or args.replay:
+        configure_client(args)
+    MyGUI(auto_refresh=args.auto_refresh or AUTO_REFRESH_ENABLED,
+          kiosk=args.kiosk or KIOSK_ENABLED, memory_budget=args.memory_budget * 1024 * 1024)
     app.exec_()
 
 if __name__ == '__main__':
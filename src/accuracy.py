@@ -0,0 +1,422 @@
+'''
+This module is responsible for measuring the accuracy of saved forecasts.
+
+Every save holds the current weather and the forecast of the following days, so
+forecasts issued on one day can be checked against weather saved on later days.
+Every forecast record is joined to the observation of its city nearest to its
+time, if one is close enough, and the errors are summarized by city, lead time
+(the time between issuing the forecast and the forecast moment) and variable.
+
+Saves are read in parallel, in chunks of files or stored saves per process, the
+join and the statistics are computed on whole numpy arrays:
+
+    python -m src.accuracy [directory] [--workers N] [--archive] [--city NAME]
+        [--variable temperature] [--csv FILE]
+'''
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import NamedTuple, Optional
+import numpy as np
+from src.save_store import SaveStore
+from src.settings import SAVES_DIR, SAVE_STORE_NAME, ARCHIVE_FILE, ACCURACY_MATCH_WINDOW, \
+    ACCURACY_LEAD_STEP, ACCURACY_CHUNK, ACCURACY_PARALLEL_MIN
+
+# Label: (archive column, unit)
+VARIABLES = {
+    'temperature': ('temp', '°C'),
+    'pressure': ('pressure', 'hPa'),
+    'humidity': ('humidity', '%'),
+    'wind': ('wind_speed', 'm/s')
+}
+COLUMNS = tuple(column for column, _ in VARIABLES.values())
+# Columns of the arrays built from saves, the variables follow them
+OBSERVATION_FIELDS = ('city_id', 'dt')
+FORECAST_FIELDS = ('city_id', 'issued', 'dt')
+ALL_CITIES = 0
+
+
+class ErrorStats(NamedTuple):
+    """
+    The forecast errors of one variable, city and lead time, a forecast value minus the observed one.
+    """
+    city_id: int
+    city: str
+    lead: int
+    variable: str
+    count: int
+    bias: float
+    mae: float
+    rmse: float
+    p90: float
+
+
+def save_arrays(weather: dict, forecast: Optional[dict]) -> tuple:
+    """
+    Convert a save to rows of the observation and forecast arrays.
+
+    Args:
+        weather (dict): The weather data.
+        forecast (Optional[dict]): The forecast data.
+
+    Returns:
+        tuple: The observation row and the list of forecast rows.
+    """
+    city_id = weather['id']
+    issued = weather['dt']
+    observation = (city_id, issued, weather['main']['temp'], weather['main']['pressure'],
+                   weather['main']['humidity'], weather['wind']['speed'])
+    records = [(city_id, issued, entry['dt'], entry['main']['temp'], entry['main']['pressure'],
+                entry['main']['humidity'], entry['wind']['speed'])
+               for entry in (forecast or {}).get('list', [])]
+    return observation, records
+
+def _collect(saves) -> tuple:
+    """
+    Build the observation and forecast arrays of saves, broken saves are skipped.
+
+    Args:
+        saves: An iterable of (weather, forecast) pairs.
+
+    Returns:
+        tuple: The observations, the forecasts and the city names by city ID.
+    """
+    observations = []
+    forecasts = []
+    names = {}
+    for weather, forecast in saves:
+        try:
+            observation, records = save_arrays(weather, forecast)
+        except (KeyError, IndexError, TypeError):
+            continue
+        observations.append(observation)
+        forecasts.extend(records)
+        names[observation[0]] = f"{weather['name']}, {weather['sys'].get('country', '')}"
+    return (np.array(observations, np.float64).reshape(-1, len(OBSERVATION_FIELDS) + len(COLUMNS)),
+            np.array(forecasts, np.float64).reshape(-1, len(FORECAST_FIELDS) + len(COLUMNS)),
+            names)
+
+def _read_files(paths: list) -> tuple:
+    """
+    Build the arrays of JSON saves, run in a worker process.
+
+    Args:
+        paths (list): The paths of the saves.
+
+    Returns:
+        tuple: The observations, the forecasts and the city names by city ID.
+    """
+    def saves():
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    weather, forecast = json.load(file)
+            except (ValueError, TypeError):
+                continue
+            yield weather, forecast
+    return _collect(saves())
+
+def _read_stored(store_path: str, names: list) -> tuple:
+    """
+    Build the arrays of stored saves, run in a worker process.
+
+    Args:
+        store_path (str): The path of the save store.
+        names (list): The names of the saves.
+
+    Returns:
+        tuple: The observations, the forecasts and the city names by city ID.
+    """
+    store = SaveStore(store_path)
+    try:
+        return _collect(store.load(name) for name in names)
+    finally:
+        store.close()
+
+def load_saves(directory: str = SAVES_DIR, workers: Optional[int] = None) -> tuple:
+    """
+    Read all saves of a directory into arrays, in parallel when there are many.
+
+    Args:
+        directory (str): The saves directory.
+        workers (Optional[int]): The number of processes, all CPU cores by default.
+
+    Returns:
+        tuple: The observations, the forecasts and the city names by city ID.
+    """
+    store_path = os.path.join(directory, SAVE_STORE_NAME)
+    stored = []
+    if os.path.exists(store_path):
+        store = SaveStore(store_path)
+        stored = store.names()
+        store.close()
+    known = set(stored)
+    paths = [path for path in sorted(glob.glob(os.path.join(directory, '*.json')))
+             if os.path.basename(path) not in known]
+
+    tasks = [(_read_stored, store_path, stored[start:start + ACCURACY_CHUNK])
+             for start in range(0, len(stored), ACCURACY_CHUNK)]
+    tasks += [(_read_files, paths[start:start + ACCURACY_CHUNK])
+              for start in range(0, len(paths), ACCURACY_CHUNK)]
+    if len(stored) + len(paths) < ACCURACY_PARALLEL_MIN or workers == 1:
+        parts = [task[0](*task[1:]) for task in tasks]
+    else:
+        # Spawned, not forked, because the accuracy window runs this from a thread
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as executor:
+            futures = [executor.submit(*task) for task in tasks]
+            parts = [future.result() for future in futures]
+
+    names = {}
+    for part in parts:
+        names.update(part[2])
+    width = len(COLUMNS)
+    observations = np.concatenate(
+        [part[0] for part in parts] or [np.empty((0, len(OBSERVATION_FIELDS) + width))])
+    forecasts = np.concatenate(
+        [part[1] for part in parts] or [np.empty((0, len(FORECAST_FIELDS) + width))])
+    return observations, forecasts, names
+
+def archived_observations(path: str = ARCHIVE_FILE) -> np.ndarray:
+    """
+    Get the observations of the archive, an archive that does not exist yet is not created.
+
+    Args:
+        path (str): The path of the database file.
+
+    Returns:
+        np.ndarray: The observation rows.
+    """
+    rows = []
+    if os.path.exists(path):
+        from src.archive import WeatherArchive  # pylint: disable=import-outside-toplevel
+        archive = WeatherArchive(path)
+        try:
+            for city_id in {row[0] for row in archive.cities()}:
+                rows.extend((city_id, *row) for row in
+                            archive.series('observations', city_id, 0, 2 ** 53, COLUMNS))
+        finally:
+            archive.close()
+    return np.array(rows, np.float64).reshape(-1, len(OBSERVATION_FIELDS) + len(COLUMNS))
+
+def match_observations(observations: np.ndarray, forecasts: np.ndarray,
+                       window: int = ACCURACY_MATCH_WINDOW) -> tuple:
+    """
+    Join every forecast record to the observation of its city nearest to its time.
+
+    Observations are sorted by a key packing the city ID and the time, every forecast
+    record finds its neighbours with one binary search, the nearer one of the same
+    city is taken. Only observations made after the forecast was issued count, when
+    the nearer neighbour is older the other one is taken. Records of moments before
+    the forecast was issued, from a cached forecast older than its save, are skipped.
+
+    Args:
+        observations (np.ndarray): The observation rows, duplicates are allowed.
+        forecasts (np.ndarray): The forecast rows.
+        window (int): The largest time between a record and its observation in seconds.
+
+    Returns:
+        tuple: The indices of the matched forecast rows and of their observations.
+    """
+    empty = np.empty(0, np.int64)
+    if not len(observations) or not len(forecasts):
+        return empty, empty
+    keys, first = np.unique(_keys(observations[:, 0], observations[:, 1]), return_index=True)
+    cities = observations[first, 0]
+    times = observations[first, 1]
+    wanted = _keys(forecasts[:, 0], forecasts[:, 2])
+    right = np.searchsorted(keys, wanted)
+    left = np.maximum(right - 1, 0)
+    right = np.minimum(right, len(keys) - 1)
+    distance = np.full((2, len(wanted)), np.inf)
+    for row, index in enumerate((left, right)):
+        # The weather saved with the forecast is not an independent check of it
+        valid = (cities[index] == forecasts[:, 0]) & (times[index] > forecasts[:, 1])
+        distance[row, valid] = np.abs(times[index] - forecasts[:, 2])[valid]
+    nearest = np.where(distance[0] <= distance[1], left, right)
+    matched = np.flatnonzero((distance.min(axis=0) <= window) &
+                             (forecasts[:, 2] >= forecasts[:, 1]))
+    return matched, first[nearest[matched]]
+
+def _keys(city_ids: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    Pack city IDs and Unix times into sortable integer keys.
+
+    Args:
+        city_ids (np.ndarray): The city IDs.
+        times (np.ndarray): The Unix times.
+
+    Returns:
+        np.ndarray: The keys, ordered by city and then by time.
+    """
+    return (city_ids.astype(np.int64) << 33) + times.astype(np.int64)
+
+def error_stats(observations: np.ndarray, forecasts: np.ndarray, names: dict,
+                lead_step: int = ACCURACY_LEAD_STEP,
+                window: int = ACCURACY_MATCH_WINDOW) -> list:
+    """
+    Summarize the forecast errors by city, lead time and variable.
+
+    Args:
+        observations (np.ndarray): The observation rows.
+        forecasts (np.ndarray): The forecast rows.
+        names (dict): The city names by city ID.
+        lead_step (int): The width of the lead time groups in seconds.
+        window (int): The largest time between a record and its observation in seconds.
+
+    Returns:
+        list: ErrorStats of every city and of all cities together (city ID 0), ordered
+            by city, lead time and variable.
+    """
+    matched, observed = match_observations(observations, forecasts, window)
+    if not len(matched):
+        return []
+    width = len(COLUMNS)
+    errors = forecasts[matched, -width:] - observations[observed, -width:]
+    leads = ((forecasts[matched, 2] - forecasts[matched, 1]) // lead_step).astype(np.int64)
+    cities = forecasts[matched, 0].astype(np.int64)
+
+    results = []
+    # Groups are keyed by the city ID and the lead time group packed into one integer
+    for keys in ((cities << 16) + leads, leads):
+        groups, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for column, variable in enumerate(VARIABLES):
+            error = errors[:, column]
+            valid = ~np.isnan(error)
+            group_index = inverse[valid]
+            error = error[valid]
+            count = np.bincount(group_index, minlength=len(groups))
+            total = np.maximum(count, 1)
+            bias = np.bincount(group_index, error, len(groups)) / total
+            mae = np.bincount(group_index, np.abs(error), len(groups)) / total
+            rmse = np.sqrt(np.bincount(group_index, error * error, len(groups)) / total)
+            p90 = _group_percentile(group_index, np.abs(error), count, 0.9)
+            for index, key in enumerate(groups.tolist()):
+                if not count[index]:
+                    continue
+                city_id, lead = key >> 16, key & 0xFFFF
+                results.append(ErrorStats(
+                    city_id, names.get(city_id, 'All cities'), lead * lead_step,
+                    variable, int(count[index]), float(bias[index]), float(mae[index]),
+                    float(rmse[index]), float(p90[index])))
+    order = list(VARIABLES)
+    results.sort(key=lambda stats: (stats.city_id != ALL_CITIES, stats.city, stats.lead,
+                                    order.index(stats.variable)))
+    return results
+
+def _group_percentile(groups: np.ndarray, values: np.ndarray, counts: np.ndarray,
+                      fraction: float) -> np.ndarray:
+    """
+    Get a percentile of the values of every group with one sort.
+
+    Args:
+        groups (np.ndarray): The group of every value.
+        values (np.ndarray): The values.
+        counts (np.ndarray): The number of values of every group.
+        fraction (float): The percentile as a fraction, e.g. 0.9.
+
+    Returns:
+        np.ndarray: The nearest-rank percentile of every group, NaN for empty groups.
+    """
+    # Sorting the value order stably by group keeps the values sorted within every
+    # group, NumPy sorts 16-bit integers stably with a radix sort
+    by_value = np.argsort(values)
+    group_type = np.uint16 if len(counts) <= 1 << 16 else np.int64
+    ordered = values[by_value[np.argsort(groups[by_value].astype(group_type), kind='stable')]]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ranks = np.maximum(np.ceil(counts * fraction).astype(np.int64) - 1, 0)
+    result = np.full(len(counts), np.nan)
+    filled = counts > 0
+    result[filled] = ordered[(starts + ranks)[filled]]
+    return result
+
+def analyze(directory: str = SAVES_DIR, workers: Optional[int] = None,
+            archive: bool = False) -> list:
+    """
+    Measure the accuracy of all saved forecasts.
+
+    Args:
+        directory (str): The saves directory.
+        workers (Optional[int]): The number of processes, all CPU cores by default.
+        archive (bool): Whether observations of the archive are used besides the saved ones.
+
+    Returns:
+        list: ErrorStats of every city and of all cities together.
+    """
+    observations, forecasts, names = load_saves(directory, workers)
+    if archive:
+        observations = np.concatenate([observations, archived_observations()])
+    return error_stats(observations, forecasts, names)
+
+def format_lead(lead: int) -> str:
+    """
+    Format a lead time group.
+
+    Args:
+        lead (int): The beginning of the group in seconds.
+
+    Returns:
+        str: The hours of the group, e.g. '24-48 h'.
+    """
+    hours = lead // 3600
+    return f'{hours}-{hours + ACCURACY_LEAD_STEP // 3600} h'
+
+def main(args: list) -> None:
+    """
+    Run the accuracy command line.
+
+    Args:
+        args (list): The command line arguments.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.accuracy',
+                                     description='Measure the accuracy of saved forecasts.')
+    parser.add_argument('directory', nargs='?', default=SAVES_DIR, help='directory of the saves')
+    parser.add_argument('--workers', type=int, help='number of processes reading the saves')
+    parser.add_argument('--archive', action='store_true',
+                        help='also compare with the observations of the archive')
+    parser.add_argument('--city', help='show only cities whose names start with this text')
+    parser.add_argument('--variable', choices=list(VARIABLES), help='show only this variable')
+    parser.add_argument('--csv', metavar='FILE', help='write the statistics to a CSV file')
+    options = parser.parse_args(args)
+    if options.workers is not None and options.workers < 1:
+        parser.error('--workers must be positive')
+
+    results = analyze(options.directory, options.workers, options.archive)
+    if options.city:
+        wanted = options.city.casefold()
+        results = [stats for stats in results if stats.city.casefold().startswith(wanted)]
+    if options.variable:
+        results = [stats for stats in results if stats.variable == options.variable]
+    if options.csv:
+        with open(options.csv, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(ErrorStats._fields)
+            writer.writerows(results)
+    if not results:
+        print('No forecast record has an observation close enough to its time')
+        return
+
+    tables = defaultdict(list)
+    for stats in results:
+        tables[stats.city].append(stats)
+    for city, rows in tables.items():
+        print(f'\n{city}')
+        print(f"{'lead':>9} {'variable':<12} {'count':>7} {'bias':>8} {'MAE':>8} "
+              f"{'RMSE':>8} {'P90':>8}")
+        for stats in rows:
+            unit = VARIABLES[stats.variable][1]
+            print(f'{format_lead(stats.lead):>9} {stats.variable:<12} {stats.count:>7} '
+                  f'{stats.bias:>8.2f} {stats.mae:>8.2f} {stats.rmse:>8.2f} '
+                  f'{stats.p90:>8.2f} {unit}')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
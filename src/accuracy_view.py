@@ -0,0 +1,136 @@
+'''
+This module is responsible for the window with the accuracy of saved forecasts.
+
+The analysis runs in the background, the window shows the mean absolute error of
+every variable for every lead time group of the chosen city. The tooltip of a
+cell holds the other statistics.
+'''
+from typing import Optional
+from PyQt5.QtCore import QThreadPool
+from PyQt5.QtWidgets import QWidget, QComboBox, QHBoxLayout, QVBoxLayout, QLabel, \
+    QTableWidget, QTableWidgetItem, QHeaderView
+from src.accuracy import VARIABLES, ALL_CITIES, analyze, format_lead
+from src.workers import FetchWorker, FetchSignals
+from src.settings import STYLE
+
+
+class AccuracyWindow(QWidget):
+    """
+    This class represents the window with forecast errors by city, lead time and variable.
+
+    Args:
+        city_id (Optional[int]): The city shown first, all cities by default.
+
+    Attributes:
+        results (list): The ErrorStats of the analysis.
+        city_id (Optional[int]): The city shown first.
+
+    Methods:
+        on_analyzed(): Receives the results of the analysis.
+        on_failed(): Shows why the analysis failed.
+        show_city(): Fills the table with the statistics of a city.
+    """
+    def __init__(self, city_id: Optional[int] = None) -> None:
+        """
+        Initialize the window and start the analysis.
+
+        Args:
+            city_id (Optional[int]): The city shown first.
+
+        Returns:
+            None
+        """
+        super().__init__()
+        self.setWindowTitle('Forecast accuracy')
+        self.setStyleSheet(STYLE)
+        self.resize(640, 360)
+        self.results: list = []
+        self.city_id = city_id
+
+        self.city_box = QComboBox()
+        self.table = QTableWidget(0, len(VARIABLES))
+        self.table.setHorizontalHeaderLabels(
+            [f'{variable} ({unit})' for variable, (_, unit) in VARIABLES.items()])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.status = QLabel('Comparing saved forecasts with later observations...')
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel('City:'))
+        controls.addWidget(self.city_box, 1)
+        layout = QVBoxLayout(self)
+        layout.addLayout(controls)
+        layout.addWidget(self.table, 1)
+        layout.addWidget(self.status)
+        self.city_box.currentIndexChanged.connect(
+            lambda index: self.show_city(self.city_box.itemData(index)))
+
+        # Not owned by the window, the analysis may finish after the window is deleted
+        self.signals = FetchSignals()
+        self.signals.finished.connect(self.on_analyzed)
+        self.signals.failed.connect(self.on_failed)
+        QThreadPool.globalInstance().start(FetchWorker(0, 'accuracy', analyze, self.signals))
+
+    def on_analyzed(self, search_id: int, kind: str, results: list) -> None:
+        """
+        Receive the results of the analysis and show the first city.
+
+        Args:
+            search_id (int): Not used, the analysis runs once.
+            kind (str): Not used.
+            results (list): The ErrorStats of the analysis.
+
+        Returns:
+            None
+        """
+        self.results = results
+        if not results:
+            self.status.setText('No saved forecast has a later observation close to its time')
+            return
+        self.status.setText('Mean absolute error of the forecast, '
+                            'hover over a value for more statistics')
+        cities = {stats.city_id: stats.city for stats in results}
+        self.city_box.blockSignals(True)
+        for city_id, name in sorted(cities.items(),
+                                    key=lambda item: (item[0] != ALL_CITIES, item[1])):
+            self.city_box.addItem(name, city_id)
+        index = self.city_box.findData(self.city_id) if self.city_id is not None else -1
+        self.city_box.setCurrentIndex(max(index, 0))
+        self.city_box.blockSignals(False)
+        self.show_city(self.city_box.currentData())
+
+    def on_failed(self, search_id: int, kind: str, message: str) -> None:
+        """
+        Show why the analysis failed.
+
+        Args:
+            search_id (int): Not used, the analysis runs once.
+            kind (str): Not used.
+            message (str): The error message.
+
+        Returns:
+            None
+        """
+        self.status.setText(f'The saved forecasts could not be compared. {message}')
+
+    def show_city(self, city_id: int) -> None:
+        """
+        Fill the table with the statistics of a city, a row for every lead time group.
+
+        Args:
+            city_id (int): The city ID, ALL_CITIES for all cities together.
+
+        Returns:
+            None
+        """
+        rows = [stats for stats in self.results if stats.city_id == city_id]
+        leads = sorted({stats.lead for stats in rows})
+        columns = list(VARIABLES)
+        self.table.setRowCount(len(leads))
+        self.table.setVerticalHeaderLabels([format_lead(lead) for lead in leads])
+        self.table.clearContents()
+        for stats in rows:
+            item = QTableWidgetItem(f'{stats.mae:.2f}')
+            item.setToolTip(f'Records: {stats.count}\nBias: {stats.bias:+.2f}\n'
+                            f'RMSE: {stats.rmse:.2f}\n90% of errors below: {stats.p90:.2f}')
+            self.table.setItem(leads.index(stats.lead), columns.index(stats.variable), item)
@@ -0,0 +1,406 @@
+'''
+This module is responsible for the local archive of saved weather data.
+
+Observations and forecast records are stored as flat rows in an SQLite database,
+indexed by city, country and time. The existing saves can be imported with:
+
+    python -m src.archive import [directory]
+    python -m src.archive query CITY FROM TO [COUNTRY]
+
+where FROM and TO are dates in the dd.mm.yy format used by save files.
+'''
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone as dt_timezone
+from typing import Optional
+from src.save_store import iter_saves
+from src.settings import ARCHIVE_FILE, SAVES_DIR
+
+OBSERVATION_COLUMNS = (
+    'city_id', 'city', 'country', 'dt', 'timezone', 'lat', 'lon', 'temp', 'feels_like',
+    'temp_min', 'temp_max', 'pressure', 'humidity', 'visibility', 'wind_speed', 'wind_deg',
+    'wind_gust', 'clouds', 'rain', 'snow', 'weather_id', 'description', 'icon', 'sunrise', 'sunset'
+)
+FORECAST_COLUMNS = (
+    'city_id', 'city', 'country', 'issued', 'dt', 'temp', 'feels_like', 'temp_min', 'temp_max',
+    'pressure', 'humidity', 'visibility', 'wind_speed', 'wind_deg', 'wind_gust', 'clouds', 'pop',
+    'rain', 'snow', 'weather_id', 'description', 'icon'
+)
+SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS observations (
+        {', '.join(OBSERVATION_COLUMNS)},
+        PRIMARY KEY (city_id, dt)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS forecasts (
+        {', '.join(FORECAST_COLUMNS)},
+        PRIMARY KEY (city_id, issued, dt)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS observations_city_dt
+        ON observations (city COLLATE NOCASE, country, dt);
+    CREATE INDEX IF NOT EXISTS forecasts_city_dt
+        ON forecasts (city COLLATE NOCASE, country, dt);
+    CREATE TABLE IF NOT EXISTS imported_saves (
+        name TEXT PRIMARY KEY
+    ) WITHOUT ROWID;
+"""
+
+
+class WeatherArchive:
+    """
+    This class represents the local archive of weather observations and forecasts.
+
+    Args:
+        path (str): The path of the database file.
+
+    Attributes:
+        path (str): The path of the database file.
+
+    Methods:
+        add(): Stores one save, i.e. weather and forecast data.
+        import_saves(): Stores the saves of a directory that were not imported yet.
+        observations(): Returns the observations of a city between two moments.
+        forecasts(): Returns the forecast records of a city between two moments.
+        series(): Returns a few columns of a city between two moments.
+        time_range(): Returns the times of the first and the last row of a city.
+        cities(): Returns all archived cities.
+        close(): Closes the database.
+    """
+    def __init__(self, path: str = ARCHIVE_FILE) -> None:
+        """
+        Open the archive, creating the database when it does not exist.
+
+        Args:
+            path (str): The path of the database file.
+
+        Returns:
+            None
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, weather: dict, forecast: dict) -> None:
+        """
+        Store weather and forecast data of one save.
+
+        Args:
+            weather (dict): Weather data.
+            forecast (dict): Forecast data.
+
+        Returns:
+            None
+        """
+        self._insert([weather], [(weather, forecast)])
+
+    def import_saves(self, directory: str = SAVES_DIR) -> int:
+        """
+        Store the saves of a directory that were not imported yet, in one transaction.
+
+        Saves in the save store and in JSON files are imported, the names of imported
+        saves are recorded, so importing again reads only the new ones.
+
+        Args:
+            directory (str): The saves directory.
+
+        Returns:
+            int: The number of imported saves.
+        """
+        with self._lock:
+            imported = {row[0] for row in
+                        self._connection.execute('SELECT name FROM imported_saves')}
+        saves = list(iter_saves(directory, skip=imported))
+        self._insert([weather for _, weather, _ in saves],
+                     [(weather, forecast) for _, weather, forecast in saves])
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT OR IGNORE INTO imported_saves VALUES (?)',
+                                         [(name,) for name, _, _ in saves])
+        return len(saves)
+
+    def observations(self, city: str, start: int, end: int,
+                     country: Optional[str] = None) -> list:
+        """
+        Get the observations of a city between two moments.
+
+        Args:
+            city (str): The city name, letter case is ignored.
+            start (int): The Unix timestamp of the beginning of the range.
+            end (int): The Unix timestamp of the end of the range.
+            country (Optional[str]): The country code.
+
+        Returns:
+            list: A list of dictionaries ordered by time.
+        """
+        return self._select('observations', city, start, end, country)
+
+    def forecasts(self, city: str, start: int, end: int,
+                  country: Optional[str] = None) -> list:
+        """
+        Get the forecast records of a city, whose forecast time is between two moments.
+
+        Args:
+            city (str): The city name, letter case is ignored.
+            start (int): The Unix timestamp of the beginning of the range.
+            end (int): The Unix timestamp of the end of the range.
+            country (Optional[str]): The country code.
+
+        Returns:
+            list: A list of dictionaries ordered by forecast time and issue time.
+        """
+        return self._select('forecasts', city, start, end, country)
+
+    def series(self, table: str, city_id: int, start: int, end: int, columns: tuple) -> list:
+        """
+        Get a few columns of a city between two moments, for plotting.
+
+        Forecast records of the same time are reduced to the last issued one.
+
+        Args:
+            table (str): 'observations' or 'forecasts'.
+            city_id (int): The city ID.
+            start (int): The Unix timestamp of the beginning of the range.
+            end (int): The Unix timestamp of the end of the range.
+            columns (tuple): The column names, they are not escaped.
+
+        Returns:
+            list: A list of (dt, *columns) tuples ordered by time.
+        """
+        selected = ', '.join(columns)
+        if table == 'forecasts':
+            # SQLite takes the bare columns from the row holding MAX(issued)
+            query = f"SELECT dt, {selected}, MAX(issued) FROM forecasts " \
+                    f"WHERE city_id = ? AND dt BETWEEN ? AND ? GROUP BY dt ORDER BY dt"
+        else:
+            query = f"SELECT dt, {selected} FROM observations " \
+                    f"WHERE city_id = ? AND dt BETWEEN ? AND ? ORDER BY dt"
+        with self._lock:
+            rows = self._connection.execute(query, (city_id, start, end)).fetchall()
+        return [tuple(row)[:len(columns) + 1] for row in rows]
+
+    def time_range(self, table: str, city_id: int) -> Optional[tuple]:
+        """
+        Get the times of the first and the last row of a city.
+
+        Args:
+            table (str): 'observations' or 'forecasts'.
+            city_id (int): The city ID.
+
+        Returns:
+            Optional[tuple]: The (first, last) Unix timestamps or None if there are no rows.
+        """
+        with self._lock:
+            first, last = self._connection.execute(
+                f'SELECT MIN(dt), MAX(dt) FROM {table} WHERE city_id = ?', (city_id,)).fetchone()
+        return None if first is None else (first, last)
+
+    def cities(self) -> list:
+        """
+        Get all archived cities.
+
+        Returns:
+            list: A list of (city id, city, country) tuples.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT DISTINCT city_id, city, country FROM observations ORDER BY city').fetchall()
+        return [tuple(row) for row in rows]
+
+    def close(self) -> None:
+        """
+        Close the database.
+
+        Returns:
+            None
+        """
+        self._connection.close()
+
+    def _insert(self, observations: list, forecasts: list) -> None:
+        """
+        Insert observation and forecast rows in one transaction.
+
+        Args:
+            observations (list): Weather data of saves.
+            forecasts (list): (weather, forecast) pairs of saves.
+
+        Returns:
+            None
+        """
+        observation_rows = [observation_row(weather) for weather in observations]
+        forecast_rows = [row for weather, forecast in forecasts
+                         for row in forecast_rows_of(weather, forecast)]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO observations VALUES "
+                f"({', '.join('?' * len(OBSERVATION_COLUMNS))})", observation_rows)
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO forecasts VALUES "
+                f"({', '.join('?' * len(FORECAST_COLUMNS))})", forecast_rows)
+
+    def _select(self, table: str, city: str, start: int, end: int,
+                country: Optional[str]) -> list:
+        """
+        Select the rows of a city between two moments.
+
+        Args:
+            table (str): The table name.
+            city (str): The city name.
+            start (int): The Unix timestamp of the beginning of the range.
+            end (int): The Unix timestamp of the end of the range.
+            country (Optional[str]): The country code.
+
+        Returns:
+            list: A list of dictionaries.
+        """
+        conditions = ['city = ? COLLATE NOCASE']
+        params: list = [city]
+        if country is not None:
+            conditions.append('country = ?')
+            params.append(country)
+        conditions.append('dt BETWEEN ? AND ?')
+        params.extend((start, end))
+        order = 'dt, issued' if table == 'forecasts' else 'dt'
+        query = f"SELECT * FROM {table} WHERE {' AND '.join(conditions)} ORDER BY {order}"
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+
+def observation_row(weather: dict) -> tuple:
+    """
+    Flatten weather data to an observation row.
+
+    Args:
+        weather (dict): Weather data.
+
+    Returns:
+        tuple: The row values in the order of OBSERVATION_COLUMNS.
+    """
+    main = weather['main']
+    wind = weather.get('wind', {})
+    condition = weather['weather'][0]
+    return (
+        weather['id'], weather['name'], weather['sys'].get('country'), weather['dt'],
+        weather.get('timezone'), weather['coord']['lat'], weather['coord']['lon'],
+        main['temp'], main.get('feels_like'), main.get('temp_min'), main.get('temp_max'),
+        main.get('pressure'), main.get('humidity'), weather.get('visibility'),
+        wind.get('speed'), wind.get('deg'), wind.get('gust'), weather.get('clouds', {}).get('all'),
+        weather.get('rain', {}).get('1h'), weather.get('snow', {}).get('1h'),
+        condition['id'], condition['description'], condition['icon'],
+        weather['sys'].get('sunrise'), weather['sys'].get('sunset')
+    )
+
+def forecast_rows_of(weather: dict, forecast: dict) -> list:
+    """
+    Flatten forecast data to forecast rows.
+
+    The forecast is considered issued at the time of the weather data saved with it.
+
+    Args:
+        weather (dict): Weather data saved with the forecast.
+        forecast (dict): Forecast data.
+
+    Returns:
+        list: A list of rows in the order of FORECAST_COLUMNS.
+    """
+    city = forecast['city']
+    rows = []
+    for entry in forecast['list']:
+        main = entry['main']
+        wind = entry.get('wind', {})
+        condition = entry['weather'][0]
+        rows.append((
+            city['id'], city['name'], city.get('country'), weather['dt'], entry['dt'],
+            main['temp'], main.get('feels_like'), main.get('temp_min'), main.get('temp_max'),
+            main.get('pressure'), main.get('humidity'), entry.get('visibility'),
+            wind.get('speed'), wind.get('deg'), wind.get('gust'),
+            entry.get('clouds', {}).get('all'), entry.get('pop'),
+            entry.get('rain', {}).get('3h'), entry.get('snow', {}).get('3h'),
+            condition['id'], condition['description'], condition['icon']
+        ))
+    return rows
+
+
+_ARCHIVE: Optional[WeatherArchive] = None
+
+def get_archive() -> WeatherArchive:
+    """
+    Get the archive shared by the whole application, opening it on first use.
+
+    Returns:
+        WeatherArchive: The shared archive.
+    """
+    global _ARCHIVE
+    if _ARCHIVE is None:
+        _ARCHIVE = WeatherArchive()
+    return _ARCHIVE
+
+def parse_date(text: str) -> int:
+    """
+    Convert a dd.mm.yy date to the Unix timestamp of its UTC midnight.
+
+    Args:
+        text (str): The date.
+
+    Returns:
+        int: The Unix timestamp.
+    """
+    return int(datetime.strptime(text, '%d.%m.%y').replace(tzinfo=dt_timezone.utc).timestamp())
+
+def date_argument(text: str) -> int:
+    """
+    Convert a dd.mm.yy date given on the command line to the Unix timestamp of its UTC midnight.
+
+    Args:
+        text (str): The date.
+
+    Returns:
+        int: The Unix timestamp.
+    """
+    try:
+        return parse_date(text)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a date in the dd.mm.yy format") \
+            from error
+
+def main(args: list) -> None:
+    """
+    Run the archive command line.
+
+    Args:
+        args (list): The command line arguments.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.archive',
+                                     description='Manage the local archive of saved weather data.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help='import the saves into the archive')
+    import_parser.add_argument('directory', nargs='?', default=SAVES_DIR,
+                               help='the directory of the saves')
+    query_parser = commands.add_parser('query', help='show the archived weather of a city')
+    query_parser.add_argument('city', help='the name of the city')
+    query_parser.add_argument('start', type=date_argument, help='the first day, dd.mm.yy')
+    query_parser.add_argument('end', type=date_argument, help='the last day, dd.mm.yy')
+    query_parser.add_argument('country', nargs='?', help='the country code of the city')
+    options = parser.parse_args(args)
+
+    archive = get_archive()
+    if options.command == 'import':
+        print(f'Imported {archive.import_saves(options.directory)} saves to {archive.path}')
+        return
+    start, end = options.start, options.end + 86399
+    for row in archive.observations(options.city, start, end, options.country):
+        print(f"{row['dt']} {row['city']}-{row['country']}: {row['temp']}°C, "
+              f"{row['pressure']}hPa, {row['humidity']}%, {row['wind_speed']}m/s")
+    print(f'{len(archive.forecasts(options.city, start, end, options.country))} forecast records')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,172 @@
+'''
+This module is responsible for refreshing the shown city in the background.
+
+Current weather is refreshed every AUTO_REFRESH_WEATHER seconds, the forecast
+shortly after every 3-hour boundary, when OpenWeatherMap publishes a new one.
+Refreshing pauses while the window is hidden or minimized and catches up when
+it is shown again.
+'''
+import time
+from typing import Optional
+from PyQt5.QtCore import QObject, QEvent, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QWidget
+from src.settings import AUTO_REFRESH_WEATHER, AUTO_REFRESH_FORECAST_CADENCE, \
+    AUTO_REFRESH_FORECAST_DELAY
+
+KINDS = ('weather', 'forecast')
+
+
+class AutoRefresher(QObject):
+    """
+    This class schedules background refreshes of weather and forecast data.
+
+    Args:
+        window (QWidget): The window whose visibility pauses refreshing.
+
+    Attributes:
+        refresh_due (pyqtSignal): Emitted with the kind of data that should be refreshed.
+        active (bool): Whether refreshing is scheduled.
+        due (dict): The Unix time of the next refresh of every kind.
+
+    Methods:
+        start(): Schedules refreshing from now on.
+        stop(): Stops refreshing.
+        next_due(): Returns the time of the next refresh of a kind.
+    """
+    refresh_due = pyqtSignal(str)
+
+    def __init__(self, window: QWidget) -> None:
+        """
+        Initialize the refresher, it does nothing until start is called.
+
+        Args:
+            window (QWidget): The window whose visibility pauses refreshing.
+
+        Returns:
+            None
+        """
+        super().__init__(window)
+        self.window = window
+        self.active = False
+        self.due: dict = {}
+        self._timers: dict = {}
+        for kind in KINDS:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda kind=kind: self._fire(kind))
+            self._timers[kind] = timer
+        window.installEventFilter(self)
+
+    def start(self) -> None:
+        """
+        Schedule refreshing from now on, e.g. after a new city was shown.
+
+        Returns:
+            None
+        """
+        self.active = True
+        for kind in KINDS:
+            self._schedule(kind, self.next_due(kind))
+
+    def stop(self) -> None:
+        """
+        Stop refreshing.
+
+        Returns:
+            None
+        """
+        self.active = False
+        for timer in self._timers.values():
+            timer.stop()
+
+    def next_due(self, kind: str, now: Optional[float] = None) -> float:
+        """
+        Compute the time of the next refresh of a kind of data.
+
+        Args:
+            kind (str): 'weather' or 'forecast'.
+            now (Optional[float]): The current Unix time, the time of the call by default.
+
+        Returns:
+            float: The Unix time of the next refresh.
+        """
+        now = time.time() if now is None else now
+        if kind == 'weather':
+            return now + AUTO_REFRESH_WEATHER
+        cadence = AUTO_REFRESH_FORECAST_CADENCE
+        due = now // cadence * cadence + AUTO_REFRESH_FORECAST_DELAY
+        return due if due > now else due + cadence
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:  # pylint: disable=invalid-name
+        """
+        Pause refreshing while the window is hidden or minimized.
+
+        Args:
+            watched (QObject): The window.
+            event (QEvent): The event.
+
+        Returns:
+            bool: Always False, the event is not consumed.
+        """
+        if self.active and event.type() in (QEvent.Hide, QEvent.Show, QEvent.WindowStateChange):
+            if self._visible(watched):
+                self._resume()
+            else:
+                for timer in self._timers.values():
+                    timer.stop()
+        return False
+
+    def _visible(self, window: QWidget = None) -> bool:
+        """
+        Check whether the window can be seen.
+
+        Args:
+            window (QWidget): The window as passed to the event filter, it is
+                used during shutdown when the window itself is being deleted.
+
+        Returns:
+            bool: True if the window is visible and not minimized.
+        """
+        window = self.window if window is None else window
+        return window.isVisible() and not window.isMinimized()
+
+    def _schedule(self, kind: str, due: float) -> None:
+        """
+        Set the time of the next refresh of a kind and start its timer if the window is visible.
+
+        Args:
+            kind (str): 'weather' or 'forecast'.
+            due (float): The Unix time of the refresh.
+
+        Returns:
+            None
+        """
+        self.due[kind] = due
+        if self._visible():
+            self._timers[kind].start(int(max(0.0, due - time.time()) * 1000))
+
+    def _resume(self) -> None:
+        """
+        Restart the timers, refreshes missed while hidden fire right away.
+
+        Returns:
+            None
+        """
+        for kind in KINDS:
+            if not self._timers[kind].isActive():
+                self._schedule(kind, self.due[kind])
+
+    def _fire(self, kind: str) -> None:
+        """
+        Ask for a refresh and schedule the next one.
+
+        Args:
+            kind (str): 'weather' or 'forecast'.
+
+        Returns:
+            None
+        """
+        if not self.active:
+            return
+        self.refresh_due.emit(kind)
+        self._schedule(kind, self.next_due(kind))
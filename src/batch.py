@@ -0,0 +1,214 @@
+'''
+This module is responsible for fetching many cities without the GUI.
+
+Weather and forecast of every city are fetched concurrently and saved in the
+same format as save_day_to_file produces:
+
+    python -m src.batch [--workers N] [--rate CALLS] [--output DIRECTORY] [--cities FILE]
+        [--no-group]
+
+Without --cities the CITIES list from settings is used, a cities file holds one city per line.
+Cities known to the city index are asked for by ID and their current weather is fetched
+in groups of GROUP_SIZE cities per request, --no-group sends one request per city.
+
+Requests are limited to --rate calls per minute, BATCH_CALLS_PER_MINUTE by default,
+the quota of the free plan. Every city needs a forecast request, so at 60 calls per
+minute 200 cities take over three minutes whatever the number of workers. A higher
+rate finishes sooner, but calls over the quota of the API key are rejected.
+'''
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+from src.city_index import get_city_index
+from src.client import WeatherClient, WeatherApiError, create_session
+from src.response_cache import ResponseCache
+from src.scheduler import RequestScheduler, BACKGROUND
+from src.settings import CITIES, SAVES_DIR, BATCH_WORKERS, BATCH_CALLS_PER_MINUTE
+from src.support import get_api_key, save_day_to_file
+
+
+def fetch_city(client: WeatherClient, city: str, query: Optional[str] = None,
+               weather: Optional[dict] = None) -> dict:
+    """
+    Fetch weather and forecast data of one city.
+
+    Args:
+        client (WeatherClient): The client used to send requests.
+        city (str): The city name.
+        query (Optional[str]): The query sent to the API, the city name by default.
+        weather (Optional[dict]): The weather data when it was already fetched in a group.
+
+    Returns:
+        dict: The result with the keys 'city', 'weather', 'forecast', 'latency' and 'error'.
+    """
+    result = {'city': city, 'weather': None, 'forecast': None, 'latency': 0.0, 'error': None}
+    query = city if query is None else query
+    start = time.perf_counter()
+    try:
+        if weather is None:
+            weather = client.current_weather(query, BACKGROUND)
+        forecast = client.forecast(query, BACKGROUND)
+    except WeatherApiError as error:
+        result['error'] = str(error)
+    else:
+        if str(weather.get('cod')) != '200':
+            result['error'] = weather.get('message', f"API error {weather.get('cod')}")
+        elif str(forecast.get('cod')) != '200':
+            result['error'] = forecast.get('message', f"API error {forecast.get('cod')}")
+        else:
+            result['weather'] = weather
+            result['forecast'] = forecast
+    result['latency'] = time.perf_counter() - start
+    return result
+
+def fetch_cities(cities: Iterable[str], workers: int = BATCH_WORKERS,
+                 client: Optional[WeatherClient] = None, group: bool = True) -> list:
+    """
+    Fetch weather and forecast data of many cities with bounded parallelism.
+
+    Args:
+        cities (Iterable[str]): The city names, duplicates are fetched once.
+        workers (int): The maximum number of cities fetched at the same time.
+        client (Optional[WeatherClient]): The client used to send requests,
+            a client with a connection pool matching the number of workers is created by default.
+        group (bool): Whether the current weather of cities with known IDs is fetched in groups.
+
+    Returns:
+        list: The results of fetch_city in the order of cities.
+    """
+    cities = list(dict.fromkeys(cities))
+    if client is None:
+        client = create_batch_client(workers)
+    queries = resolve_queries(cities) if group else {}
+    weathers = {}
+    if queries:
+        try:
+            weathers = client.current_weather_group(
+                [int(query[3:]) for query in queries.values()], BACKGROUND)
+        except WeatherApiError as error:
+            # Every city is asked for on its own then, so the error is reported per city
+            print(f'Fetching the group failed: {error}')
+
+    def fetch(city: str) -> dict:
+        query = queries.get(city)
+        weather = weathers.get(int(query[3:])) if query is not None else None
+        return fetch_city(client, city, query, weather)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fetch, cities))
+
+def resolve_queries(cities: list) -> dict:
+    """
+    Find the ID queries of cities known to the city index.
+
+    Args:
+        cities (list): The city names.
+
+    Returns:
+        dict: The 'id:' queries by city name, unknown cities are left out.
+    """
+    index = get_city_index()
+    queries = {}
+    for city in cities:
+        city_id = index.resolve(city)
+        if city_id is not None:
+            queries[city] = f'id:{city_id}'
+    return queries
+
+def create_batch_client(workers: int = BATCH_WORKERS,
+                        calls_per_minute: int = BATCH_CALLS_PER_MINUTE) -> WeatherClient:
+    """
+    Create a client with a connection pool matching the number of workers.
+
+    Args:
+        workers (int): The maximum number of cities fetched at the same time.
+        calls_per_minute (int): The rate limit of requests.
+
+    Returns:
+        WeatherClient: The client.
+    """
+    return WeatherClient(get_api_key(), create_session(workers), ResponseCache(),
+                         RequestScheduler(calls_per_minute))
+
+def save_results(results: list, directory: str = SAVES_DIR) -> int:
+    """
+    Save all successful results.
+
+    Args:
+        results (list): The results of fetch_cities.
+        directory (str): The directory of save files.
+
+    Returns:
+        int: The number of saved cities.
+    """
+    os.makedirs(directory, exist_ok=True)
+    saved = 0
+    for result in results:
+        if result['error'] is None:
+            save_day_to_file(result['weather'], result['forecast'], directory)
+            saved += 1
+    return saved
+
+def format_report(results: list, total: float) -> str:
+    """
+    Build a report of per-city latency and failures.
+
+    Args:
+        results (list): The results of fetch_cities.
+        total (float): The duration of the whole batch in seconds.
+
+    Returns:
+        str: The report.
+    """
+    lines = []
+    for result in results:
+        status = 'OK' if result['error'] is None else f"FAILED: {result['error']}"
+        lines.append(f"{result['city']:<24}{result['latency'] * 1000:8.0f} ms  {status}")
+    failed = sum(result['error'] is not None for result in results)
+    lines.append(f'{len(results)} cities, {failed} failed, {total:.2f} s in total')
+    return '\n'.join(lines)
+
+def main(args: list) -> None:
+    """
+    Run the batch command line.
+
+    Args:
+        args (list): The command line arguments.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.batch',
+                                     description='Fetch and save the weather of many cities.')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS,
+                        help='number of cities fetched at the same time')
+    parser.add_argument('--rate', type=int, default=BATCH_CALLS_PER_MINUTE, metavar='CALLS',
+                        help='API calls per minute; the default is the quota of the free plan, '
+                             'calls over the quota of the API key are rejected')
+    parser.add_argument('--output', default=SAVES_DIR, metavar='DIRECTORY',
+                        help='directory of the saves')
+    parser.add_argument('--cities', metavar='FILE', help='file with one city per line')
+    parser.add_argument('--no-group', action='store_true',
+                        help='send one weather request per city')
+    options = parser.parse_args(args)
+    if options.workers < 1 or options.rate < 1:
+        parser.error('--workers and --rate must be positive')
+    cities = CITIES
+    if options.cities is not None:
+        with open(options.cities, 'r', encoding='utf-8') as file:
+            cities = [line.strip() for line in file if line.strip()]
+
+    client = create_batch_client(options.workers, options.rate)
+    start = time.perf_counter()
+    results = fetch_cities(cities, options.workers, client, not options.no_group)
+    total = time.perf_counter() - start
+    save_results(results, options.output)
+    print(format_report(results, total))
+    print(', '.join(f'{key}: {value}' for key, value in client.stats().items()))
+    print(f'Limited to {options.rate} calls per minute, use --rate if the API key allows more')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
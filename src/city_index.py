@@ -0,0 +1,395 @@
+'''
+This module is responsible for the local index of known cities.
+
+City names are kept in a trie, which gives prefix completions for the search
+field and, when nothing starts with the typed text, completions within a small
+edit distance. Known names resolve to OpenWeatherMap city IDs, so a search sends
+'id:<number>' instead of free text. Other names, misspelled or missing from the
+index, are sent as typed, similar names are only suggested.
+
+The index is built from the bundled src/data/cities.csv, the saves and the
+archive. The bundled list can be regenerated from the OpenWeatherMap city list with:
+
+    python -m src.city_index --refresh
+'''
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import threading
+import unicodedata
+from typing import NamedTuple, Optional
+from src.save_store import iter_saves
+from src.settings import CITIES_FILE, CITIES_URL, SAVES_DIR, ARCHIVE_FILE, \
+    CITY_COMPLETIONS, CITY_MAX_DISTANCE
+
+# Letters without a decomposition into a base letter and a diacritic
+SPECIAL_LETTERS = str.maketrans({'ł': 'l', 'ø': 'o', 'đ': 'd', 'ß': 'ss', 'æ': 'ae', 'œ': 'oe'})
+
+
+class City(NamedTuple):
+    """
+    A city known to the index.
+    """
+    id: int
+    name: str
+    country: str
+
+    def label(self) -> str:
+        """
+        Get the text shown in the completion list, it can be resolved back to the city.
+
+        Returns:
+            str: The name and the country code, e.g. 'Rzym, IT'.
+        """
+        return f'{self.name}, {self.country}'
+
+
+class _Node:
+    """
+    A node of the trie, cities are stored in the node where their name ends.
+    """
+    __slots__ = ('children', 'cities')
+
+    def __init__(self) -> None:
+        self.children: dict = {}
+        self.cities: list = []
+
+
+class CityIndex:
+    """
+    This class represents a searchable index of city names.
+
+    Attributes:
+        size (int): The number of indexed cities.
+
+    Methods:
+        add(): Adds a city.
+        complete(): Returns cities whose names start with a text.
+        fuzzy(): Returns cities whose names are similar to a text.
+        suggest(): Returns completions, falling back to similar names.
+        resolve(): Finds the city ID for a query.
+    """
+    def __init__(self) -> None:
+        """
+        Initialize an empty index.
+
+        Returns:
+            None
+        """
+        self._root = _Node()
+        self._ids: set = set()
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def add(self, city_id: int, name: str, country: str) -> bool:
+        """
+        Add a city, cities already in the index under the same name are skipped.
+
+        Args:
+            city_id (int): The OpenWeatherMap city ID.
+            name (str): The city name.
+            country (str): The country code.
+
+        Returns:
+            bool: True if the city was added.
+        """
+        key = normalize_name(name)
+        with self._lock:
+            if not key or (city_id, key) in self._ids:
+                return False
+            node = self._root
+            for letter in key:
+                node = node.children.setdefault(letter, _Node())
+            node.cities.append(City(int(city_id), name, country or ''))
+            self._ids.add((city_id, key))
+            self.size += 1
+        return True
+
+    def complete(self, prefix: str, limit: int = CITY_COMPLETIONS) -> list:
+        """
+        Get cities whose names start with a text, shorter names first.
+
+        Args:
+            prefix (str): The typed text.
+            limit (int): The maximum number of cities.
+
+        Returns:
+            list: A list of City tuples.
+        """
+        node = self._find(normalize_name(prefix))
+        if node is None:
+            return []
+        found = []
+        level = [node]
+        while level and len(found) < limit:
+            for current in level:
+                found.extend(current.cities)
+            level = [child for current in level for child in current.children.values()]
+        return found[:limit]
+
+    def fuzzy(self, text: str, max_distance: int = CITY_MAX_DISTANCE,
+              limit: int = CITY_COMPLETIONS) -> list:
+        """
+        Get cities whose names are within an edit distance of a text, closest first.
+
+        Short texts allow fewer edits, one per four letters but at least one. The trie
+        is walked with one row of the Levenshtein table per letter, branches whose row
+        is already over the distance are skipped.
+
+        Args:
+            text (str): The typed text.
+            max_distance (int): The maximum number of edits.
+            limit (int): The maximum number of cities.
+
+        Returns:
+            list: A list of City tuples.
+        """
+        key = normalize_name(text)
+        if not key:
+            return []
+        max_distance = min(max_distance, max(1, len(key) // 4))
+        found = []
+        first_row = list(range(len(key) + 1))
+        stack = [(child, letter, first_row) for letter, child in self._root.children.items()]
+        while stack:
+            node, letter, previous = stack.pop()
+            row = [previous[0] + 1]
+            for column in range(1, len(key) + 1):
+                row.append(min(row[column - 1] + 1, previous[column] + 1,
+                               previous[column - 1] + (key[column - 1] != letter)))
+            if row[-1] <= max_distance:
+                found.extend((row[-1], city) for city in node.cities)
+            if min(row) <= max_distance:
+                stack.extend((child, next_letter, row)
+                             for next_letter, child in node.children.items())
+        found.sort(key=lambda item: (item[0], len(item[1].name)))
+        return [city for _, city in found[:limit]]
+
+    def suggest(self, text: str, limit: int = CITY_COMPLETIONS) -> list:
+        """
+        Get completions of a text, or similar names when nothing starts with it.
+
+        Args:
+            text (str): The typed text.
+            limit (int): The maximum number of cities.
+
+        Returns:
+            list: A list of City tuples.
+        """
+        name, country = split_query(text)
+        cities = self.complete(name, limit * 4) or self.fuzzy(name, limit=limit * 4)
+        if country:
+            cities = [city for city in cities if city.country.casefold() == country]
+        return cities[:limit]
+
+    def resolve(self, query: str) -> Optional[int]:
+        """
+        Find the city ID for a query, e.g. 'Rzym' or 'rzym, it'.
+
+        Only a name of the index resolves, without regard to case and diacritics. A name
+        shared by several cities resolves only if the country tells them apart. Similar
+        names never resolve, a city missing from the index must not become another one.
+
+        Args:
+            query (str): The typed text.
+
+        Returns:
+            Optional[int]: The city ID or None if the query is unknown or ambiguous.
+        """
+        name, country = split_query(query)
+        node = self._find(normalize_name(name))
+        cities = list(node.cities) if node is not None else []
+        if country:
+            cities = [city for city in cities if city.country.casefold() == country]
+        if len({city.id for city in cities}) != 1:
+            return None
+        return cities[0].id
+
+    def _find(self, key: str) -> Optional[_Node]:
+        """
+        Get the node of a normalized name.
+
+        Args:
+            key (str): The normalized name.
+
+        Returns:
+            Optional[_Node]: The node or None if no name starts with the key.
+        """
+        node = self._root
+        for letter in key:
+            node = node.children.get(letter)
+            if node is None:
+                return None
+        return node
+
+
+def normalize_name(name: str) -> str:
+    """
+    Convert a city name to its index key: without case, diacritics and extra whitespace.
+
+    Args:
+        name (str): The city name.
+
+    Returns:
+        str: The index key.
+    """
+    name = unicodedata.normalize('NFKD', name.casefold().translate(SPECIAL_LETTERS))
+    return ' '.join(''.join(letter for letter in name if not unicodedata.combining(letter))
+                    .split())
+
+def split_query(query: str) -> tuple:
+    """
+    Split a query into the city name and an optional two-letter country code.
+
+    Args:
+        query (str): The query, e.g. 'Rzym, IT'.
+
+    Returns:
+        tuple: The name and the casefolded country code or None.
+    """
+    name, _, country = query.rpartition(',')
+    country = country.strip()
+    if name and len(country) == 2:
+        return name, country.casefold()
+    return query, None
+
+def load_cities(path: str = CITIES_FILE) -> list:
+    """
+    Load the bundled list of cities.
+
+    Args:
+        path (str): The path of the CSV file.
+
+    Returns:
+        list: A list of City tuples.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            return [City(int(row['id']), row['name'], row['country'])
+                    for row in csv.DictReader(file)]
+    except FileNotFoundError:
+        print('There was problem with loading the list of cities')
+        return []
+
+def saved_cities(directory: str = SAVES_DIR) -> list:
+    """
+    Get the cities of all saves in a directory.
+
+    Args:
+        directory (str): The directory with the saves.
+
+    Returns:
+        list: A list of City tuples.
+    """
+    cities = []
+    for _, weather, _ in iter_saves(directory, with_forecast=False):
+        try:
+            cities.append(City(weather['id'], weather['name'], weather['sys']['country']))
+        except (KeyError, TypeError):
+            continue
+    return cities
+
+def archived_cities(path: str = ARCHIVE_FILE) -> list:
+    """
+    Get the cities of the archive, an archive that does not exist yet is not created.
+
+    Args:
+        path (str): The path of the database file.
+
+    Returns:
+        list: A list of City tuples.
+    """
+    if not os.path.exists(path):
+        return []
+    from src.archive import WeatherArchive  # pylint: disable=import-outside-toplevel
+    archive = WeatherArchive(path)
+    try:
+        return [City(*row) for row in archive.cities()]
+    finally:
+        archive.close()
+
+def build_index(cities_file: str = CITIES_FILE, saves: str = SAVES_DIR,
+                archive: str = ARCHIVE_FILE) -> CityIndex:
+    """
+    Build the index from the bundled list, the saves and the archive.
+
+    Args:
+        cities_file (str): The path of the bundled list.
+        saves (str): The directory with the saves.
+        archive (str): The path of the archive.
+
+    Returns:
+        CityIndex: The index.
+    """
+    index = CityIndex()
+    for source in (load_cities(cities_file), saved_cities(saves), archived_cities(archive)):
+        for city in source:
+            index.add(*city)
+    return index
+
+_INDEX: Optional[CityIndex] = None
+
+def get_city_index() -> CityIndex:
+    """
+    Get the index shared by the whole application, building it on first use.
+
+    Returns:
+        CityIndex: The shared index.
+    """
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = build_index()
+    return _INDEX
+
+def refresh_cities(path: str = CITIES_FILE) -> int:
+    """
+    Regenerate the bundled list from the OpenWeatherMap city list.
+
+    Local names of the current list, e.g. 'Rzym' of the cities in settings.CITIES,
+    are kept for the cities that are still listed.
+
+    Args:
+        path (str): The path of the CSV file to write.
+
+    Returns:
+        int: The number of written cities.
+    """
+    import requests  # pylint: disable=import-outside-toplevel
+
+    response = requests.get(CITIES_URL, timeout=60)
+    response.raise_for_status()
+    cities = {(city['id'], city['name']): City(city['id'], city['name'], city['country'])
+              for city in json.loads(gzip.decompress(response.content))}
+    listed = {city_id for city_id, _ in cities}
+    for city in load_cities(path) if os.path.exists(path) else []:
+        if city.id in listed:
+            cities.setdefault((city.id, city.name), city)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(['id', 'name', 'country'])
+        for key in sorted(cities):
+            writer.writerow(cities[key])
+    return len(cities)
+
+def main(args: list) -> None:
+    """
+    Run the city index command line.
+
+    Args:
+        args (list): The command line arguments.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.city_index',
+                                     description='Manage the bundled list of cities.')
+    parser.add_argument('--refresh', action='store_true', required=True,
+                        help='regenerate the list from the OpenWeatherMap city list')
+    parser.parse_args(args)
+    print(f'Saved {refresh_cities()} cities to {CITIES_FILE}')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,541 @@
+'''
+This module is responsible for communication with the OpenWeatherMap servers.
+'''
+import threading
+import time
+from functools import partial
+from typing import Iterable, Optional, TYPE_CHECKING
+from urllib.parse import urlsplit
+from src.resilience import CircuitBreaker, backoff_delay
+from src.response_cache import ResponseCache, make_key
+from src.scheduler import RequestScheduler, INTERACTIVE
+from src.tracing import TRACER
+from src.settings import API_URL, ICON_URL, UNITS, LANG, TIMEOUT, POOL_SIZE, \
+    RESPONSE_CACHE_SIZE, GROUP_SIZE, CONNECT_TIMEOUT, RETRY_ATTEMPTS, RETRY_STATUSES
+
+if TYPE_CHECKING:
+    import requests
+
+
+class WeatherApiError(Exception):
+    """
+    This exception is raised when a request to the weather servers fails.
+    """
+
+
+class CircuitOpenError(WeatherApiError):
+    """
+    This exception is raised without sending a request while the weather servers are down.
+    """
+
+
+class WeatherClient:
+    """
+    This class represents a client of the OpenWeatherMap API.
+
+    All requests go through one pooled session, so connections are kept alive
+    and reused between searches instead of being opened for every request.
+    Failed requests are retried with a jittered backoff, and every server has
+    a circuit breaker, so requests fail at once while it is down.
+
+    Args:
+        api_key (str): The API key.
+        session (Optional[requests.Session]): The session used to send requests,
+            a pooled session is created when it is not given.
+        cache (Optional[ResponseCache]): The cache of successful responses.
+        scheduler (Optional[RequestScheduler]): The scheduler of requests.
+
+    Attributes:
+        api_key (str): The API key.
+        session (requests.Session): The session used to send requests,
+            created on first use, so requests is imported only when it is needed.
+        cache (Optional[ResponseCache]): The cache of successful responses.
+        scheduler (Optional[RequestScheduler]): The scheduler of requests.
+        api_url (str): The base URL of the weather API.
+        icon_url (str): The base URL of the weather icons.
+        units (str): The units of measurement.
+        lang (str): The language of descriptions.
+        timeout (int): The timeout of a single request in seconds.
+        retries (int): The number of attempts of a request.
+        breakers (dict): The circuit breakers by server.
+
+    Methods:
+        current_weather(): Returns the current weather for a city.
+        current_weather_group(): Returns the current weather for many cities by their IDs.
+        forecast(): Returns the 5 day forecast for a city.
+        stale(): Returns the last good response for a city that is no longer fresh.
+        icon(): Returns the PNG data of a weather icon.
+        stats(): Returns the counters of calls made, saved and queued.
+        release_memory(): Drops the responses kept in memory.
+    """
+    def __init__(self, api_key: str = '', session: Optional['requests.Session'] = None,
+                 cache: Optional[ResponseCache] = None,
+                 scheduler: Optional[RequestScheduler] = None) -> None:
+        """
+        Initialize the weather client.
+
+        Args:
+            api_key (str): The API key.
+            session (Optional[requests.Session]): The session used to send requests.
+            cache (Optional[ResponseCache]): The cache of successful responses.
+            scheduler (Optional[RequestScheduler]): The scheduler of requests.
+
+        Returns:
+            None
+        """
+        self.api_key = api_key
+        self._session = session
+        self.cache = cache
+        self.scheduler = scheduler
+        # Shared by the fetch threads, guarded by the lock
+        self._validators: dict = {}
+        self._validators_lock = threading.Lock()
+        self.api_url = API_URL
+        self.icon_url = ICON_URL
+        self.units = UNITS
+        self.lang = LANG
+        self.timeout = TIMEOUT
+        self.retries = RETRY_ATTEMPTS
+        self.breakers: dict = {}
+
+    @property
+    def session(self) -> 'requests.Session':
+        """
+        Get the session used to send requests, creating it on first use.
+
+        Returns:
+            requests.Session: The session.
+        """
+        if self._session is None:
+            self._session = create_session()
+        return self._session
+
+    @session.setter
+    def session(self, session: 'requests.Session') -> None:
+        """
+        Replace the session used to send requests.
+
+        Args:
+            session (requests.Session): The new session.
+
+        Returns:
+            None
+        """
+        self._session = session
+
+    def current_weather(self, query: str, priority: int = INTERACTIVE,
+                        refresh: bool = False) -> dict:
+        """
+        Get the current weather for a city.
+
+        Args:
+            query (str): The city name, optionally followed by a country code,
+                or 'id:' followed by the city ID.
+            priority (int): INTERACTIVE or BACKGROUND, used by the scheduler.
+            refresh (bool): Whether to skip the cache and ask the server.
+
+        Returns:
+            dict: The weather data, API errors are returned with their 'cod' and 'message'.
+        """
+        return self._get_json('weather', query, priority, refresh)
+
+    def forecast(self, query: str, priority: int = INTERACTIVE, refresh: bool = False) -> dict:
+        """
+        Get the 5 day / 3 hour forecast for a city.
+
+        Args:
+            query (str): The city name, optionally followed by a country code,
+                or 'id:' followed by the city ID.
+            priority (int): INTERACTIVE or BACKGROUND, used by the scheduler.
+            refresh (bool): Whether to skip the cache and ask the server.
+
+        Returns:
+            dict: The forecast data, API errors are returned with their 'cod' and 'message'.
+        """
+        return self._get_json('forecast', query, priority, refresh)
+
+    def stale(self, kind: str, query: str) -> Optional[tuple]:
+        """
+        Get the last good response for a city when it is no longer fresh.
+
+        Args:
+            kind (str): 'weather' or 'forecast'.
+            query (str): The city name, optionally followed by a country code,
+                or 'id:' followed by the city ID.
+
+        Returns:
+            Optional[tuple]: The Unix time the response was stored and the response,
+                or None if the cache has no response or a fresh one.
+        """
+        if self.cache is None:
+            return None
+        entry = self.cache.get_stale(kind, query, self.units, self.lang)
+        if entry is None or time.time() - entry[0] < self.cache.ttl.get(kind, 0):
+            return None
+        return entry
+
+    def current_weather_group(self, city_ids: Iterable[int], priority: int = INTERACTIVE,
+                              refresh: bool = False) -> dict:
+        """
+        Get the current weather for many cities with as few requests as possible.
+
+        Cities missing from the cache are asked for together, GROUP_SIZE per request.
+        Every city gets a payload in the format of current_weather, which is also
+        cached under its 'id:' query.
+
+        Args:
+            city_ids (Iterable[int]): The city IDs.
+            priority (int): INTERACTIVE or BACKGROUND, used by the scheduler.
+            refresh (bool): Whether to skip the cache and ask the server.
+
+        Returns:
+            dict: The weather data by city ID, cities unknown to the server are left out.
+        """
+        results = {}
+        missing = []
+        for city_id in dict.fromkeys(int(city_id) for city_id in city_ids):
+            data = None
+            if self.cache is not None and not refresh:
+                data = self.cache.get('weather', f'id:{city_id}', self.units, self.lang)
+                TRACER.count('response_cache.hit' if data is not None else 'response_cache.miss')
+            if data is not None:
+                results[city_id] = data
+            else:
+                missing.append(city_id)
+
+        for start in range(0, len(missing), GROUP_SIZE):
+            group = missing[start:start + GROUP_SIZE]
+            fetch = partial(self._fetch_group, group)
+            if self.scheduler is None:
+                results.update(fetch())
+            else:
+                key = make_key('group', ','.join(map(str, group)), self.units, self.lang)
+                results.update(self.scheduler.submit(key, fetch, priority))
+        return results
+
+    def icon(self, icon: str) -> bytes:
+        """
+        Get a weather icon.
+
+        Icons do not count against the API quota, but identical downloads are still coalesced.
+
+        Args:
+            icon (str): The icon name.
+
+        Returns:
+            bytes: The PNG data of the icon.
+        """
+        if self.scheduler is None:
+            return self._download_icon(icon)
+        return self.scheduler.submit(f'icon|{icon}', partial(self._download_icon, icon),
+                                     limited=False)
+
+    def stats(self) -> dict:
+        """
+        Get the counters of the scheduler and the cache.
+
+        Returns:
+            dict: The numbers of calls made, saved (coalesced or served from the cache)
+                and queued.
+        """
+        stats = {'calls_made': 0, 'calls_saved': 0, 'calls_queued': 0, 'waiting': 0}
+        if self.scheduler is not None:
+            stats.update(self.scheduler.stats())
+        if self.cache is not None:
+            stats['calls_saved'] += self.cache.hits
+        return stats
+
+    def release_memory(self) -> None:
+        """
+        Drop the responses kept in memory and the validators of conditional requests.
+
+        The on-disk layer of the cache keeps its responses, so nothing is fetched again
+        before it expires.
+
+        Returns:
+            None
+        """
+        with self._validators_lock:
+            self._validators.clear()
+        if self.cache is not None:
+            self.cache.forget()
+
+    def _get_json(self, endpoint: str, query: str, priority: int, refresh: bool = False) -> dict:
+        """
+        Get a response of an API endpoint.
+
+        Fresh responses are served from the cache, other requests go through the scheduler.
+
+        Args:
+            endpoint (str): The endpoint name, e.g. 'weather'.
+            query (str): The city name.
+            priority (int): The priority of the request.
+            refresh (bool): Whether to skip the cache.
+
+        Returns:
+            dict: The decoded response.
+        """
+        if self.cache is not None and not refresh:
+            data = self.cache.get(endpoint, query, self.units, self.lang)
+            if data is not None:
+                TRACER.count('response_cache.hit')
+                return data
+            TRACER.count('response_cache.miss')
+
+        # While the server is down, fail before waiting in the queue of the scheduler
+        if self._breaker(self.api_url).retry_in():
+            TRACER.count('circuit.rejected')
+            raise CircuitOpenError('The server is unavailable')
+        fetch = partial(self._fetch_json, endpoint, query)
+        if self.scheduler is None:
+            return fetch()
+        return self.scheduler.submit(make_key(endpoint, query, self.units, self.lang),
+                                     fetch, priority)
+
+    def _fetch_json(self, endpoint: str, query: str) -> dict:
+        """
+        Send a request to an API endpoint, decode its JSON response and cache it if successful.
+
+        The request is conditional when the server sent validators (ETag or Last-Modified)
+        before, an unchanged response (304) is answered with the remembered data.
+
+        Args:
+            endpoint (str): The endpoint name.
+            query (str): The city name.
+
+        Returns:
+            dict: The decoded response.
+        """
+        params = {**query_params(query), 'lang': self.lang, 'units': self.units,
+                  'appid': self.api_key}
+        key = make_key(endpoint, query, self.units, self.lang)
+        with self._validators_lock:
+            validators = self._validators.get(key)
+        headers = {}
+        if validators is not None:
+            if validators['etag']:
+                headers['If-None-Match'] = validators['etag']
+            if validators['modified']:
+                headers['If-Modified-Since'] = validators['modified']
+        response = self._send(endpoint, f'{self.api_url}/{endpoint}', params, headers)
+        # Time from sending the request to the headers, it includes DNS, TCP and TLS
+        TRACER.record(f'http.{endpoint}.headers', response.elapsed.total_seconds())
+        if response.status_code == 304 and validators is not None:
+            TRACER.count('http.not_modified')
+            return validators['data']
+        try:
+            with TRACER.span(f'decode.{endpoint}'):
+                data = response.json()
+        except ValueError as error:
+            raise WeatherApiError(str(error)) from error
+
+        etag = response.headers.get('ETag')
+        modified = response.headers.get('Last-Modified')
+        if (etag or modified) and str(data.get('cod')) == '200':
+            with self._validators_lock:
+                self._validators[key] = {'etag': etag, 'modified': modified, 'data': data}
+                if len(self._validators) > RESPONSE_CACHE_SIZE:
+                    del self._validators[next(iter(self._validators))]
+
+        if self.cache is not None and str(data.get('cod')) == '200':
+            self.cache.put(endpoint, query, self.units, self.lang, data)
+        return data
+
+    def _fetch_group(self, city_ids: list) -> dict:
+        """
+        Send one request for the current weather of a group of cities and split the response.
+
+        Args:
+            city_ids (list): At most GROUP_SIZE city IDs.
+
+        Returns:
+            dict: The weather data by city ID.
+        """
+        params = {'id': ','.join(map(str, city_ids)), 'lang': self.lang, 'units': self.units,
+                  'appid': self.api_key}
+        response = self._send('group', f'{self.api_url}/group', params)
+        try:
+            with TRACER.span('decode.group'):
+                data = response.json()
+        except ValueError as error:
+            raise WeatherApiError(str(error)) from error
+        if 'list' not in data:
+            raise WeatherApiError(data.get('message', f"API error {data.get('cod')}"))
+
+        results = split_group(data)
+        if self.cache is not None:
+            for city_id, weather in results.items():
+                self.cache.put('weather', f'id:{city_id}', self.units, self.lang, weather)
+        return results
+
+    def _download_icon(self, icon: str) -> bytes:
+        """
+        Download a weather icon.
+
+        Args:
+            icon (str): The icon name.
+
+        Returns:
+            bytes: The PNG data of the icon.
+        """
+        response = self._send('icon', f'{self.icon_url}/{icon}@2x.png')
+        if response.status_code != 200:
+            raise WeatherApiError(f'Icon {icon} is not available ({response.status_code})')
+        return response.content
+
+    def _send(self, name: str, url: str, params: Optional[dict] = None,
+              headers: Optional[dict] = None) -> 'requests.Response':
+        """
+        Send a GET request, retrying connection errors, timeouts and server errors.
+
+        Attempts are separated by a jittered backoff. A request that failed after all
+        attempts is counted by the circuit breaker of the server, no request is sent
+        while the circuit is open.
+
+        Args:
+            name (str): The name of the request in traces, e.g. 'weather'.
+            url (str): The URL.
+            params (Optional[dict]): The query parameters.
+            headers (Optional[dict]): The request headers.
+
+        Returns:
+            requests.Response: The response, its status is not a server error.
+        """
+        import requests  # pylint: disable=import-outside-toplevel
+
+        breaker = self._breaker(url)
+        if not breaker.allow():
+            TRACER.count('circuit.rejected')
+            raise CircuitOpenError(f'The server is unavailable, next try in '
+                                   f'{round(breaker.retry_in())}s')
+        try:
+            for attempt in range(max(1, self.retries)):
+                if attempt:
+                    TRACER.count('http.retry')
+                    time.sleep(backoff_delay(attempt - 1))
+                try:
+                    with TRACER.span(f'http.{name}'):
+                        response = self.session.get(url, params=params, headers=headers,
+                                                    timeout=(CONNECT_TIMEOUT, self.timeout))
+                except requests.RequestException as error:
+                    failure = WeatherApiError(str(error))
+                    failure.__cause__ = error
+                    continue
+                if response.status_code in RETRY_STATUSES:
+                    failure = WeatherApiError(f'Server error {response.status_code}')
+                    continue
+                breaker.record_success()
+                return response
+        except BaseException:
+            # Any other error still ends a trial request, or the circuit would stay half-open
+            breaker.record_failure()
+            raise
+        breaker.record_failure()
+        raise failure
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker of the server of a URL.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            CircuitBreaker: The circuit breaker.
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers.setdefault(host, CircuitBreaker())
+        return breaker
+
+
+def query_params(query: str) -> dict:
+    """
+    Get the request parameters that select a city.
+
+    Args:
+        query (str): The city name or 'id:' followed by the city ID.
+
+    Returns:
+        dict: The 'id' or 'q' parameter.
+    """
+    if query.startswith('id:') and query[3:].isdigit():
+        return {'id': query[3:]}
+    return {'q': query}
+
+def split_group(data: dict) -> dict:
+    """
+    Split a response of the group endpoint into payloads of the weather endpoint.
+
+    Entries of a group keep the time zone in 'sys' and have no 'cod', both are
+    moved to where update_informations and save_day_to_file expect them.
+
+    Args:
+        data (dict): The decoded group response.
+
+    Returns:
+        dict: The weather data by city ID.
+    """
+    results = {}
+    for entry in data['list']:
+        weather = dict(entry)
+        weather['sys'] = dict(entry['sys'])
+        weather['timezone'] = weather['sys'].pop('timezone', entry.get('timezone', 0))
+        weather['cod'] = 200
+        results[weather['id']] = weather
+    return results
+
+def join_group(results: dict) -> dict:
+    """
+    Join payloads of the weather endpoint into a response of the group endpoint.
+
+    It is the reverse of split_group, the time zone goes back to 'sys' and 'cod' is left out.
+
+    Args:
+        results (dict): The weather data by city ID.
+
+    Returns:
+        dict: The group response.
+    """
+    entries = []
+    for weather in results.values():
+        entry = {key: value for key, value in weather.items() if key not in ('cod', 'timezone')}
+        entry['sys'] = {**weather['sys'], 'timezone': weather.get('timezone', 0)}
+        entries.append(entry)
+    return {'cnt': len(entries), 'list': entries}
+
+def create_session(pool_size: int = POOL_SIZE) -> 'requests.Session':
+    """
+    Create a session with a bounded pool of keep-alive connections.
+
+    Args:
+        pool_size (int): The maximum number of connections kept per host.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    import requests  # pylint: disable=import-outside-toplevel
+    from requests.adapters import HTTPAdapter  # pylint: disable=import-outside-toplevel
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+    return session
+
+
+_CLIENT: Optional[WeatherClient] = None
+
+def get_client() -> WeatherClient:
+    """
+    Get the client shared by the whole application.
+
+    Returns:
+        WeatherClient: The shared client.
+    """
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = WeatherClient(cache=ResponseCache(), scheduler=RequestScheduler())
+    return _CLIENT
@@ -0,0 +1,95 @@
+'''
+This module is responsible for the table of country names and their codes.
+
+The table is shipped with the program in src/data/country_codes.csv and loaded on first use.
+It can be regenerated from Wikipedia with:
+
+    python -m src.countries --refresh
+'''
+import argparse
+import csv
+import sys
+from typing import Optional
+from src.settings import COUNTRY_CODES_FILE, COUNTRY_CODES_URL
+
+_COUNTRY_CODES: Optional[dict] = None
+
+def load_country_codes(path: str = COUNTRY_CODES_FILE) -> dict:
+    """
+    Load the table of country codes from a CSV file.
+
+    Args:
+        path (str): The path of the CSV file.
+
+    Returns:
+        dict: A dictionary mapping country codes to country names.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            return {row['Code']: row['Country'] for row in csv.DictReader(file)}
+    except FileNotFoundError:
+        print('There was problem with loading country codes')
+        return {}
+
+def get_country_codes() -> dict:
+    """
+    Get the bundled table of country codes, loading it on first use.
+
+    Returns:
+        dict: A dictionary mapping country codes to country names.
+    """
+    global _COUNTRY_CODES
+    if _COUNTRY_CODES is None:
+        _COUNTRY_CODES = load_country_codes()
+    return _COUNTRY_CODES
+
+def refresh_country_codes(path: str = COUNTRY_CODES_FILE) -> int:
+    """
+    Regenerate the table of country codes from the Wikipedia ISO 3166 page.
+
+    This is a maintenance command, pandas is needed only here.
+
+    Args:
+        path (str): The path of the CSV file to write.
+
+    Returns:
+        int: The number of written countries.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    # Namibia's code NA must stay a string, not become a missing value
+    data = pd.read_html(COUNTRY_CODES_URL, encoding="utf8", keep_default_na=False, na_values=[])[0]
+    data = data.droplevel(0, axis=1)
+    country_column = [columns for columns in data.columns if 'Country' in columns][0]
+    code_column = [columns for columns in data.columns if 'Alpha-2' in columns][0]
+    codes = {}
+    for country, code in zip(data[country_column], data[code_column]):
+        if isinstance(code, str) and len(code) <= 3:
+            codes[code] = country
+
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(['Code', 'Country'])
+        for code in sorted(codes):
+            writer.writerow([code, codes[code]])
+    return len(codes)
+
+def main(args: list) -> None:
+    """
+    Run the country codes command line.
+
+    Args:
+        args (list): The command line arguments.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.countries',
+                                     description='Manage the bundled table of country codes.')
+    parser.add_argument('--refresh', action='store_true', required=True,
+                        help='regenerate the table from the Wikipedia ISO 3166 page')
+    parser.parse_args(args)
+    print(f'Saved {refresh_country_codes()} country codes to {COUNTRY_CODES_FILE}')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,145 @@
+'''
+This module is responsible for processing forecast data.
+
+The 'list' of a forecast payload is turned into columnar numpy arrays once,
+all selections and daily statistics are then computed in vectorized passes.
+'''
+import numpy as np
+from src.settings import HOUR_MIN, HOUR_MAX
+
+SECONDS_PER_DAY = 86400
+SECONDS_PER_HOUR = 3600
+
+
+class ForecastSeries:
+    """
+    This class represents a forecast as columnar arrays.
+
+    Args:
+        entries (list): The 'list' records of a forecast payload.
+        timezone (int): The UTC offset of the city in seconds.
+
+    Attributes:
+        timezone (int): The UTC offset of the city in seconds.
+        dt (np.ndarray): The Unix timestamps of the records.
+        temp (np.ndarray): The temperatures.
+        temp_min (np.ndarray): The minimum temperatures.
+        temp_max (np.ndarray): The maximum temperatures.
+        pressure (np.ndarray): The pressures.
+        humidity (np.ndarray): The humidities.
+        wind_speed (np.ndarray): The wind speeds.
+        precipitation (np.ndarray): The rain and snow volumes for the last 3 hours.
+        local_day (np.ndarray): The day numbers in the city's local time.
+        local_hour (np.ndarray): The hours in the city's local time.
+
+    Methods:
+        from_payload(): Builds the series from a forecast payload.
+        midday_indices(): Returns the indices of one midday record for every day.
+        daily_stats(): Returns the statistics of every day.
+        midday_stats(): Returns the statistics of every day that has a midday record.
+    """
+    __slots__ = ('timezone', 'dt', 'temp', 'temp_min', 'temp_max', 'pressure', 'humidity',
+                 'wind_speed', 'precipitation', 'local_day', 'local_hour')
+
+    def __init__(self, entries: list, timezone: int = 0) -> None:
+        """
+        Initialize the series.
+
+        Args:
+            entries (list): The 'list' records of a forecast payload.
+            timezone (int): The UTC offset of the city in seconds.
+
+        Returns:
+            None
+        """
+        count = len(entries)
+        self.timezone = timezone
+        self.dt = np.fromiter((entry['dt'] for entry in entries), np.int64, count)
+        self.temp = _column(entries, 'main', 'temp')
+        self.temp_min = _column(entries, 'main', 'temp_min')
+        self.temp_max = _column(entries, 'main', 'temp_max')
+        self.pressure = _column(entries, 'main', 'pressure')
+        self.humidity = _column(entries, 'main', 'humidity')
+        self.wind_speed = _column(entries, 'wind', 'speed')
+        self.precipitation = _column(entries, 'rain', '3h') + _column(entries, 'snow', '3h')
+        local = self.dt + timezone
+        self.local_day = local // SECONDS_PER_DAY
+        self.local_hour = local % SECONDS_PER_DAY // SECONDS_PER_HOUR
+
+    @classmethod
+    def from_payload(cls, data: dict) -> 'ForecastSeries':
+        """
+        Build the series from a forecast payload.
+
+        Args:
+            data (dict): The weather forecast data.
+
+        Returns:
+            ForecastSeries: The series.
+        """
+        return cls(data['list'], data.get('city', {}).get('timezone', 0))
+
+    def midday_indices(self) -> np.ndarray:
+        """
+        Select one record per day whose local hour is between HOUR_MIN and HOUR_MAX.
+
+        Returns:
+            np.ndarray: The indices of the selected records.
+        """
+        candidates = np.flatnonzero((self.local_hour > HOUR_MIN) & (self.local_hour < HOUR_MAX))
+        _, first = np.unique(self.local_day[candidates], return_index=True)
+        return candidates[first]
+
+    def daily_stats(self) -> dict:
+        """
+        Compute the statistics of every local day.
+
+        Returns:
+            dict: Arrays with one value per day under the keys 'day', 'temp_min',
+                'temp_max', 'temp_mean', 'precipitation', 'wind_mean' and 'wind_max'.
+        """
+        if len(self.dt) == 0:
+            return {key: np.empty(0) for key in ('day', 'temp_min', 'temp_max', 'temp_mean',
+                                                 'precipitation', 'wind_mean', 'wind_max')}
+        starts = np.flatnonzero(np.diff(self.local_day, prepend=self.local_day[0] - 1))
+        counts = np.diff(np.append(starts, len(self.dt)))
+        return {
+            'day': self.local_day[starts],
+            'temp_min': np.minimum.reduceat(self.temp_min, starts),
+            'temp_max': np.maximum.reduceat(self.temp_max, starts),
+            'temp_mean': np.add.reduceat(self.temp, starts) / counts,
+            'precipitation': np.add.reduceat(self.precipitation, starts),
+            'wind_mean': np.add.reduceat(self.wind_speed, starts) / counts,
+            'wind_max': np.maximum.reduceat(self.wind_speed, starts)
+        }
+
+    def midday_stats(self) -> list:
+        """
+        Combine every selected midday record with the statistics of its day.
+
+        Returns:
+            list: A list of dictionaries with the record 'index' and the statistics of its day.
+        """
+        indices = self.midday_indices()
+        stats = self.daily_stats()
+        positions = np.searchsorted(stats['day'], self.local_day[indices])
+        return [{'index': int(index),
+                 **{key: float(values[position]) for key, values in stats.items()
+                    if key != 'day'}}
+                for index, position in zip(indices, positions)]
+
+
+def _column(entries: list, group: str, field: str) -> np.ndarray:
+    """
+    Extract one numeric field of all records, missing values become 0.
+
+    Args:
+        entries (list): The forecast records.
+        group (str): The name of the nested dictionary, e.g. 'main'.
+        field (str): The name of the field.
+
+    Returns:
+        np.ndarray: The values of the field.
+    """
+    return np.fromiter((entry.get(group, {}).get(field, 0) for entry in entries),
+                       np.float64, len(entries))
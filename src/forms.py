@@ -0,0 +1,73 @@
+'''
+This module is responsible for loading the .ui forms of the program.
+
+Forms are compiled to Python once and the generated classes are cached in
+src/cache/forms, they are compiled again only when the .ui file changes.
+'''
+import importlib.util
+import os
+from PyQt5.QtWidgets import QWidget
+from src.settings import FORMS_CACHE_DIR
+
+_FORMS: dict = {}
+
+def compile_form(ui_path: str, cache_dir: str = FORMS_CACHE_DIR) -> str:
+    """
+    Compile a .ui file to a Python module unless an up-to-date module already exists.
+
+    Args:
+        ui_path (str): The path of the .ui file.
+        cache_dir (str): The directory of compiled forms.
+
+    Returns:
+        str: The path of the compiled module.
+    """
+    name = os.path.splitext(os.path.basename(ui_path))[0]
+    py_path = os.path.join(cache_dir, f'ui_{name}.py')
+    if not os.path.exists(py_path) or os.path.getmtime(py_path) < os.path.getmtime(ui_path):
+        from PyQt5 import uic  # pylint: disable=import-outside-toplevel
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(ui_path, 'r', encoding='utf-8') as ui_file, \
+                open(f'{py_path}.tmp', 'w', encoding='utf-8') as py_file:
+            uic.compileUi(ui_file, py_file)
+        os.replace(f'{py_path}.tmp', py_path)
+    return py_path
+
+def load_form(ui_path: str) -> type:
+    """
+    Get the form class generated from a .ui file.
+
+    Args:
+        ui_path (str): The path of the .ui file.
+
+    Returns:
+        type: The generated Ui_* class.
+    """
+    if ui_path not in _FORMS:
+        py_path = compile_form(ui_path)
+        spec = importlib.util.spec_from_file_location(
+            os.path.splitext(os.path.basename(py_path))[0], py_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _FORMS[ui_path] = next(value for key, value in vars(module).items()
+                               if key.startswith('Ui_'))
+    return _FORMS[ui_path]
+
+def setup_form(widget: QWidget, ui_path: str) -> None:
+    """
+    Build the content of a .ui file on a widget, the same way uic.loadUi does.
+
+    All named children of the form become attributes of the widget.
+
+    Args:
+        widget (QWidget): The widget to build the form on.
+        ui_path (str): The path of the .ui file.
+
+    Returns:
+        None
+    """
+    form = load_form(ui_path)()
+    form.setupUi(widget)
+    for name, value in vars(form).items():
+        setattr(widget, name, value)
@@ -0,0 +1,336 @@
+'''
+This module is responsible for a local caching gateway to the OpenWeatherMap servers.
+
+The gateway runs the fetch and cache core of the program without the window and
+serves the same weather, group, forecast and icon responses as the public API.
+All clients share one response cache, one icon cache and one request scheduler,
+so a city searched on many desktops is fetched from the upstream servers once
+per cache lifetime, and identical requests in flight are coalesced:
+
+    python -m src.gateway [--host 127.0.0.1] [--port 8100] [--key API_KEY] [--api-url URL]
+
+Then start any number of programs with:
+
+    python main.py --gateway http://127.0.0.1:8100
+
+Besides the API, the gateway serves the forecast records shown for the following
+days (/data/2.5/days?q=...) and its counters (/stats). Every response carries an
+ETag, so auto-refresh of the clients is answered with 304 Not Modified.
+'''
+import argparse
+import hashlib
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from src.client import WeatherClient, WeatherApiError, get_client, join_group
+from src.scheduler import INTERACTIVE
+from src.support import ICON_CACHE, get_api_key, get_forecast_days
+from src.settings import GATEWAY_HOST, GATEWAY_PORT
+
+ICON_PATH = re.compile(r'^/img/wn/(\w+)@2x\.png$')
+
+
+class Gateway:
+    """
+    This class represents the upstream side of the gateway.
+
+    Requests for other units or languages than the shared client's get their own
+    client, which still uses the shared session, cache and scheduler.
+
+    Args:
+        client (WeatherClient): The client of the upstream servers.
+
+    Attributes:
+        client (WeatherClient): The client of the upstream servers.
+        served (int): The number of answered requests.
+
+    Methods:
+        weather(): Returns the current weather for query parameters.
+        forecast(): Returns the forecast for query parameters.
+        group(): Returns the group response for query parameters.
+        days(): Returns the forecast records of the following days.
+        icon(): Returns the PNG data of an icon.
+        stats(): Returns the counters of the gateway.
+        count_request(): Counts an answered request.
+    """
+    def __init__(self, client: WeatherClient) -> None:
+        """
+        Initialize the gateway.
+
+        Args:
+            client (WeatherClient): The client of the upstream servers.
+
+        Returns:
+            None
+        """
+        self.client = client
+        self.served = 0
+        self._clients = {(client.units, client.lang): client}
+        self._lock = threading.Lock()
+
+    def weather(self, params: dict) -> dict:
+        """
+        Get the current weather for the query parameters of a request.
+
+        Args:
+            params (dict): The 'q' or 'id' parameter and optionally 'units' and 'lang'.
+
+        Returns:
+            dict: The weather data.
+        """
+        return self._client_for(params).current_weather(city_query(params), INTERACTIVE)
+
+    def forecast(self, params: dict) -> dict:
+        """
+        Get the forecast for the query parameters of a request.
+
+        Args:
+            params (dict): The 'q' or 'id' parameter and optionally 'units' and 'lang'.
+
+        Returns:
+            dict: The forecast data.
+        """
+        return self._client_for(params).forecast(city_query(params), INTERACTIVE)
+
+    def group(self, params: dict) -> dict:
+        """
+        Get the current weather of the city IDs of a request in the format of the group endpoint.
+
+        Args:
+            params (dict): The 'id' parameter, comma separated IDs.
+
+        Returns:
+            dict: The weather of every city known to the upstream servers.
+        """
+        city_ids = [city_id for city_id in params.get('id', '').split(',')
+                    if city_id.strip().isdigit()]
+        return join_group(self._client_for(params).current_weather_group(city_ids, INTERACTIVE))
+
+    def days(self, params: dict) -> dict:
+        """
+        Get the forecast records shown for the following days.
+
+        Args:
+            params (dict): The 'q' or 'id' parameter and optionally 'units' and 'lang'.
+
+        Returns:
+            dict: The forecast data limited to the selected records, errors are returned as is.
+        """
+        data = self.forecast(params)
+        if str(data.get('cod')) != '200':
+            return data
+        days = get_forecast_days(data)
+        return {**data, 'cnt': len(days), 'list': days}
+
+    def icon(self, icon: str) -> bytes:
+        """
+        Get the PNG data of an icon from the shared icon cache.
+
+        Args:
+            icon (str): The icon name.
+
+        Returns:
+            bytes: The PNG data.
+        """
+        return ICON_CACHE.get_raw(icon)
+
+    def stats(self) -> dict:
+        """
+        Get the counters of the gateway and its upstream client.
+
+        Returns:
+            dict: The numbers of served requests, upstream calls made, saved and queued,
+                and icon downloads.
+        """
+        return {'served': self.served, **self.client.stats(),
+                'icon_downloads': ICON_CACHE.downloads}
+
+    def count_request(self) -> None:
+        """
+        Count an answered request.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.served += 1
+
+    def _client_for(self, params: dict) -> WeatherClient:
+        """
+        Get the client for the units and language of a request.
+
+        Args:
+            params (dict): The query parameters of the request.
+
+        Returns:
+            WeatherClient: The client.
+        """
+        units = params.get('units', self.client.units)
+        lang = params.get('lang', self.client.lang)
+        with self._lock:
+            client = self._clients.get((units, lang))
+            if client is None:
+                client = WeatherClient(self.client.api_key, self.client.session,
+                                       self.client.cache, self.client.scheduler)
+                client.api_url = self.client.api_url
+                client.icon_url = self.client.icon_url
+                client.units = units
+                client.lang = lang
+                self._clients[(units, lang)] = client
+        return client
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    """
+    This class handles requests to the gateway.
+
+    Attributes:
+        gateway (Gateway): The upstream side of the gateway.
+    """
+    gateway: Gateway = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answer a GET request.
+
+        Returns:
+            None
+        """
+        parts = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        routes = {'/weather': self.gateway.weather, '/forecast': self.gateway.forecast,
+                  '/group': self.gateway.group, '/days': self.gateway.days}
+        icon = ICON_PATH.match(parts.path)
+        try:
+            if icon is not None:
+                self.send_body(200, 'image/png', self.gateway.icon(icon.group(1)))
+            elif parts.path == '/stats':
+                self.send_json(self.gateway.stats())
+            elif parts.path.startswith('/data/') and parts.path.endswith(tuple(routes)):
+                self.send_json(routes[parts.path[parts.path.rfind('/'):]](params))
+            else:
+                self.send_json({'cod': '404', 'message': 'Internal error'})
+        except WeatherApiError as error:
+            self.send_json({'cod': 502, 'message': str(error)})
+        self.gateway.count_request()
+
+    def send_json(self, data: dict) -> None:
+        """
+        Send a JSON response, its HTTP status is the 'cod' of the data like in the API.
+
+        Args:
+            data (dict): The response data.
+
+        Returns:
+            None
+        """
+        try:
+            status = int(data.get('cod', 200))
+        except (TypeError, ValueError):
+            status = 200
+        if not 100 <= status < 600:
+            status = 200
+        self.send_body(status, 'application/json; charset=utf-8',
+                       json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+    def send_body(self, status: int, content_type: str, body: bytes) -> None:
+        """
+        Send a response, or 304 Not Modified when the client already has the same body.
+
+        Args:
+            status (int): The HTTP status.
+            content_type (str): The type of the body.
+            body (bytes): The body.
+
+        Returns:
+            None
+        """
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        if status == 200 and etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        """
+        Silence the default request log.
+
+        Returns:
+            None
+        """
+
+
+def city_query(params: dict) -> str:
+    """
+    Convert the query parameters of a request to a query of the weather client.
+
+    Args:
+        params (dict): The 'q' or 'id' parameter of the request.
+
+    Returns:
+        str: The city name or 'id:' followed by the city ID.
+    """
+    if params.get('id', '').isdigit():
+        return f"id:{params['id']}"
+    return params.get('q', '')
+
+def create_server(host: str = GATEWAY_HOST, port: int = GATEWAY_PORT,
+                  client: WeatherClient = None) -> ThreadingHTTPServer:
+    """
+    Create the gateway server.
+
+    Args:
+        host (str): The address to listen on.
+        port (int): The port to listen on, 0 picks a free one.
+        client (WeatherClient): The client of the upstream servers, the shared one by default.
+
+    Returns:
+        ThreadingHTTPServer: The server, call serve_forever to start it.
+    """
+    handler = type('ConfiguredGatewayHandler', (GatewayHandler,),
+                   {'gateway': Gateway(client or get_client())})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main(args: list) -> None:
+    """
+    Run the gateway command line.
+
+    Args:
+        args (list): The command line arguments.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.gateway',
+                                     description='Serve a shared cache of the weather API.')
+    parser.add_argument('--host', default=GATEWAY_HOST, help='address to listen on')
+    parser.add_argument('--port', type=int, default=GATEWAY_PORT, help='port to listen on')
+    parser.add_argument('--key', help='API key, the key file of the program by default')
+    parser.add_argument('--api-url', help='base URL of the upstream weather API')
+    options = parser.parse_args(args)
+    client = get_client()
+    client.api_key = (options.key or get_api_key()).strip()
+    if options.api_url:
+        client.api_url = options.api_url.rstrip('/')
+    server = create_server(options.host, options.port, client)
+    print(f'Serving on http://{server.server_address[0]}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,168 @@
+'''
+This module is responsible for caching weather icons in memory and on disk.
+'''
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+from PyQt5.QtGui import QPixmap, QImage
+from src.tracing import TRACER
+from src.settings import ICON_CACHE_DIR, ICON_CACHE_SIZE, ICON_CODES
+
+
+class IconCache:
+    """
+    This class represents a two-tier cache for weather icons.
+
+    Scaled QPixmaps are kept in a bounded in-memory LRU keyed by (icon, size),
+    raw PNG files are kept on disk, so the network is only used for icons that
+    were never downloaded before.
+
+    Args:
+        fetch (Callable[[str], bytes]): A callable that downloads the raw PNG of an icon.
+        directory (str): The directory of the on-disk PNG store.
+        max_size (int): The maximum number of pixmaps kept in memory.
+
+    Attributes:
+        fetch (Callable[[str], bytes]): A callable that downloads the raw PNG of an icon.
+        directory (str): The directory of the on-disk PNG store.
+        max_size (int): The maximum number of pixmaps kept in memory.
+        hits (int): The number of pixmaps served from memory.
+        misses (int): The number of pixmaps that had to be built.
+        downloads (int): The number of icons downloaded from the network.
+
+    Methods:
+        get(): Returns a scaled QPixmap of an icon.
+        get_raw(): Returns the raw PNG of an icon from disk or the network.
+        warm_up(): Preloads the given icon codes.
+        clear(): Removes all pixmaps from memory.
+    """
+    def __init__(self, fetch: Callable[[str], bytes], directory: str = ICON_CACHE_DIR,
+                 max_size: int = ICON_CACHE_SIZE) -> None:
+        """
+        Initialize the icon cache.
+
+        Args:
+            fetch (Callable[[str], bytes]): A callable that downloads the raw PNG of an icon.
+            directory (str): The directory of the on-disk PNG store.
+            max_size (int): The maximum number of pixmaps kept in memory.
+
+        Returns:
+            None
+        """
+        self.fetch = fetch
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.downloads = 0
+        self._pixmaps: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, icon: str, size: tuple[int], download: bool = True) -> QPixmap:
+        """
+        Return a scaled QPixmap of an icon, building it only when it is not in memory.
+
+        Args:
+            icon (str): The icon name.
+            size (tuple[int]): The desired size of the image.
+            download (bool): Whether an icon that is not on disk is downloaded.
+
+        Returns:
+            QPixmap: The QPixmap object representing the image, a null pixmap when the
+                icon is not on disk and is not downloaded.
+        """
+        key = (icon, tuple(size))
+        with self._lock:
+            if key in self._pixmaps:
+                self._pixmaps.move_to_end(key)
+                self.hits += 1
+                TRACER.count('icon_cache.hit')
+                return self._pixmaps[key]
+            self.misses += 1
+        TRACER.count('icon_cache.miss')
+
+        data = self.get_raw(icon, download)
+        if not data:
+            return QPixmap()
+        image = QImage()
+        loaded = image.loadFromData(data)
+        pixmap = QPixmap(image).scaled(size[0], size[1])
+        if loaded:
+            with self._lock:
+                self._pixmaps[key] = pixmap
+                while len(self._pixmaps) > self.max_size:
+                    self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def get_raw(self, icon: str, download: bool = True) -> bytes:
+        """
+        Return the raw PNG of an icon, downloading and storing it when it is not on disk.
+
+        This method does not touch any Qt objects, so it is safe to call from worker threads.
+
+        Args:
+            icon (str): The icon name.
+            download (bool): Whether an icon that is not on disk is downloaded.
+
+        Returns:
+            bytes: The PNG data of the icon, empty when it is not on disk and not downloaded.
+        """
+        path = self._path(icon)
+        try:
+            with open(path, 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            if not download:
+                return b''
+
+        data = self.fetch(icon)
+        self.downloads += 1
+        TRACER.count('icon_cache.download')
+        if data:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        return data
+
+    def warm_up(self, icons: Iterable[str] = ICON_CODES,
+                sizes: Optional[Iterable[tuple[int]]] = None) -> None:
+        """
+        Preload icons to the disk store and, optionally, scaled pixmaps to memory.
+
+        Args:
+            icons (Iterable[str]): The icon names to preload.
+            sizes (Optional[Iterable[tuple[int]]]): The pixmap sizes to build for every icon.
+
+        Returns:
+            None
+        """
+        sizes = list(sizes or [])
+        for icon in icons:
+            self.get_raw(icon)
+            for size in sizes:
+                self.get(icon, size)
+
+    def clear(self) -> None:
+        """
+        Remove all pixmaps from memory, the disk store stays untouched.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._pixmaps.clear()
+
+    def _path(self, icon: str) -> str:
+        """
+        Build the path of an icon in the disk store.
+
+        Args:
+            icon (str): The icon name.
+
+        Returns:
+            str: The path of the PNG file.
+        """
+        return os.path.join(self.directory, f'{os.path.basename(icon)}.png')
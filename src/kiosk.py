@@ -0,0 +1,201 @@
+'''
+This module is responsible for the kiosk mode, a long-running display with bounded memory.
+
+In kiosk mode the caches get smaller limits, allocations are traced with
+tracemalloc and the resident memory is checked periodically. When it grows
+over the budget, everything that can be fetched or built again is released:
+pixmaps, responses kept in memory and cached time formats.
+
+A memory report with the top allocators and the counts of Qt objects is
+shown from the File menu, or printed when the process receives SIGUSR1:
+
+    kill -USR1 <pid>
+'''
+import gc
+import os
+import signal
+import tracemalloc
+from collections import Counter
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QPixmap, QImage, QPixmapCache
+from PyQt5.QtWidgets import QApplication
+from src.client import get_client
+from src.support import ICON_CACHE
+from src.timeconv import clear_time_cache
+from src.tracing import TRACER
+from src.settings import KIOSK_MEMORY_BUDGET, KIOSK_CHECK_INTERVAL, \
+    KIOSK_RESPONSE_CACHE_SIZE, KIOSK_ICON_CACHE_SIZE, KIOSK_TRACE_FRAMES, KIOSK_REPORT_TOP
+
+MEGABYTE = 1024 * 1024
+
+
+class MemoryMonitor(QObject):
+    """
+    This class keeps the memory of the program within a budget and reports its use.
+
+    Args:
+        budget (int): The memory budget in bytes.
+        parent (QObject): The owner of the monitor.
+
+    Attributes:
+        budget (int): The memory budget in bytes.
+        peak (int): The highest resident memory seen in bytes.
+        trims (int): The number of times the caches were released.
+        over_budget (pyqtSignal): Emitted with the resident memory in bytes when it stays
+            over the budget after releasing the caches.
+
+    Methods:
+        start(): Caps the caches and starts tracing and periodic checks.
+        check(): Releases the caches when the resident memory is over the budget.
+        report(): Returns the memory report as text.
+        print_report(): Prints the memory report.
+    """
+    over_budget = pyqtSignal(int)
+
+    def __init__(self, budget: int = KIOSK_MEMORY_BUDGET, parent: QObject = None) -> None:
+        """
+        Initialize a stopped monitor.
+
+        Args:
+            budget (int): The memory budget in bytes.
+            parent (QObject): The owner of the monitor.
+
+        Returns:
+            None
+        """
+        super().__init__(parent)
+        self.budget = budget
+        self.peak = 0
+        self.trims = 0
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        # Python signal handlers run only when Python code does
+        self.signal_timer = QTimer(self)
+        self.signal_timer.timeout.connect(lambda: None)
+
+    def start(self, interval: int = KIOSK_CHECK_INTERVAL) -> None:
+        """
+        Cap the caches, start tracing allocations and check the memory periodically.
+
+        Args:
+            interval (int): The time between checks in seconds.
+
+        Returns:
+            None
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(KIOSK_TRACE_FRAMES)
+        client = get_client()
+        if client.cache is not None:
+            client.cache.max_entries = min(client.cache.max_entries, KIOSK_RESPONSE_CACHE_SIZE)
+        ICON_CACHE.max_size = min(ICON_CACHE.max_size, KIOSK_ICON_CACHE_SIZE)
+        release_caches()
+        self.timer.start(interval * 1000)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1,
+                          lambda signum, frame: QTimer.singleShot(0, self.print_report))
+            self.signal_timer.start(500)
+
+    def check(self) -> None:
+        """
+        Release the caches when the resident memory is over the budget.
+
+        Returns:
+            None
+        """
+        used = resident_memory()
+        self.peak = max(self.peak, used)
+        if used <= self.budget:
+            return
+        release_caches()
+        self.trims += 1
+        TRACER.count('kiosk.trim')
+        used = resident_memory()
+        if used > self.budget:
+            TRACER.count('kiosk.over_budget')
+            self.over_budget.emit(used)
+
+    def report(self, limit: int = KIOSK_REPORT_TOP) -> str:
+        """
+        Build the memory report.
+
+        Args:
+            limit (int): The number of allocators and Qt classes listed.
+
+        Returns:
+            str: The resident memory, the top allocators and the counts of Qt objects.
+        """
+        used = resident_memory()
+        self.peak = max(self.peak, used)
+        lines = [f'Resident memory: {used / MEGABYTE:.1f} MB '
+                 f'(peak {self.peak / MEGABYTE:.1f} MB, budget {self.budget / MEGABYTE:.0f} MB, '
+                 f'caches released {self.trims} times)']
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append(f'Traced by Python: {current / MEGABYTE:.1f} MB '
+                         f'(peak {peak / MEGABYTE:.1f} MB)')
+            lines.append('Top allocators:')
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>')))
+            for stat in snapshot.statistics('lineno')[:limit]:
+                frame = stat.traceback[0]
+                lines.append(f'  {stat.size / 1024:9.1f} KB {stat.count:7} blocks  '
+                             f'{frame.filename}:{frame.lineno}')
+        else:
+            lines.append('Allocations are traced only in kiosk mode (--kiosk)')
+        lines.append('Qt objects:')
+        for name, count in qt_object_counts().most_common(limit):
+            lines.append(f'  {count:7}  {name}')
+        return '\n'.join(lines)
+
+    def print_report(self) -> None:
+        """
+        Print the memory report, on SIGUSR1 when there is nobody to look at the window.
+
+        Returns:
+            None
+        """
+        print(self.report(), flush=True)
+
+
+def resident_memory() -> int:
+    """
+    Get the resident memory of the process.
+
+    Returns:
+        int: The size in bytes, memory traced by Python where /proc is not available.
+    """
+    try:
+        with open('/proc/self/statm', encoding='ascii') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return tracemalloc.get_traced_memory()[0]
+
+def release_caches() -> None:
+    """
+    Release everything that can be fetched or built again.
+
+    Returns:
+        None
+    """
+    ICON_CACHE.clear()
+    get_client().release_memory()
+    clear_time_cache()
+    QPixmapCache.clear()
+    gc.collect()
+
+def qt_object_counts() -> Counter:
+    """
+    Count the Qt objects of all windows and the images held by Python.
+
+    Returns:
+        Counter: The number of objects by class name.
+    """
+    counts = Counter()
+    for window in QApplication.topLevelWidgets():
+        counts[type(window).__name__] += 1
+        counts.update(type(child).__name__ for child in window.findChildren(QObject))
+    counts.update(type(obj).__name__ for obj in gc.get_objects()
+                  if isinstance(obj, (QPixmap, QImage)))
+    return counts
@@ -0,0 +1,209 @@
+'''
+This module is responsible for the in-memory model of weather and forecast data.
+
+Payloads are parsed once, when they arrive from the API or a save file. The
+fields shown by the program become attributes of slotted records and forecast
+columns, the payload itself is kept as compact JSON bytes. That is enough to
+convert back to the save format without loss, and costs far less memory than
+the nested dictionaries of the decoded payload.
+'''
+import json
+import sys
+from typing import Optional, Union
+from src.forecast import ForecastSeries
+
+
+def _encode(data: dict) -> bytes:
+    """
+    Serialize a payload to compact JSON.
+
+    Args:
+        data (dict): The payload.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON.
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class Observation:
+    """
+    This class represents the current weather of a city.
+
+    Attributes:
+        city_id (int): The OpenWeatherMap city ID.
+        name (str): The city name.
+        country (str): The country code.
+        timezone (int): The UTC offset of the city in seconds.
+        dt (int): The Unix time of the observation.
+        temp (float): The temperature.
+        humidity (float): The humidity.
+        pressure (float): The pressure.
+        wind_speed (float): The wind speed.
+        description (str): The description of the weather.
+        icon (str): The name of the weather icon.
+        sunrise (int): The Unix time of the sunrise.
+        sunset (int): The Unix time of the sunset.
+
+    Methods:
+        from_payload(): Parses a weather payload.
+        to_payload(): Returns the original weather payload.
+    """
+    __slots__ = ('city_id', 'name', 'country', 'timezone', 'dt', 'temp', 'humidity',
+                 'pressure', 'wind_speed', 'description', 'icon', 'sunrise', 'sunset', '_source')
+
+    def __init__(self, data: dict) -> None:
+        """
+        Parse a weather payload.
+
+        Args:
+            data (dict): The weather data.
+
+        Returns:
+            None
+        """
+        self.city_id = data['id']
+        self.name = data['name']
+        self.country = sys.intern(data['sys'].get('country', ''))
+        self.timezone = data['timezone']
+        self.dt = data['dt']
+        self.temp = data['main']['temp']
+        self.humidity = data['main']['humidity']
+        self.pressure = data['main']['pressure']
+        self.wind_speed = data['wind']['speed']
+        self.description = sys.intern(data['weather'][0]['description'])
+        self.icon = sys.intern(data['weather'][0]['icon'])
+        self.sunrise = data['sys']['sunrise']
+        self.sunset = data['sys']['sunset']
+        self._source = _encode(data)
+
+    @classmethod
+    def from_payload(cls, data: dict) -> 'Observation':
+        """
+        Parse a weather payload.
+
+        Args:
+            data (dict): The weather data.
+
+        Returns:
+            Observation: The observation.
+        """
+        return cls(data)
+
+    @property
+    def version(self) -> int:
+        """
+        Get the time that identifies this version of the weather, a newer one has a later time.
+
+        Returns:
+            int: The Unix time of the observation.
+        """
+        return self.dt
+
+    def to_payload(self) -> dict:
+        """
+        Get the weather payload the observation was parsed from.
+
+        Returns:
+            dict: The weather data.
+        """
+        return json.loads(self._source)
+
+
+class Forecast(ForecastSeries):
+    """
+    This class represents the forecast of a city as columns of its records.
+
+    Args:
+        data (dict): The forecast data.
+
+    Attributes:
+        city_id (int): The OpenWeatherMap city ID.
+        name (str): The city name.
+        country (str): The country code.
+        weather_main (tuple): The main weather group of every record, e.g. 'Clouds'.
+        icon (tuple): The weather icon name of every record.
+
+    Methods:
+        from_payload(): Parses a forecast payload.
+        to_payload(): Returns the original forecast payload.
+    """
+    __slots__ = ('city_id', 'name', 'country', 'weather_main', 'icon', '_source')
+
+    def __init__(self, data: dict) -> None:
+        """
+        Parse a forecast payload.
+
+        Args:
+            data (dict): The forecast data.
+
+        Returns:
+            None
+        """
+        city = data.get('city', {})
+        super().__init__(data['list'], city.get('timezone', 0))
+        self.city_id = city.get('id')
+        self.name = city.get('name', '')
+        self.country = sys.intern(city.get('country', ''))
+        self.weather_main = tuple(sys.intern(entry['weather'][0]['main'])
+                                  for entry in data['list'])
+        self.icon = tuple(sys.intern(entry['weather'][0]['icon']) for entry in data['list'])
+        self._source = _encode(data)
+
+    @classmethod
+    def from_payload(cls, data: dict) -> 'Forecast':
+        """
+        Parse a forecast payload.
+
+        Args:
+            data (dict): The forecast data.
+
+        Returns:
+            Forecast: The forecast.
+        """
+        return cls(data)
+
+    @property
+    def version(self) -> Optional[int]:
+        """
+        Get the time that identifies this version of the forecast, a newer one ends later.
+
+        Returns:
+            Optional[int]: The Unix time of the last record or None if there are none.
+        """
+        return int(self.dt[-1]) if len(self.dt) else None
+
+    def to_payload(self) -> dict:
+        """
+        Get the forecast payload the forecast was parsed from.
+
+        Returns:
+            dict: The forecast data.
+        """
+        return json.loads(self._source)
+
+
+def parse_payload(kind: str, data: dict) -> Union[Observation, Forecast]:
+    """
+    Parse a successful weather or forecast payload.
+
+    Args:
+        kind (str): 'weather' or 'forecast'.
+        data (dict): The payload.
+
+    Returns:
+        Union[Observation, Forecast]: The parsed data.
+    """
+    return Observation(data) if kind == 'weather' else Forecast(data)
+
+def as_payload(data: Union[Observation, Forecast, dict]) -> dict:
+    """
+    Get the payload of parsed data, payloads are returned unchanged.
+
+    Args:
+        data (Union[Observation, Forecast, dict]): The data.
+
+    Returns:
+        dict: The payload.
+    """
+    return data.to_payload() if isinstance(data, (Observation, Forecast)) else data
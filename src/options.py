@@ -3,7 +3,7 @@ This module is responsible for displaying the options window and its content.
 '''
 from typing import Callable
 from PyQt5.QtWidgets import QWidget
-from PyQt5 import uic
+from src.forms import setup_form
 from src.settings import STYLE
 from src.support import save_api_key
 
@@ -38,7 +38,7 @@ class Options(QWidget):
         """
         super().__init__()
         # Load and init GUI-----------------
-        uic.loadUi('src/gui/options.ui', self)
+        setup_form(self, 'src/gui/options.ui')
 
         self.api_key = api_key
         self.change_api_key = change_api_key
@@ -2,37 +2,66 @@
 This module is responsible for displaying the program window and its content.
 '''
 import json
-import requests
-from PyQt5 import uic
+from time import perf_counter, localtime, strftime
+from functools import partial
+from typing import Optional
+from PyQt5.QtCore import Qt, QThreadPool, QStringListModel
 from PyQt5.QtGui import QIcon
-from PyQt5.QtWidgets import QMainWindow, QFileDialog
+from PyQt5.QtWidgets import QMainWindow, QFileDialog, QLabel, QCompleter, QInputDialog, \
+    QMessageBox
+from src.forms import setup_form
+from src.model import Observation, Forecast, parse_payload
 from src.options import Options
-from src.settings import SMALL_IMAGE_SIZE, BIG_IMAGE_SIZE, STYLE, FRAMES_VARIABLES, TIMEOUT
-from src.support import get_image, get_timezone, get_unix_to_time, \
-    get_api_key, get_forecast_days, get_country_codes, read_country, \
-    draw_city, save_day_to_file, get_unix, check_for_api_file, \
-    get_unix_to_datetime, get_actual_time
+from src.kiosk import MemoryMonitor, MEGABYTE
+from src.startup import PROFILER
+from src.tracing import TRACER
+from src.trends import TrendWindow
+from src.accuracy_view import AccuracyWindow
+from src.archive import get_archive
+from src.save_store import get_save_store
+from src.auto_refresh import AutoRefresher
+from src.city_index import CityIndex, get_city_index
+from src.client import get_client
+from src.scheduler import BACKGROUND
+from src.view_model import information_view, forecast_view
+from src.workers import FetchWorker, FetchSignals
+from src.settings import SMALL_IMAGE_SIZE, BIG_IMAGE_SIZE, STYLE, FRAMES_COUNT, \
+    ICON_WARM_UP, FETCH_THREADS, AUTO_REFRESH_ENABLED, KIOSK_ENABLED, KIOSK_MEMORY_BUDGET
+from src.support import ICON_CACHE, get_image, get_timezone, \
+    get_api_key, read_country, \
+    draw_city, save_day_to_file, check_for_api_file, prefetch_icons, raise_window
+from src.timeconv import format_time, is_today, now
+
+# The last item of the list of saves, it opens a JSON save file instead
+OTHER_FILE = 'Other file...'
 
 API_KEY = get_api_key()
-COUNTRY_CODES = get_country_codes()
+CLIENT = get_client()
+CLIENT.api_key = API_KEY
 
 class MyGUI(QMainWindow):
     """
     This class is responsible for creating and managing the main program window.
     """
-    def __init__(self) -> None:
+    def __init__(self, auto_refresh: bool = AUTO_REFRESH_ENABLED, kiosk: bool = KIOSK_ENABLED,
+                 memory_budget: int = KIOSK_MEMORY_BUDGET) -> None:
         """
         Initialize the main program window.
 
         Args:
-            None
+            auto_refresh (bool): Whether the shown city is refreshed in the background.
+            kiosk (bool): Whether the program runs unattended with bounded memory,
+                it implies auto_refresh.
+            memory_budget (int): The memory budget of the kiosk mode in bytes.
 
         Returns:
             None
         """
         super().__init__()
         # Load and init GUI-----------------
-        uic.loadUi('src/gui/mygui.ui', self)
+        setup_form(self, 'src/gui/mygui.ui')
+        PROFILER.mark('main form')
+        PROFILER.watch_first_paint(self)
         self.show()
 
         # Configuring the appearance of the window--------------
@@ -48,11 +77,75 @@ class MyGUI(QMainWindow):
         self.action_Save.triggered.connect(lambda: save_day_to_file(self.weather_data,
                                                                     self.forecast_data))
         self.action_Open.triggered.connect(self.open_day_file)
+        self.action_Trends.triggered.connect(self.open_trends)
+        self.action_Accuracy.triggered.connect(self.open_accuracy)
+        self.action_Memory_report.triggered.connect(self.show_memory_report)
 
         # Define data-------------------------------------------
-        self.weather_data: dict = {}
-        self.forecast_data: dict = {}
+        self.weather_data: Optional[Observation] = None
+        self.forecast_data: Optional[Forecast] = None
         self.forecast_days: dict = {}
+        self.search_id: int = 0
+        self.search_started: float = 0.0
+        self.search_pending: set = set()
+        self.options: Optional[Options] = None
+        self.trends: Optional[TrendWindow] = None
+        self.accuracy: Optional[AccuracyWindow] = None
+        # Unix times of the shown data that is stale and being fetched again, by kind
+        self.stale: dict = {}
+
+        # Background fetching---------------------------------------
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(FETCH_THREADS)
+        self.fetch_signals = FetchSignals(self)
+        self.fetch_signals.finished.connect(self.on_fetch_finished)
+        self.fetch_signals.failed.connect(self.on_fetch_failed)
+        self.icon_signals = FetchSignals(self)
+        self.icon_signals.finished.connect(self.on_icons_stored)
+
+        # Kiosk mode, memory is checked against the budget---------
+        self.memory_monitor = MemoryMonitor(memory_budget, self)
+        self.memory_monitor.over_budget.connect(
+            lambda used: self.statusbar.showMessage(
+                f'Memory {used / MEGABYTE:.1f} MB is over the budget of '
+                f'{self.memory_monitor.budget / MEGABYTE:.0f} MB after releasing the caches'))
+        if kiosk:
+            self.memory_monitor.start()
+
+        # Background refreshing of the shown city-------------------
+        self.auto_refresh = auto_refresh or kiosk
+        self.current_query: Optional[str] = None
+        self.auto_refresher = AutoRefresher(self)
+        self.auto_refresher.refresh_due.connect(self.refresh)
+        self.refresh_signals = FetchSignals(self)
+        self.refresh_signals.finished.connect(self.on_refresh_finished)
+        self.refresh_signals.failed.connect(self.on_refresh_failed)
+
+        # Autocompletion of the searched city-----------------------
+        # The index is built in the background, until then searches send the raw text
+        self.city_index: Optional[CityIndex] = None
+        self.completer_model = QStringListModel(self)
+        self.completer = QCompleter(self.completer_model, self)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.line_edit_search.setCompleter(self.completer)
+        self.line_edit_search.textEdited.connect(self.update_completions)
+        self.index_signals = FetchSignals(self)
+        self.index_signals.finished.connect(self.on_index_built)
+        self.thread_pool.start(FetchWorker(0, 'cities', get_city_index, self.index_signals))
+
+        # Views of labels, widgets are looked up only here---------
+        self.information_view = information_view(self, get_image)
+        self.forecast_view = forecast_view(self, get_image)
+
+        # Latency panel, shown only when tracing is enabled--------
+        self.label_latency = QLabel()
+        if TRACER.enabled:
+            self.statusbar.addPermanentWidget(self.label_latency)
+
+        # Preload all weather icons---------------------------------
+        if ICON_WARM_UP:
+            ICON_CACHE.warm_up(sizes=(SMALL_IMAGE_SIZE, BIG_IMAGE_SIZE))
 
         # Check if this is first application run--------------------
         if not check_for_api_file():
@@ -60,11 +153,15 @@ class MyGUI(QMainWindow):
         else:
             # Show random city weather and forecast-----------------
             self.search(start=True)
+        PROFILER.mark('first search started')
 
     def search(self, start=False, save=None) -> None:
         """
         Perform a weather search using user input or a randomly chosen city.
 
+        Requests are sent concurrently by background workers, their results come
+        back through on_fetch_finished. Results of an earlier search are dropped.
+
         Args:
             start (bool): Whether the search is initiated at the start of the application.
             save: Data from a previously saved weather search.
@@ -73,115 +170,470 @@ class MyGUI(QMainWindow):
             None
         """
         self.show_error_message(clear=True)
-        if save is None:
-            if start is False:
-                user_input = self.line_edit_search.text()
-            else:
-                user_input = draw_city()
-            try:
-                self.forecast_data = requests.get(
-                    f'https://api.openweathermap.org/data/2.5/forecast?q={user_input}'
-                    f'&lang=pl&units=metric&appid={API_KEY}', timeout=TIMEOUT).json()
-                self.weather_data = requests.get(
-                    f'https://api.openweathermap.org/data/2.5/weather?q={user_input}'
-                    f'&lang=pl&units=metric&appid={API_KEY}', timeout=TIMEOUT).json()
-            except ConnectionError:
-                self.show_error_message(message=
-                                        'There is problem with the connection to the API server...')
-                return
+        # Results still pending from the previous search are dropped by their id, the pool
+        # is not cleared as it also runs the build of the city index
+        self.search_id += 1
+        self.current_query = None
+        self.auto_refresher.stop()
+        self.stale = {}
+        self.statusbar.clearMessage()
+        if save is not None:
+            self.show_weather(save[0])
+            self.show_forecast(save[1])
+            # Icons of old saves may not be stored, they are shown when downloaded
+            for kind, payload in zip(('weather', 'forecast'), save):
+                self.thread_pool.start(FetchWorker(self.search_id, kind, lambda data=payload: data,
+                                                   self.icon_signals, prefetch_icons))
+            return
+
+        if start is False:
+            user_input = self.resolve_city(self.line_edit_search.text())
         else:
-            self.weather_data = save[0]
-            self.forecast_data = save[1]
+            user_input = draw_city()
+        self.search_started = perf_counter()
+        self.search_pending = {'weather', 'forecast'}
+        fetches = {
+            'weather': partial(CLIENT.current_weather, user_input),
+            'forecast': partial(CLIENT.forecast, user_input)
+        }
+        for kind, fetch in fetches.items():
+            worker = FetchWorker(self.search_id, kind, fetch, self.fetch_signals, prefetch_icons)
+            self.thread_pool.start(worker)
+        self.show_stale(user_input)
+
+    def on_index_built(self, search_id: int, kind: str, index: CityIndex) -> None:
+        """
+        Receive the city index built in the background.
+
+        Args:
+            search_id (int): Unused, the index does not belong to a search.
+            kind (str): Unused, always 'cities'.
+            index (CityIndex): The city index.
 
-        if self.weather_data['cod'] == 401 or \
-                self.weather_data['cod'] == '404' or \
-                self.weather_data['cod'] == '400':
-            self.show_error_message(message=self.weather_data['message'])
+        Returns:
+            None
+        """
+        self.city_index = index
+
+    def update_completions(self, text: str) -> None:
+        """
+        Fill the autocompletion list with cities matching the typed text.
+
+        Args:
+            text (str): The typed text.
+
+        Returns:
+            None
+        """
+        if self.city_index is None:
+            return
+        self.completer_model.setStringList(
+            [city.label() for city in self.city_index.suggest(text)] if text.strip() else [])
+
+    def resolve_city(self, text: str) -> str:
+        """
+        Turn the typed text into an API query, a known city is asked for by its ID.
+
+        Args:
+            text (str): The typed text.
+
+        Returns:
+            str: 'id:' followed by the city ID or the text itself when the city is unknown.
+        """
+        if self.city_index is None:
+            return text
+        city_id = self.city_index.resolve(text)
+        if city_id is None:
+            TRACER.count('city_index.unresolved')
+            return text
+        TRACER.count('city_index.resolved')
+        return f'id:{city_id}'
+
+    def on_fetch_finished(self, search_id: int, kind: str, data: dict) -> None:
+        """
+        Receive data fetched by a background worker and display it.
+
+        Args:
+            search_id (int): The id of the search the data belongs to.
+            kind (str): The kind of the data, 'weather' or 'forecast'.
+            data (dict): The fetched data.
+
+        Returns:
+            None
+        """
+        if search_id != self.search_id:
+            return
+        self.drop_stale(kind)
+        if kind == 'weather':
+            if self.show_weather(data):
+                self.follow_city(self.weather_data)
+                if self.city_index is not None:
+                    self.city_index.add(self.weather_data.city_id, self.weather_data.name,
+                                        self.weather_data.country)
         else:
+            self.show_forecast(data)
+        self.finish_search_phase(kind)
+
+    def on_icons_stored(self, search_id: int, kind: str, data: dict) -> None:
+        """
+        Show the icons of shown data once they are downloaded.
+
+        Args:
+            search_id (int): The id of the search the icons belong to.
+            kind (str): The kind of the data, 'weather' or 'forecast'.
+            data (dict): The data whose icons were downloaded.
+
+        Returns:
+            None
+        """
+        if search_id != self.search_id:
+            return
+        if kind == 'weather' and self.weather_data is not None:
             self.update_informations(self.weather_data)
+        elif kind == 'forecast' and self.forecast_data is not None:
+            self.update_forecast(self.forecast_data)
 
-        if self.forecast_data['cod'] == 401 or \
-                self.forecast_data['cod'] == '404'or \
-                self.forecast_data['cod'] == '400':
-            pass
+    def refresh(self, kind: str) -> None:
+        """
+        Fetch fresh data of the shown city in the background.
+
+        Args:
+            kind (str): The kind of the data, 'weather' or 'forecast'.
+
+        Returns:
+            None
+        """
+        if self.current_query is None:
+            return
+        if kind == 'weather':
+            fetch = partial(CLIENT.current_weather, self.current_query, BACKGROUND, True)
         else:
-            self.update_forecast(self.forecast_data)
+            fetch = partial(CLIENT.forecast, self.current_query, BACKGROUND, True)
+        self.thread_pool.start(
+            FetchWorker(self.search_id, kind, fetch, self.refresh_signals, prefetch_icons))
 
+    def on_refresh_finished(self, search_id: int, kind: str, data: dict) -> None:
+        """
+        Receive refreshed data and display it only when it changed.
+
+        Args:
+            search_id (int): The id of the search the refresh belongs to.
+            kind (str): The kind of the data, 'weather' or 'forecast'.
+            data (dict): The fetched data.
 
-    def update_informations(self, weather: dict) -> None:
+        Returns:
+            None
         """
-        Update the weather information displayed on the main window.
+        if search_id != self.search_id or str(data.get('cod')) != '200':
+            return
+        self.drop_stale(kind)
+        fresh = parse_payload(kind, data)
+        current = self.weather_data if kind == 'weather' else self.forecast_data
+        if current is not None and fresh.version == current.version:
+            TRACER.count(f'refresh.{kind}.unchanged')
+            return
+        TRACER.count(f'refresh.{kind}.changed')
+        if kind == 'weather':
+            self.weather_data = fresh
+            self.update_informations(fresh)
+        else:
+            self.forecast_data = fresh
+            self.update_forecast(fresh)
+
+    def on_refresh_failed(self, search_id: int, kind: str, message: str) -> None:
+        """
+        Receive an error of a background refresh, the shown data stays and is refreshed later.
 
         Args:
-            weather (dict): The weather data.
+            search_id (int): The id of the search the refresh belongs to.
+            kind (str): The kind of the data, 'weather' or 'forecast'.
+            message (str): The error message.
 
         Returns:
             None
         """
-        name = weather['name']
-        timezone = get_timezone(weather['timezone'])
-        country = read_country(weather['sys']['country'], COUNTRY_CODES)
-        time = get_actual_time(weather['timezone'])
-        date = get_unix_to_datetime(weather['dt'], 'short_date')
-        weather_description = weather['weather'][0]['description']
-        temp = f"{round(weather['main']['temp'])}°C"
-        humidity = f"{str(round(weather['main']['humidity']))}%"
-        pressure = f"{str(weather['main']['pressure'])}hPa"
-        wind = f"{str(weather['wind']['speed'])}m/s"
-        sunrise = get_unix_to_time(weather['sys']['sunrise'], weather['timezone'], weather['dt'])
-        sunset = get_unix_to_time(weather['sys']['sunset'], weather['timezone'], weather['dt'])
-        image = get_image(weather['weather'][0]['icon'], BIG_IMAGE_SIZE)
+        if search_id != self.search_id:
+            return
+        TRACER.count(f'refresh.{kind}.failed')
+        self.statusbar.showMessage(f'Refreshing the {kind} failed: {message}', 10000)
+
+    def on_fetch_failed(self, search_id: int, kind: str, message: str) -> None:
+        """
+        Receive an error from a background worker and display it.
+
+        Args:
+            search_id (int): The id of the search the error belongs to.
+            kind (str): The kind of the data, 'weather' or 'forecast'.
+            message (str): The error message.
 
-        self.label_Name.setText(name)
-        self.label_Timezone.setText(f'{timezone} {country}')
-        self.label_Datetime.setText(f"{date} - {time}")
-        self.label_Weather.setText(weather_description)
-        self.label_Temperature_display.setText(temp)
-        self.label_Humidity_display.setText(humidity)
-        self.label_Pressure_display.setText(pressure)
-        self.label_Wind_display.setText(wind)
-        self.label_Sunrise_display.setText(sunrise)
-        self.label_Sunset_display.setText(sunset)
-        self.label_main_image.setPixmap(image)
+        Returns:
+            None
+        """
+        if search_id != self.search_id:
+            return
+        TRACER.count(f'search.{kind}.failed')
+        if kind in self.stale:
+            # The stale data stays shown and is refreshed in the background
+            self.statusbar.showMessage(f'The server is unavailable, showing data from '
+                                       f'{strftime("%d.%m %H:%M", localtime(self.stale[kind]))}')
+            if kind == 'weather' and self.weather_data is not None:
+                self.follow_city(self.weather_data)
+        else:
+            self.show_error_message(
+                message=f'There is problem with the connection to the API server... ({message})')
+        self.finish_search_phase(kind)
 
-    def update_forecast(self, forecast: dict) -> None:
+    def show_stale(self, query: str) -> None:
         """
-        Update the weather forecast information displayed on the main window.
+        Show the last good data of the searched city at once, when it is no longer fresh.
+
+        The data is replaced when the fetched data arrives, if fetching fails it stays shown.
 
         Args:
-            forecast (dict): The forecast data.
+            query (str): The searched city.
 
         Returns:
             None
         """
-        forecast_days = get_forecast_days(forecast)
+        for kind, show in (('weather', self.show_weather), ('forecast', self.show_forecast)):
+            entry = CLIENT.stale(kind, query)
+            if entry is None or kind not in self.search_pending:
+                continue
+            stored, data = entry
+            if show(data):
+                self.stale[kind] = stored
+                TRACER.count(f'search.stale.{kind}')
+        if self.stale:
+            self.statusbar.showMessage(
+                f'Showing data from {strftime("%d.%m %H:%M", localtime(min(self.stale.values())))}'
+                f', refreshing...')
 
-        for i, day in enumerate(forecast_days):
-            date = get_unix_to_datetime(day['dt'], 'short_date')
-            date_now = get_unix_to_datetime(get_unix(), 'short_date')
-            temp_max = str(round(day['main']['temp_max']))
-            #temp_min = str(round(day['main']['temp_min']))
-            temp = f"{temp_max}°C"
-            weather = day['weather'][0]['main']
-            icon = day['weather'][0]['icon']
-            image = get_image(icon, SMALL_IMAGE_SIZE)
-            if i == 0 and date == date_now:
-                getattr(self, f'{FRAMES_VARIABLES[0]}_{i + 1}').setText('today')
-            else:
-                getattr(self, f'{FRAMES_VARIABLES[0]}_{i + 1}').setText(date)
-            getattr(self, f'{FRAMES_VARIABLES[1]}_{i + 1}').setPixmap(image)
-            getattr(self, f'{FRAMES_VARIABLES[2]}_{i + 1}').setText(temp)
-            getattr(self, f'{FRAMES_VARIABLES[3]}_{i + 1}').setText(weather)
+    def drop_stale(self, kind: str) -> None:
+        """
+        Forget that the shown data of a kind is stale, the message is cleared with the last one.
+
+        Args:
+            kind (str): The kind of the data, 'weather' or 'forecast'.
+
+        Returns:
+            None
+        """
+        if self.stale.pop(kind, None) is not None and not self.stale:
+            self.statusbar.clearMessage()
+
+    def finish_search_phase(self, kind: str) -> None:
+        """
+        Mark a part of the current search as done and record the search time when all are done.
+
+        Args:
+            kind (str): The kind of the finished part, 'weather' or 'forecast'.
+
+        Returns:
+            None
+        """
+        self.search_pending.discard(kind)
+        if self.search_pending or not TRACER.enabled:
+            return
+        TRACER.record('search.total', perf_counter() - self.search_started)
+        TRACER.write_summary()
+        self.update_latency_panel()
+
+    def update_latency_panel(self) -> None:
+        """
+        Show the phases of the last search in the status bar and their p50/p95 in its tooltip.
+
+        Returns:
+            None
+        """
+        phases = [('search', 'search.total'), ('weather', 'http.weather'),
+                  ('forecast', 'http.forecast'), ('icons', 'icons.weather'),
+                  ('info', 'render.informations'), ('frames', 'render.forecast')]
+        text = ' | '.join(f'{label} {TRACER.last[name] * 1000:.0f}ms'
+                          for label, name in phases if name in TRACER.last)
+        counters = TRACER.counters
+        text += f" | cache {counters['response_cache.hit']}/" \
+                f"{counters['response_cache.hit'] + counters['response_cache.miss']}" \
+                f" | icons {counters['icon_cache.download']} dl"
+        self.label_latency.setText(text)
+        self.label_latency.setToolTip('\n'.join(
+            f"{name}: p50 {stats['p50']}ms, p95 {stats['p95']}ms ({stats['count']})"
+            for name, stats in sorted(TRACER.summary().items())))
+
+    def show_weather(self, data: dict) -> bool:
+        """
+        Parse and display weather data or display the error returned by the API.
+
+        Args:
+            data (dict): The weather data.
+
+        Returns:
+            bool: True if the data was displayed.
+        """
+        if str(data.get('cod')) != '200':
+            self.show_error_message(message=data.get('message', f"API error {data.get('cod')}"))
+            return False
+        self.weather_data = Observation.from_payload(data)
+        self.update_informations(self.weather_data)
+        return True
+
+    def follow_city(self, weather: Observation) -> None:
+        """
+        Remember the searched city and start refreshing it in the background.
+
+        Args:
+            weather (Observation): The fetched weather.
+
+        Returns:
+            None
+        """
+        if not self.auto_refresh:
+            return
+        self.current_query = f'id:{weather.city_id}'
+        self.auto_refresher.start()
+
+    def show_forecast(self, data: dict) -> bool:
+        """
+        Parse and display forecast data, errors are reported by show_weather.
+
+        Args:
+            data (dict): The forecast data.
+
+        Returns:
+            bool: True if the data was displayed.
+        """
+        if str(data.get('cod')) != '200':
+            return False
+        self.forecast_data = Forecast.from_payload(data)
+        self.update_forecast(self.forecast_data)
+        return True
+
+    def update_informations(self, weather: Observation) -> None:
+        """
+        Update the weather information displayed on the main window.
+
+        Only labels whose content changed are updated.
+
+        Args:
+            weather (Observation): The weather.
+
+        Returns:
+            None
+        """
+        with TRACER.span('render.informations'):
+            offset = weather.timezone
+            country = read_country(weather.country)
+            time = format_time(now(), offset, 'time')
+            date = format_time(weather.dt, offset, 'short_date')
+            self.information_view.apply({
+                'name': weather.name,
+                'timezone': f"{get_timezone(offset)} {country}",
+                'datetime': f"{date} - {time}",
+                'weather': weather.description,
+                'temperature': f"{round(weather.temp)}°C",
+                'humidity': f"{str(round(weather.humidity))}%",
+                'pressure': f"{str(weather.pressure)}hPa",
+                'wind': f"{str(weather.wind_speed)}m/s",
+                'sunrise': format_time(weather.sunrise, offset, 'time'),
+                'sunset': format_time(weather.sunset, offset, 'time'),
+                'image': (weather.icon, BIG_IMAGE_SIZE)
+            })
+
+    def update_forecast(self, forecast: Forecast) -> None:
+        """
+        Update the weather forecast information displayed on the main window.
+
+        Every frame shows the midday record of its day, statistics of the whole
+        day are shown in the tooltip of the frame. Only labels whose content
+        changed are updated.
+
+        Args:
+            forecast (Forecast): The forecast.
+
+        Returns:
+            None
+        """
+        with TRACER.span('render.forecast'):
+            days_stats = forecast.midday_stats()[:FRAMES_COUNT]
+            offset = forecast.timezone
+            values = {}
+            for number, stats in enumerate(days_stats, start=1):
+                index = stats['index']
+                day_dt = int(forecast.dt[index])
+                if number == 1 and is_today(day_dt, offset):
+                    values[f'date_{number}'] = 'today'
+                else:
+                    values[f'date_{number}'] = format_time(day_dt, offset, 'short_date')
+                #temp_min = str(round(forecast.temp_min[index]))
+                values[f'temp_{number}'] = f"{round(forecast.temp_max[index])}°C"
+                values[f'weather_{number}'] = forecast.weather_main[index]
+                values[f'image_{number}'] = (forecast.icon[index], SMALL_IMAGE_SIZE)
+                values[f'tooltip_{number}'] = \
+                    f"Temperature: {round(stats['temp_min'])}°C - {round(stats['temp_max'])}°C\n" \
+                    f"Mean temperature: {round(stats['temp_mean'], 1)}°C\n" \
+                    f"Precipitation: {round(stats['precipitation'], 1)}mm\n" \
+                    f"Wind: {round(stats['wind_mean'], 1)}m/s " \
+                    f"(max {round(stats['wind_max'], 1)}m/s)"
+            self.forecast_view.apply(values)
 
     def open_options(self) -> None:
         """
-        Open the options window to configure settings.
+        Open the options window to configure settings, the window is created only once.
 
         Returns:
             None
         """
-        self.options = Options(API_KEY, self.change_api_key)
+        if self.options is None:
+            self.options = Options(API_KEY, self.change_api_key)
         self.options.show()
+        self.options.raise_()
+
+    def open_trends(self) -> None:
+        """
+        Open the window with trend charts of archived data, showing the current city first.
+
+        A window that is already open is brought to the front instead.
+
+        Returns:
+            None
+        """
+        if raise_window(self.trends):
+            return
+        city_id = self.weather_data.city_id if self.weather_data is not None else None
+        self.trends = TrendWindow(get_archive(), city_id)
+        # The loaded series are released as soon as the window is closed
+        self.trends.setAttribute(Qt.WA_DeleteOnClose)
+        self.trends.show()
+
+    def open_accuracy(self) -> None:
+        """
+        Open the window with the accuracy of saved forecasts, showing the current city first.
+
+        A window that is already open is brought to the front instead.
+
+        Returns:
+            None
+        """
+        if raise_window(self.accuracy):
+            return
+        city_id = self.weather_data.city_id if self.weather_data is not None else None
+        self.accuracy = AccuracyWindow(city_id)
+        # The results are released as soon as the window is closed
+        self.accuracy.setAttribute(Qt.WA_DeleteOnClose)
+        self.accuracy.show()
+
+    def show_memory_report(self) -> None:
+        """
+        Show the memory report of the program.
+
+        Returns:
+            None
+        """
+        report = self.memory_monitor.report()
+        box = QMessageBox(self)
+        box.setWindowTitle('Memory report')
+        box.setText(report.split('\n', 1)[0])
+        box.setDetailedText(report)
+        box.exec_()
 
     def change_api_key(self, new_key: str) -> None:
         """
@@ -194,14 +646,24 @@ class MyGUI(QMainWindow):
             None
         """
         globals()['API_KEY'] = new_key
+        CLIENT.api_key = new_key
 
     def open_day_file(self) -> None:
         """
-        Open a previously saved weather search from a JSON file.
+        Open a previously saved weather search from the save store or a JSON file.
 
         Returns:
             None
         """
+        names = get_save_store().names()
+        if names:
+            name, chosen = QInputDialog.getItem(self, 'Open', 'Saved search:',
+                                                names + [OTHER_FILE], 0, False)
+            if not chosen:
+                return
+            if name != OTHER_FILE:
+                self.search(save=get_save_store().load(name))
+                return
         file_name = QFileDialog.getOpenFileName\
             (self, 'Open file', r'D:\GitHub\Weather_App\src\saves', '*.json')
         try:
@@ -0,0 +1,153 @@
+'''
+This module is responsible for recording and replaying HTTP traffic of the weather client.
+
+In record mode every response is passed through and stored as a fixture, in replay
+mode responses are served from fixtures only and the network is never used.
+'''
+import base64
+import hashlib
+import json
+import os
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Headers describing the raw transfer, fixtures store already decoded bodies
+SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection')
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    This class represents a transport adapter that records or replays responses.
+
+    Args:
+        mode (str): RECORD or REPLAY.
+        directory (str): The directory of fixtures.
+
+    Attributes:
+        mode (str): RECORD or REPLAY.
+        directory (str): The directory of fixtures.
+
+    Methods:
+        send(): Sends a request or serves it from a fixture.
+    """
+    def __init__(self, mode: str, directory: str, **kwargs) -> None:
+        """
+        Initialize the adapter.
+
+        Args:
+            mode (str): RECORD or REPLAY.
+            directory (str): The directory of fixtures.
+            **kwargs: Arguments of HTTPAdapter, e.g. the pool size.
+
+        Returns:
+            None
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f'Wrong type of replay mode: {mode}')
+        super().__init__(**kwargs)
+        self.mode = mode
+        self.directory = directory
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:  # pylint: disable=arguments-differ
+        """
+        Send a request in record mode or serve it from a fixture in replay mode.
+
+        Args:
+            request (requests.PreparedRequest): The request.
+            **kwargs: Arguments of HTTPAdapter.send.
+
+        Returns:
+            requests.Response: The response.
+        """
+        path = os.path.join(self.directory, f'{fixture_key(request.method, request.url)}.json')
+        if self.mode == REPLAY:
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    fixture = json.load(file)
+            except FileNotFoundError as error:
+                raise requests.ConnectionError(
+                    f'No recorded response for {strip_key(request.url)}', request=request) from error
+            return build_response(request, fixture)
+
+        response = super().send(request, **kwargs)
+        fixture = {
+            'method': request.method,
+            'url': strip_key(request.url),
+            'status': response.status_code,
+            'headers': {key: value for key, value in response.headers.items()
+                        if key.lower() not in SKIPPED_HEADERS},
+            'body': base64.b64encode(response.content).decode('ascii')
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(fixture, file, indent=4, ensure_ascii=False)
+        return response
+
+
+def strip_key(url: str) -> str:
+    """
+    Remove the API key from a URL and sort its query, so fixtures do not depend on them.
+
+    Args:
+        url (str): The request URL.
+
+    Returns:
+        str: The URL without the API key.
+    """
+    parts = urlsplit(url)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query) if key != 'appid')
+    return parts._replace(query=urlencode(query)).geturl()
+
+def fixture_key(method: str, url: str) -> str:
+    """
+    Build the name of the fixture of a request.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The request URL.
+
+    Returns:
+        str: The fixture name.
+    """
+    return hashlib.sha1(f'{method} {strip_key(url)}'.encode('utf-8')).hexdigest()
+
+def build_response(request: requests.PreparedRequest, fixture: dict) -> requests.Response:
+    """
+    Build a response from a fixture.
+
+    Args:
+        request (requests.PreparedRequest): The request.
+        fixture (dict): The recorded response.
+
+    Returns:
+        requests.Response: The response.
+    """
+    response = requests.Response()
+    response.status_code = fixture['status']
+    response.headers = CaseInsensitiveDict(fixture['headers'])
+    response._content = base64.b64decode(fixture['body'])  # pylint: disable=protected-access
+    response.url = request.url
+    response.request = request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+def install_replay(session: requests.Session, mode: str, directory: str) -> None:
+    """
+    Make a session record or replay all its traffic.
+
+    Args:
+        session (requests.Session): The session.
+        mode (str): RECORD or REPLAY.
+        directory (str): The directory of fixtures.
+
+    Returns:
+        None
+    """
+    adapter = ReplayAdapter(mode, directory)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
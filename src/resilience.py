@@ -0,0 +1,128 @@
+'''
+This module is responsible for surviving failures of the weather servers.
+
+Failed requests are retried a few times after a jittered, exponentially growing
+delay, so clients that failed together do not retry together. A circuit breaker
+counts requests that failed after all retries, when too many fail in a row it
+opens and requests fail at once, without waiting for timeouts, until a trial
+request is allowed again after a while.
+'''
+import random
+import threading
+import time
+from src.settings import RETRY_BACKOFF, RETRY_BACKOFF_MAX, CIRCUIT_FAILURES, CIRCUIT_RESET
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    """
+    This class represents a circuit breaker of one server.
+
+    Args:
+        failures (int): The number of failed requests in a row that opens the circuit.
+        reset (float): The time in seconds after which a trial request is allowed.
+
+    Attributes:
+        failures (int): The number of failed requests in a row that opens the circuit.
+        reset (float): The time in seconds after which a trial request is allowed.
+        state (str): CLOSED, OPEN or HALF_OPEN.
+        opened (int): The number of times the circuit was opened.
+
+    Methods:
+        allow(): Checks whether a request may be sent.
+        retry_in(): Returns the time until a trial request is allowed.
+        record_success(): Closes the circuit.
+        record_failure(): Counts a failed request.
+    """
+    def __init__(self, failures: int = CIRCUIT_FAILURES, reset: float = CIRCUIT_RESET) -> None:
+        """
+        Initialize a closed circuit breaker.
+
+        Args:
+            failures (int): The number of failed requests in a row that opens the circuit.
+            reset (float): The time in seconds after which a trial request is allowed.
+
+        Returns:
+            None
+        """
+        self.failures = failures
+        self.reset = reset
+        self.state = CLOSED
+        self.opened = 0
+        self._failed = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check whether a request may be sent.
+
+        An open circuit lets one trial request through when the reset time has passed,
+        other requests are rejected until the trial request finishes.
+
+        Returns:
+            bool: True if the request may be sent.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """
+        Get the time until a trial request is allowed.
+
+        Returns:
+            float: The time in seconds, 0 if requests are allowed.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return 0.0
+            return max(0.0, self.reset - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        """
+        Close the circuit after a successful request.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.state = CLOSED
+            self._failed = 0
+
+    def record_failure(self) -> None:
+        """
+        Count a failed request and open the circuit when there were too many in a row.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._failed += 1
+            if self.state == HALF_OPEN or self._failed >= self.failures:
+                if self.state != OPEN:
+                    self.opened += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BACKOFF, cap: float = RETRY_BACKOFF_MAX) -> float:
+    """
+    Get the delay before retrying a request, a random time up to an exponentially growing limit.
+
+    Args:
+        attempt (int): The number of the failed attempt, starting at 0.
+        base (float): The limit after the first attempt in seconds.
+        cap (float): The largest limit in seconds.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
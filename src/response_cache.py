@@ -0,0 +1,308 @@
+'''
+This module is responsible for caching weather and forecast responses.
+'''
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from src.settings import RESPONSE_CACHE_DIR, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_DISK_SIZE, \
+    RESPONSE_TTL
+
+
+class ResponseCache:
+    """
+    This class represents a TTL cache of API responses with an in-memory and an on-disk layer.
+
+    Entries are keyed by the kind of the response and the normalized query, units and
+    language. Every kind has its own time to live, so current weather expires much
+    sooner than the forecast, which only changes every 3 hours.
+
+    Args:
+        directory (str): The directory of the on-disk layer.
+        max_entries (int): The maximum number of responses kept in memory.
+        max_disk_size (int): The maximum size of the on-disk layer in bytes.
+        ttl (Optional[dict]): The time to live in seconds for every kind of response.
+
+    Attributes:
+        directory (str): The directory of the on-disk layer.
+        max_entries (int): The maximum number of responses kept in memory.
+        max_disk_size (int): The maximum size of the on-disk layer in bytes.
+        ttl (dict): The time to live in seconds for every kind of response.
+        hits (int): The number of responses served from the cache.
+        misses (int): The number of lookups that found no fresh response.
+
+    Methods:
+        get(): Returns a fresh cached response or None.
+        get_stale(): Returns a cached response of any age or None.
+        put(): Stores a response.
+        clear(): Removes all responses from memory and disk.
+        forget(): Removes all responses from memory.
+    """
+    def __init__(self, directory: str = RESPONSE_CACHE_DIR, max_entries: int = RESPONSE_CACHE_SIZE,
+                 max_disk_size: int = RESPONSE_CACHE_DISK_SIZE,
+                 ttl: Optional[dict] = None) -> None:
+        """
+        Initialize the response cache.
+
+        Args:
+            directory (str): The directory of the on-disk layer.
+            max_entries (int): The maximum number of responses kept in memory.
+            max_disk_size (int): The maximum size of the on-disk layer in bytes.
+            ttl (Optional[dict]): The time to live in seconds for every kind of response.
+
+        Returns:
+            None
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_size = max_disk_size
+        self.ttl = dict(RESPONSE_TTL if ttl is None else ttl)
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # The size of the on-disk layer, counted once and then kept up to date by writes
+        self._disk_size: Optional[int] = None
+
+    def get(self, kind: str, query: str, units: str, lang: str) -> Optional[dict]:
+        """
+        Return a cached response if it is still fresh.
+
+        Args:
+            kind (str): The kind of the response, e.g. 'weather' or 'forecast'.
+            query (str): The city query.
+            units (str): The units of measurement.
+            lang (str): The language of descriptions.
+
+        Returns:
+            Optional[dict]: The cached response or None.
+        """
+        key = make_key(kind, query, units, lang)
+        ttl = self.ttl.get(kind, 0)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._read(key)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is not None and time.time() - entry[0] < ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def get_stale(self, kind: str, query: str, units: str, lang: str) -> Optional[tuple]:
+        """
+        Return a cached response even if it is no longer fresh, it is not counted as a hit.
+
+        Args:
+            kind (str): The kind of the response, e.g. 'weather' or 'forecast'.
+            query (str): The city query.
+            units (str): The units of measurement.
+            lang (str): The language of descriptions.
+
+        Returns:
+            Optional[tuple]: The time of storing and the response or None.
+        """
+        key = make_key(kind, query, units, lang)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._read(key)
+            return entry
+
+    def put(self, kind: str, query: str, units: str, lang: str, data: dict) -> None:
+        """
+        Store a response in memory and on disk.
+
+        Args:
+            kind (str): The kind of the response.
+            query (str): The city query.
+            units (str): The units of measurement.
+            lang (str): The language of descriptions.
+            data (dict): The response.
+
+        Returns:
+            None
+        """
+        key = make_key(kind, query, units, lang)
+        entry = (time.time(), data)
+        with self._lock:
+            self._remember(key, entry)
+            self._write(key, entry)
+
+    def clear(self) -> None:
+        """
+        Remove all responses from memory and disk.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._entries.clear()
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    os.remove(os.path.join(self.directory, name))
+            self._disk_size = 0
+
+    def forget(self) -> None:
+        """
+        Remove all responses from memory, the on-disk layer keeps them.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        """
+        Put an entry in memory and evict the least recently used ones.
+
+        Args:
+            key (str): The cache key.
+            entry (tuple): The time of storing and the response.
+
+        Returns:
+            None
+        """
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        """
+        Build the path of an entry in the on-disk layer.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            str: The path of the entry file.
+        """
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{name}.json')
+
+    def _read(self, key: str) -> Optional[tuple]:
+        """
+        Read an entry from disk.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[tuple]: The time of storing and the response or None.
+        """
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as file:
+                content = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if content.get('key') != key:
+            return None
+        return content['stored'], content['data']
+
+    def _write(self, key: str, entry: tuple) -> None:
+        """
+        Write an entry to disk and evict the oldest files when the size limit is exceeded.
+
+        The size of the directory is counted only on the first write and when evicting,
+        other writes update a running total.
+
+        Args:
+            key (str): The cache key.
+            entry (tuple): The time of storing and the response.
+
+        Returns:
+            None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if self._disk_size is None:
+            self._disk_size = sum(size for _, _, size in self._disk_files())
+        path = self._path(key)
+        try:
+            self._disk_size -= os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'key': key, 'stored': entry[0], 'data': entry[1]}, file)
+        os.replace(f'{path}.tmp', path)
+        self._disk_size += os.path.getsize(path)
+        if self._disk_size > self.max_disk_size:
+            self._evict(path)
+
+    def _evict(self, kept: str) -> None:
+        """
+        Remove the oldest files until the on-disk layer is a quarter below its size limit.
+
+        Evicting below the limit leaves room for many writes before the next eviction.
+
+        Args:
+            kept (str): The path of the entry just written, it is never removed.
+
+        Returns:
+            None
+        """
+        files = sorted(self._disk_files())
+        total = sum(size for _, _, size in files)
+        for _, file, size in files:
+            if total <= self.max_disk_size * 3 // 4:
+                break
+            if file == kept:
+                continue
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_size = total
+
+    def _disk_files(self) -> list:
+        """
+        List the entry files of the on-disk layer.
+
+        Returns:
+            list: A list of (modification time, path, size) tuples.
+        """
+        files = []
+        for item in os.scandir(self.directory):
+            if item.name.endswith('.json'):
+                # Another program sharing the directory may remove files meanwhile
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, item.path, stat.st_size))
+        return files
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a city query, so differently typed names of one city share a cache entry.
+
+    Args:
+        query (str): The city query.
+
+    Returns:
+        str: The normalized query.
+    """
+    return ','.join(' '.join(part.split()) for part in query.split(',')).casefold()
+
+def make_key(kind: str, query: str, units: str, lang: str) -> str:
+    """
+    Build a cache key of a response.
+
+    Args:
+        kind (str): The kind of the response.
+        query (str): The city query.
+        units (str): The units of measurement.
+        lang (str): The language of descriptions.
+
+    Returns:
+        str: The cache key.
+    """
+    return f'{kind}|{normalize_query(query)}|{units}|{lang}'
@@ -0,0 +1,480 @@
+'''
+This module is responsible for the compressed store of saved searches.
+
+Consecutive saves of a city overlap in most forecast times, and a city saved
+more than once per forecast issue repeats whole forecast entries. The store
+keeps every distinct forecast entry of a city once, identified by its forecast
+time and a digest of its content. The entries new in a save are compressed
+together as one block. Each save is kept as compressed compact JSON, with its
+forecast list replaced by runs of entries in blocks. Loading a save
+rebuilds exactly the [weather, forecast] payload that was saved.
+
+The store is an SQLite file in the saves directory. Existing JSON saves are
+converted, on all CPU cores, with:
+
+    python -m src.save_store migrate [directory] [--keep] [--workers N]
+    python -m src.save_store stats [directory]
+
+The JSON files are removed after every converted save was checked, unless --keep is given.
+'''
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import lzma
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+from src.settings import SAVES_DIR, SAVE_STORE_NAME
+from src.timeconv import format_time
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS blocks (
+        key TEXT PRIMARY KEY,
+        data BLOB NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS saves (
+        name TEXT PRIMARY KEY,
+        city_id INTEGER,
+        dt INTEGER,
+        data BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS saves_city_dt ON saves (city_id, dt);
+"""
+# A save is a few dozen kilobytes, a small dictionary keeps compressing cheap
+FILTERS = [{'id': lzma.FILTER_LZMA2, 'preset': 9, 'dict_size': 1 << 16}]
+# Digests are only kept in memory, to find entries that are already stored
+DIGEST_SIZE = 16
+BLOCK_KEY_SIZE = 8
+# Saves older than the forecast length before a forecast cannot share its entries
+FORECAST_SPAN = 6 * 86400
+
+
+class SaveStore:
+    """
+    This class represents the compressed store of saved searches.
+
+    Args:
+        path (str): The path of the database file.
+
+    Attributes:
+        path (str): The path of the database file.
+
+    Methods:
+        add(): Stores one save.
+        load(): Rebuilds the payload of a save.
+        names(): Returns the names of all saves.
+        stats(): Returns the numbers of saves, blocks and bytes.
+        compact(): Rebuilds the database file without unused pages.
+        close(): Closes the database.
+    """
+    def __init__(self, path: str) -> None:
+        """
+        Open the store, creating the database when it does not exist.
+
+        Args:
+            path (str): The path of the database file.
+
+        Returns:
+            None
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def add(self, name: str, weather: dict, forecast: dict) -> None:
+        """
+        Store one save, forecast entries stored by earlier saves of the city are only referenced.
+
+        A save with the same name is replaced.
+
+        Args:
+            name (str): The name of the save, e.g. '08.08.23-Rzym-IT.json'.
+            weather (dict): The weather data.
+            forecast (dict): The forecast data.
+
+        Returns:
+            None
+        """
+        known = {}
+        times = [entry['dt'] for entry in forecast['list']]
+        if times:
+            with self._lock:
+                rows = self._connection.execute(
+                    'SELECT data FROM saves WHERE city_id = ? AND dt BETWEEN ? AND ?',
+                    (weather['id'], min(times) - FORECAST_SPAN, max(times))).fetchall()
+                blocks = self._blocks({run[0] for data, in rows
+                                       for run in decode(data)['forecast']['list']})
+            for block, entries in blocks.items():
+                for position, entry in enumerate(entries):
+                    known[(entry['dt'], entry_digest(entry))] = (block, position)
+        self.write(*pack_saves([(name, weather, forecast)], known))
+
+    def write(self, blocks: list, save_rows: list) -> None:
+        """
+        Insert packed saves in one transaction.
+
+        Args:
+            blocks (list): (key, data) of the compressed blocks of new entries.
+            save_rows (list): (name, city id, dt, data) of the saves.
+
+        Returns:
+            None
+        """
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT OR IGNORE INTO blocks VALUES (?, ?)', blocks)
+            self._connection.executemany('INSERT OR REPLACE INTO saves VALUES (?, ?, ?, ?)',
+                                         save_rows)
+
+    def load(self, name: str, with_forecast: bool = True) -> Optional[list]:
+        """
+        Rebuild the payload of a save.
+
+        Args:
+            name (str): The name of the save.
+            with_forecast (bool): Whether to rebuild the forecast, it is None otherwise.
+
+        Returns:
+            Optional[list]: The [weather, forecast] payload or None if there is no such save.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data FROM saves WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                return None
+            save = decode(row[0])
+            if not with_forecast:
+                return [save['weather'], None]
+            runs = save['forecast']['list']
+            blocks = self._blocks({block for block, _, _ in runs})
+        save['forecast']['list'] = [entry for block, position, count in runs
+                                    for entry in blocks[block][position:position + count]]
+        return [save['weather'], save['forecast']]
+
+    def names(self) -> list:
+        """
+        Get the names of all saves, the newest first.
+
+        Returns:
+            list: The names.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT name FROM saves ORDER BY dt DESC, name').fetchall()
+        return [name for name, in rows]
+
+    def stats(self) -> dict:
+        """
+        Get the size of the store.
+
+        Returns:
+            dict: The numbers of 'saves', 'blocks' of entries and 'bytes' of the database file.
+        """
+        with self._lock:
+            saves = self._connection.execute('SELECT COUNT(*) FROM saves').fetchone()[0]
+            blocks = self._connection.execute('SELECT COUNT(*) FROM blocks').fetchone()[0]
+        return {'saves': saves, 'blocks': blocks, 'bytes': os.path.getsize(self.path)}
+
+    def compact(self) -> None:
+        """
+        Rebuild the database file without unused pages.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._connection.execute('VACUUM')
+
+    def close(self) -> None:
+        """
+        Close the database.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _blocks(self, keys: set) -> dict:
+        """
+        Read and decode blocks, the lock must be held.
+
+        Args:
+            keys (set): The block keys.
+
+        Returns:
+            dict: The lists of entries by block key.
+        """
+        keys = sorted(keys)
+        return {key: decode(data) for key, data in self._connection.execute(
+            f"SELECT key, data FROM blocks WHERE key IN ({', '.join('?' * len(keys))})", keys)}
+
+
+def encode(data) -> bytes:
+    """
+    Serialize data to compressed compact JSON.
+
+    Args:
+        data: The data.
+
+    Returns:
+        bytes: The compressed JSON.
+    """
+    return lzma.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+                         .encode('utf-8'), format=lzma.FORMAT_RAW, filters=FILTERS)
+
+def decode(data: bytes):
+    """
+    Deserialize compressed JSON.
+
+    Args:
+        data (bytes): The compressed JSON.
+
+    Returns:
+        The data.
+    """
+    return json.loads(lzma.decompress(data, format=lzma.FORMAT_RAW, filters=FILTERS))
+
+def entry_digest(entry: dict) -> str:
+    """
+    Compute the digest of a forecast entry.
+
+    Args:
+        entry (dict): The forecast entry.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    data = json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+def save_name(weather: dict) -> str:
+    """
+    Get the name of a save, the date in the city's local time with the city and country.
+
+    Args:
+        weather (dict): The weather data.
+
+    Returns:
+        str: The name, e.g. '08.08.23-Rzym-IT.json'.
+    """
+    return f"{format_time(weather['dt'], weather['timezone'], 'date')}-" \
+           f"{weather['name']}-{weather['sys']['country']}.json"
+
+def pack_saves(saves: list, known: Optional[dict] = None) -> tuple:
+    """
+    Turn saves of one city, oldest first, into rows of the store.
+
+    Entries already in known or in an earlier save of the list are referenced,
+    the new entries of every save are compressed together as one block.
+
+    Args:
+        saves (list): (name, weather, forecast) tuples.
+        known (Optional[dict]): (block key, position) of stored entries by (dt, digest).
+
+    Returns:
+        tuple: The blocks and save rows for SaveStore.write.
+    """
+    known = {} if known is None else dict(known)
+    blocks, save_rows = [], []
+    for name, weather, forecast in saves:
+        keys = [(entry['dt'], entry_digest(entry)) for entry in forecast['list']]
+        entries = dict(zip(keys, forecast['list']))
+        new = [key for key in entries if key not in known]
+        if new:
+            data = encode([entries[key] for key in new])
+            block = hashlib.blake2b(data, digest_size=BLOCK_KEY_SIZE).hexdigest()
+            blocks.append((block, data))
+            for position, key in enumerate(new):
+                known[key] = (block, position)
+        # The list becomes runs of consecutive entries of a block: [block, position, count]
+        runs = []
+        for block, position in (known[key] for key in keys):
+            if runs and runs[-1][0] == block and runs[-1][1] + runs[-1][2] == position:
+                runs[-1][2] += 1
+            else:
+                runs.append([block, position, 1])
+        # Replacing the value keeps the position of 'list' among the keys
+        head = {**forecast, 'list': runs}
+        save_rows.append((name, weather['id'], weather['dt'],
+                          encode({'weather': weather, 'forecast': head})))
+    return blocks, save_rows
+
+_STORES: dict = {}
+
+def get_save_store(directory: str = SAVES_DIR) -> SaveStore:
+    """
+    Get the store of a saves directory, opening it on first use.
+
+    Args:
+        directory (str): The saves directory.
+
+    Returns:
+        SaveStore: The shared store.
+    """
+    path = os.path.join(directory, SAVE_STORE_NAME)
+    if path not in _STORES:
+        _STORES[path] = SaveStore(path)
+    return _STORES[path]
+
+def iter_saves(directory: str = SAVES_DIR, with_forecast: bool = True,
+               skip: Optional[set] = None) -> Iterator[tuple]:
+    """
+    Iterate over all saves of a directory, in the store and in JSON files.
+
+    A store that does not exist is not created, broken JSON files are skipped.
+
+    Args:
+        directory (str): The saves directory.
+        with_forecast (bool): Whether forecasts are needed, stored ones are not rebuilt otherwise.
+        skip (Optional[set]): The names of saves that are not loaded.
+
+    Yields:
+        tuple: The name, weather and forecast of every save.
+    """
+    stored = set(skip or ())
+    if os.path.exists(os.path.join(directory, SAVE_STORE_NAME)):
+        store = get_save_store(directory)
+        for name in store.names():
+            if name in stored:
+                continue
+            stored.add(name)
+            yield (name, *store.load(name, with_forecast))
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        name = os.path.basename(path)
+        if name in stored:
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                weather, forecast = json.load(file)
+        except (ValueError, TypeError):
+            print(f'Skipping broken save: {path}')
+            continue
+        yield name, weather, forecast
+
+def _pack_files(paths: list) -> tuple:
+    """
+    Read JSON saves of one city and pack them, run in a worker process.
+
+    Args:
+        paths (list): The paths of the saves.
+
+    Returns:
+        tuple: The blocks and save rows for SaveStore.write, as returned by pack_saves.
+    """
+    saves = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as file:
+            weather, forecast = json.load(file)
+        saves.append((os.path.basename(path), weather, forecast))
+    saves.sort(key=lambda save: save[1]['dt'])
+    return pack_saves(saves)
+
+def _check_files(store_path: str, paths: list) -> list:
+    """
+    Compare JSON saves with their copies in the store, run in a worker process.
+
+    Args:
+        store_path (str): The path of the store.
+        paths (list): The paths of the saves.
+
+    Returns:
+        list: The paths whose copies are exact.
+    """
+    store = SaveStore(store_path)
+    exact = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as file:
+            if store.load(os.path.basename(path)) == json.load(file):
+                exact.append(path)
+    store.close()
+    return exact
+
+def migrate(directory: str = SAVES_DIR, keep: bool = False,
+            workers: Optional[int] = None) -> dict:
+    """
+    Convert the JSON saves of a directory to the store.
+
+    Saves are grouped by city, every group is read and packed in its own process.
+    Files already in the store are skipped, converted files are removed only after
+    their copies were rebuilt and compared.
+
+    Args:
+        directory (str): The saves directory.
+        keep (bool): Whether to keep the JSON files.
+        workers (Optional[int]): The number of processes, all CPU cores by default.
+
+    Returns:
+        dict: The numbers of 'converted' saves, 'json_bytes' and 'store_bytes'.
+    """
+    store = get_save_store(directory)
+    stored = set(store.names())
+    groups = defaultdict(list)
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        name = os.path.basename(path)
+        if name not in stored:
+            # 'dd.mm.yy-City-CC.json', the city and country part groups saves of a city
+            groups[name.split('-', 1)[-1]].append(path)
+    paths = [path for group in groups.values() for path in group]
+    json_bytes = sum(os.path.getsize(path) for path in paths)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for packed in executor.map(_pack_files, groups.values()):
+            store.write(*packed)
+        exact = [path for checked in executor.map(
+            _check_files, [store.path] * len(groups), groups.values()) for path in checked]
+    if len(exact) != len(paths):
+        print(f'{len(paths) - len(exact)} saves were not rebuilt exactly, no file was removed')
+    elif not keep:
+        for path in paths:
+            os.remove(path)
+    store.compact()
+    return {'converted': len(paths), 'json_bytes': json_bytes,
+            'store_bytes': store.stats()['bytes']}
+
+def main(args: list) -> None:
+    """
+    Run the store command line.
+
+    Args:
+        args (list): The command line arguments.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.save_store',
+                                     description='Manage the compressed save store.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = commands.add_parser('migrate', help='convert JSON saves into the store')
+    migrate_parser.add_argument('directory', nargs='?', default=SAVES_DIR,
+                                help='directory of the saves')
+    migrate_parser.add_argument('--keep', action='store_true',
+                                help='keep the JSON files after converting them')
+    migrate_parser.add_argument('--workers', type=int,
+                                help='number of processes, all CPU cores by default')
+    stats_parser = commands.add_parser('stats', help='show the size of the store')
+    stats_parser.add_argument('directory', nargs='?', default=SAVES_DIR,
+                              help='directory of the saves')
+    options = parser.parse_args(args)
+    if options.command == 'migrate':
+        if options.workers is not None and options.workers < 1:
+            parser.error('--workers must be positive')
+        result = migrate(options.directory, options.keep, options.workers)
+        ratio = result['json_bytes'] / max(result['store_bytes'], 1)
+        print(f"Converted {result['converted']} saves: {result['json_bytes']} bytes of JSON, "
+              f"{result['store_bytes']} bytes in the store ({ratio:.1f}x smaller)")
+    else:
+        print(', '.join(f'{key}: {value}'
+                        for key, value in get_save_store(options.directory).stats().items()))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
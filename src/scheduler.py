@@ -0,0 +1,184 @@
+'''
+This module is responsible for scheduling requests to the weather API.
+
+Requests are rate limited with a token bucket, interactive searches are served
+before background refreshes and identical requests in flight share one response.
+'''
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+from src.settings import API_CALLS_PER_MINUTE, API_BURST
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class TokenBucket:
+    """
+    This class represents a token bucket rate limiter.
+
+    Args:
+        rate (float): The number of tokens added per second.
+        capacity (int): The maximum number of stored tokens.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        capacity (int): The maximum number of stored tokens.
+
+    Methods:
+        take(): Takes a token or tells how long to wait for one.
+    """
+    def __init__(self, rate: float, capacity: int) -> None:
+        """
+        Initialize a full token bucket.
+
+        Args:
+            rate (float): The number of tokens added per second.
+            capacity (int): The maximum number of stored tokens.
+
+        Returns:
+            None
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            float: 0 when a token was taken, otherwise the number of seconds until the next one.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class RequestScheduler:
+    """
+    This class represents a quota-aware scheduler of API requests.
+
+    Args:
+        calls_per_minute (int): The API quota.
+        burst (int): The maximum number of calls sent at once after a quiet period.
+
+    Attributes:
+        calls_made (int): The number of calls sent upstream.
+        calls_saved (int): The number of calls that shared a response of an identical call.
+        calls_queued (int): The number of calls that had to wait for the rate limit.
+
+    Methods:
+        submit(): Runs a request respecting the quota, priorities and coalescing.
+        stats(): Returns all counters.
+    """
+    def __init__(self, calls_per_minute: int = API_CALLS_PER_MINUTE, burst: int = API_BURST) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            calls_per_minute (int): The API quota.
+            burst (int): The maximum number of calls sent at once after a quiet period.
+
+        Returns:
+            None
+        """
+        self.calls_made = 0
+        self.calls_saved = 0
+        self.calls_queued = 0
+        self._bucket = TokenBucket(calls_per_minute / 60, burst)
+        self._condition = threading.Condition()
+        self._waiting: list = []
+        self._order = itertools.count()
+        self._in_flight: dict = {}
+
+    def submit(self, key: str, fetch: Callable[[], Any], priority: int = INTERACTIVE,
+               limited: bool = True) -> Any:
+        """
+        Run a request, or wait for the identical request that is already in flight.
+
+        Args:
+            key (str): The identity of the request.
+            fetch (Callable[[], Any]): A callable that sends the request.
+            priority (int): INTERACTIVE or BACKGROUND, lower values are served first.
+            limited (bool): Whether the request counts against the API quota.
+
+        Returns:
+            Any: The result of fetch.
+        """
+        with self._condition:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.calls_saved += 1
+        if not owner:
+            return future.result()
+
+        try:
+            if limited:
+                self._acquire(priority)
+            with self._condition:
+                self.calls_made += 1
+            result = fetch()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._condition:
+                del self._in_flight[key]
+
+    def stats(self) -> dict:
+        """
+        Get all counters.
+
+        Returns:
+            dict: The numbers of calls made, saved, queued and currently waiting.
+        """
+        with self._condition:
+            return {'calls_made': self.calls_made, 'calls_saved': self.calls_saved,
+                    'calls_queued': self.calls_queued, 'waiting': len(self._waiting)}
+
+    def _acquire(self, priority: int) -> None:
+        """
+        Block until the request is first in line and a token is available.
+
+        Args:
+            priority (int): The priority of the request.
+
+        Returns:
+            None
+        """
+        with self._condition:
+            ticket = (priority, next(self._order))
+            heapq.heappush(self._waiting, ticket)
+            queued = False
+            try:
+                while True:
+                    if self._waiting[0] == ticket:
+                        wait = self._bucket.take()
+                        if wait == 0:
+                            return
+                    else:
+                        wait = None
+                    if not queued:
+                        queued = True
+                        self.calls_queued += 1
+                    self._condition.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
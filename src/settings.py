@@ -1,11 +1,109 @@
 SMALL_IMAGE_SIZE = (60, 60)
 BIG_IMAGE_SIZE = (150, 150)
 
+# TIME CONVERSION-------------------------
+TIME_CACHE_SIZE = 4096
+
 # FORECAST DATA---------------------------
 HOUR_MIN = 12
 HOUR_MAX = 16
 
+# API CLIENT------------------------------
+API_URL = 'https://api.openweathermap.org/data/2.5'
+ICON_URL = 'https://openweathermap.org/img/wn'
+UNITS = 'metric'
+LANG = 'pl'
 TIMEOUT = 10
+CONNECT_TIMEOUT = 3.05
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 4
+RETRY_STATUSES = (500, 502, 503, 504)
+CIRCUIT_FAILURES = 3
+CIRCUIT_RESET = 30
+POOL_SIZE = 8
+FETCH_THREADS = 4
+BATCH_WORKERS = 16
+# The free plan allows 60 calls per minute, paid plans allow more
+BATCH_CALLS_PER_MINUTE = 60
+GROUP_SIZE = 20
+API_CALLS_PER_MINUTE = 60
+API_BURST = 10
+STANDIN_PORT = 8000
+GATEWAY_HOST = '127.0.0.1'
+GATEWAY_PORT = 8100
+
+# RESPONSE CACHE--------------------------
+RESPONSE_CACHE_DIR = 'src/cache/responses'
+RESPONSE_CACHE_SIZE = 64
+RESPONSE_CACHE_DISK_SIZE = 20 * 1024 * 1024
+RESPONSE_TTL = {
+    'weather': 10 * 60,
+    'forecast': 3 * 60 * 60
+}
+
+# ARCHIVE---------------------------------
+SAVES_DIR = 'src/saves'
+ARCHIVE_FILE = 'src/saves/archive.sqlite3'
+# 'store' keeps new saves in the compressed store, 'json' writes a JSON file per save
+SAVE_FORMAT = 'store'
+SAVE_STORE_NAME = 'store.sqlite3'
+
+# TRENDS----------------------------------
+TREND_DAYS = 30
+TREND_MIN_SPAN = 6 * 60 * 60
+TREND_LOAD_MARGIN = 1.0
+
+# AUTO REFRESH----------------------------
+AUTO_REFRESH_ENABLED = False
+AUTO_REFRESH_WEATHER = 10 * 60
+AUTO_REFRESH_FORECAST_CADENCE = 3 * 60 * 60
+AUTO_REFRESH_FORECAST_DELAY = 10 * 60
+
+# FORECAST ACCURACY----------------------
+ACCURACY_MATCH_WINDOW = 90 * 60
+ACCURACY_LEAD_STEP = 24 * 60 * 60
+ACCURACY_CHUNK = 256
+ACCURACY_PARALLEL_MIN = 200
+
+# KIOSK MODE------------------------------
+KIOSK_ENABLED = False
+KIOSK_MEMORY_BUDGET = 200 * 1024 * 1024
+KIOSK_CHECK_INTERVAL = 60
+KIOSK_RESPONSE_CACHE_SIZE = 8
+KIOSK_ICON_CACHE_SIZE = 24
+KIOSK_TRACE_FRAMES = 1
+KIOSK_REPORT_TOP = 15
+
+# TRACING---------------------------------
+TRACE_ENABLED = False
+TRACE_FILE = 'src/cache/trace.jsonl'
+TRACE_MAX_BYTES = 1024 * 1024
+TRACE_BACKUPS = 3
+TRACE_SAMPLES = 500
+
+# FORMS-----------------------------------
+FORMS_CACHE_DIR = 'src/cache/forms'
+
+# COUNTRY CODES---------------------------
+COUNTRY_CODES_FILE = 'src/data/country_codes.csv'
+COUNTRY_CODES_URL = 'https://en.wikipedia.org/wiki/List_of_ISO_3166_country_codes'
+
+# CITY INDEX------------------------------
+CITIES_FILE = 'src/data/cities.csv'
+CITIES_URL = 'https://bulk.openweathermap.org/sample/city.list.json.gz'
+CITY_COMPLETIONS = 10
+CITY_MAX_DISTANCE = 2
+
+# ICON CACHE------------------------------
+ICON_CACHE_DIR = 'src/cache/icons'
+ICON_CACHE_SIZE = 40
+ICON_WARM_UP = False
+ICON_CODES = [
+    '01d', '01n', '02d', '02n', '03d', '03n',
+    '04d', '04n', '09d', '09n', '10d', '10n',
+    '11d', '11n', '13d', '13n', '50d', '50n'
+]
 
 STYLE = """
     QWidget{
@@ -79,6 +177,7 @@ STYLE = """
     
 """
 
+FRAMES_COUNT = 5
 FRAMES_VARIABLES = [
     'label_small_date',
     'label_small_image',
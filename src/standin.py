@@ -0,0 +1,252 @@
+'''
+This module is responsible for a local stand-in of the OpenWeatherMap servers.
+
+Weather, group and forecast responses are served from save files, icons from the icon
+cache, so the whole search path can be tested offline:
+
+    python -m src.standin [--port 8000] [--latency SECONDS] [--error-rate RATE] [--saves DIRECTORY]
+
+Then start the program with:
+
+    python main.py --api-url http://127.0.0.1:8000/data/2.5 --icon-url http://127.0.0.1:8000/img/wn
+'''
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from src.response_cache import normalize_query
+from src.save_store import iter_saves
+from src.settings import SAVES_DIR, ICON_CACHE_DIR, STANDIN_PORT
+
+ICON_PATH = re.compile(r'^/img/wn/(\w+)@2x\.png$')
+FALLBACK_ICON = 'src/graphics/small_full_sun.png'
+
+
+class Fixtures:
+    """
+    This class represents the weather and forecast data served by the stand-in server.
+
+    The newest save of every city is indexed by its name, its name with the country
+    code and its city id.
+
+    Args:
+        directory (str): The directory of save files.
+        icon_directory (str): The directory of icon PNG files.
+
+    Attributes:
+        saves (dict): The (weather, forecast) pairs by lookup key.
+        icon_directory (str): The directory of icon PNG files.
+
+    Methods:
+        find(): Returns the save matching query parameters.
+        group(): Returns the group response for query parameters.
+        icon(): Returns the PNG data of an icon.
+    """
+    def __init__(self, directory: str = SAVES_DIR, icon_directory: str = ICON_CACHE_DIR) -> None:
+        """
+        Load all save files.
+
+        Args:
+            directory (str): The directory of save files.
+            icon_directory (str): The directory of icon PNG files.
+
+        Returns:
+            None
+        """
+        self.saves: dict = {}
+        self.icon_directory = icon_directory
+        loaded = [(weather, forecast) for _, weather, forecast in iter_saves(directory)]
+        for weather, forecast in sorted(loaded, key=lambda save: save[0]['dt']):
+            name = weather['name']
+            country = weather['sys']['country']
+            for key in (normalize_query(name), normalize_query(f'{name},{country}'),
+                        f"id:{weather['id']}"):
+                self.saves[key] = (weather, forecast)
+
+    def find(self, params: dict) -> tuple:
+        """
+        Find the save matching the query parameters of a request.
+
+        Args:
+            params (dict): The 'q' or 'id' parameter of the request.
+
+        Returns:
+            tuple: The (weather, forecast) pair or None.
+        """
+        if 'id' in params:
+            return self.saves.get(f"id:{params['id']}")
+        return self.saves.get(normalize_query(params.get('q', '')))
+
+    def group(self, params: dict) -> dict:
+        """
+        Build a response of the group endpoint for the city IDs of a request.
+
+        Args:
+            params (dict): The 'id' parameter of the request, comma separated IDs.
+
+        Returns:
+            dict: The response with the weather of every known city.
+        """
+        entries = []
+        for city_id in params.get('id', '').split(','):
+            save = self.saves.get(f'id:{city_id.strip()}')
+            if save is None:
+                continue
+            entry = {key: value for key, value in save[0].items()
+                     if key not in ('cod', 'base', 'timezone')}
+            entry['sys'] = {**save[0]['sys'], 'timezone': save[0]['timezone']}
+            entries.append(entry)
+        return {'cnt': len(entries), 'list': entries}
+
+    def icon(self, icon: str) -> bytes:
+        """
+        Get the PNG data of an icon, an image of the program is used for unknown icons.
+
+        Args:
+            icon (str): The icon name.
+
+        Returns:
+            bytes: The PNG data.
+        """
+        path = os.path.join(self.icon_directory, f'{icon}.png')
+        if not os.path.exists(path):
+            path = FALLBACK_ICON
+        with open(path, 'rb') as file:
+            return file.read()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    This class handles requests to the stand-in server.
+
+    Attributes:
+        fixtures (Fixtures): The served data.
+        latency (float): The delay added to every response in seconds.
+        error_rate (float): The fraction of requests answered with a server error.
+    """
+    fixtures: Fixtures = None
+    latency = 0.0
+    error_rate = 0.0
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Answer a GET request.
+
+        Returns:
+            None
+        """
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        if random.random() < self.error_rate:
+            self.send_json(500, {'cod': 500, 'message': 'Injected error'})
+            return
+
+        parts = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        icon = ICON_PATH.match(parts.path)
+        if icon is not None:
+            self.send_body(200, 'image/png', self.fixtures.icon(icon.group(1)))
+        elif parts.path.endswith('/group'):
+            self.send_json(200, self.fixtures.group(params))
+        elif parts.path.endswith(('/weather', '/forecast')):
+            save = self.fixtures.find(params)
+            if save is None:
+                self.send_json(404, {'cod': '404', 'message': 'city not found'})
+            else:
+                self.send_json(200, save[0] if parts.path.endswith('/weather') else save[1])
+        else:
+            self.send_json(404, {'cod': '404', 'message': 'Internal error'})
+
+    def send_json(self, status: int, data: dict) -> None:
+        """
+        Send a JSON response.
+
+        Args:
+            status (int): The HTTP status.
+            data (dict): The response data.
+
+        Returns:
+            None
+        """
+        self.send_body(status, 'application/json; charset=utf-8',
+                       json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+    def send_body(self, status: int, content_type: str, body: bytes) -> None:
+        """
+        Send a response.
+
+        Args:
+            status (int): The HTTP status.
+            content_type (str): The type of the body.
+            body (bytes): The body.
+
+        Returns:
+            None
+        """
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        """
+        Silence the default request log.
+
+        Returns:
+            None
+        """
+
+
+def create_server(port: int = STANDIN_PORT, latency: float = 0.0, error_rate: float = 0.0,
+                  directory: str = SAVES_DIR) -> ThreadingHTTPServer:
+    """
+    Create the stand-in server.
+
+    Args:
+        port (int): The port to listen on, 0 picks a free one.
+        latency (float): The delay added to every response in seconds.
+        error_rate (float): The fraction of requests answered with a server error.
+        directory (str): The directory of save files.
+
+    Returns:
+        ThreadingHTTPServer: The server, call serve_forever to start it.
+    """
+    handler = type('ConfiguredStandInHandler', (StandInHandler,), {
+        'fixtures': Fixtures(directory), 'latency': latency, 'error_rate': error_rate})
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+def main(args: list) -> None:
+    """
+    Run the stand-in server command line.
+
+    Args:
+        args (list): The command line arguments.
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(prog='python -m src.standin',
+                                     description='Serve the weather API from save files.')
+    parser.add_argument('--port', type=int, default=STANDIN_PORT, help='port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, metavar='SECONDS',
+                        help='delay of every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, metavar='RATE',
+                        help='share of requests answered with a server error, 0 to 1')
+    parser.add_argument('--saves', default=SAVES_DIR, metavar='DIRECTORY',
+                        help='directory of the saves served as responses')
+    options = parser.parse_args(args)
+    server = create_server(options.port, options.latency, options.error_rate, options.saves)
+    print(f'Serving on http://127.0.0.1:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
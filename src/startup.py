@@ -0,0 +1,116 @@
+'''
+This module is responsible for measuring the start-up time of the program.
+'''
+import time
+from typing import Optional
+from PyQt5.QtCore import QObject, QEvent
+from PyQt5.QtWidgets import QWidget
+
+
+class StartupProfiler(QObject):
+    """
+    This class records how long every start-up phase takes until the first paint of the window.
+
+    Args:
+        start (Optional[float]): The perf_counter value of the program start.
+
+    Attributes:
+        enabled (bool): Whether the phases are recorded.
+        phases (list): The recorded (phase, seconds) pairs.
+
+    Methods:
+        mark(): Records the end of a phase.
+        watch_first_paint(): Records the first paint of a widget and prints the report.
+        report(): Returns the report as text.
+    """
+    def __init__(self, start: Optional[float] = None) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            start (Optional[float]): The perf_counter value of the program start.
+
+        Returns:
+            None
+        """
+        super().__init__()
+        self.enabled = False
+        self.phases: list = []
+        self._start = time.perf_counter() if start is None else start
+        self._last = self._start
+
+    def enable(self, start: Optional[float] = None) -> None:
+        """
+        Turn recording on.
+
+        Args:
+            start (Optional[float]): The perf_counter value of the program start.
+
+        Returns:
+            None
+        """
+        self.enabled = True
+        if start is not None:
+            self._start = self._last = start
+
+    def mark(self, phase: str) -> None:
+        """
+        Record the end of a phase.
+
+        Args:
+            phase (str): The name of the phase.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def watch_first_paint(self, widget: QWidget) -> None:
+        """
+        Print the report when the widget is painted for the first time.
+
+        Args:
+            widget (QWidget): The main window.
+
+        Returns:
+            None
+        """
+        if self.enabled:
+            widget.installEventFilter(self)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:  # pylint: disable=invalid-name
+        """
+        Catch the first paint event of the watched widget.
+
+        Args:
+            watched (QObject): The watched widget.
+            event (QEvent): The event.
+
+        Returns:
+            bool: Always False, the event is not consumed.
+        """
+        if event.type() == QEvent.Paint:
+            watched.removeEventFilter(self)
+            self.mark('first paint')
+            print(self.report())
+        return False
+
+    def report(self) -> str:
+        """
+        Build the report of all recorded phases.
+
+        Returns:
+            str: The report.
+        """
+        lines = ['Startup profile:']
+        for phase, seconds in self.phases:
+            lines.append(f'  {phase:<24}{seconds * 1000:8.1f} ms')
+        lines.append(f"  {'time to first paint':<24}{(self._last - self._start) * 1000:8.1f} ms")
+        return '\n'.join(lines)
+
+
+PROFILER = StartupProfiler()
@@ -2,16 +2,20 @@
 This is module for support functions
 '''
 import random
-import time
 import json
 import os
-from typing import Optional
-from datetime import datetime
-import pandas as pd
-import requests
-from PyQt5.QtWidgets import QMessageBox
-from PyQt5.QtGui import QPixmap, QImage
-from src.settings import HOUR_MIN, HOUR_MAX, CITIES, TIMEOUT
+from typing import Optional, Union
+from PyQt5 import sip
+from PyQt5.QtWidgets import QMessageBox, QWidget
+from PyQt5.QtGui import QPixmap
+from src.settings import CITIES, SAVES_DIR, SAVE_FORMAT
+from src.archive import get_archive
+from src.client import get_client
+from src.countries import get_country_codes
+from src.forecast import ForecastSeries
+from src.model import Observation, Forecast, as_payload
+from src.save_store import get_save_store, save_name
+from src.icon_cache import IconCache
 
 def message_box(msg: str, info: Optional[str] = None) -> None:
     """
@@ -32,6 +36,24 @@ def message_box(msg: str, info: Optional[str] = None) -> None:
     message.setText(text)
     message.exec_()
 
+def raise_window(window: Optional[QWidget]) -> bool:
+    """
+    Bring a window to the front if it is still open.
+
+    Args:
+        window (Optional[QWidget]): The window, it may be already closed and deleted.
+
+    Returns:
+        bool: True if the window is open, False if a new one is needed.
+    """
+    if window is None or sip.isdeleted(window) or not window.isVisible():
+        return False
+    if window.isMinimized():
+        window.showNormal()
+    window.raise_()
+    window.activateWindow()
+    return True
+
 def get_api_key() -> str:
     """
     Read the API key from a file.
@@ -73,114 +95,79 @@ def check_for_api_file() -> bool:
         return False
     return False
 
-def save_day_to_file(weather: dict, forecast: dict) -> None:
+def save_day_to_file(weather: Union[Observation, dict], forecast: Union[Forecast, dict],
+                     directory: str = SAVES_DIR) -> None:
     """
-    Save weather and forecast data to a file.
+    Save weather and forecast data to the save store, or a JSON file, and to the local archive.
 
     Args:
-        weather (dict): Weather data to be saved.
-        forecast (dict): Forecast data to be saved.
+        weather (Union[Observation, dict]): Weather data to be saved.
+        forecast (Union[Forecast, dict]): Forecast data to be saved.
+        directory (str): The directory of save files.
 
     Returns:
         None
     """
     if weather is None or forecast is None:
         return
-    data = [weather, forecast]
-    name = f"{get_unix_to_datetime(weather['dt'], mode='date')}-" \
-           f"{weather['name']}-{weather['sys']['country']}.json"
-    with open(f'src/saves/{name}', 'w', encoding='utf-8') as file:
-        json.dump(data, file, indent=4)
+    weather = as_payload(weather)
+    forecast = as_payload(forecast)
+    name = save_name(weather)
+    if SAVE_FORMAT == 'store':
+        get_save_store(directory).add(name, weather, forecast)
+    else:
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as file:
+            json.dump([weather, forecast], file, indent=4)
+    get_archive().add(weather, forecast)
 
-def get_image(icon: str, size: tuple[int]) -> QPixmap:
+def download_icon(icon: str) -> bytes:
     """
-    Get an image from a website and return it as a QPixmap.
+    Download an icon using the shared weather client.
 
     Args:
         icon (str): The icon name.
-        size (tuple[int]): The desired size of the image.
 
     Returns:
-        QPixmap: The QPixmap object representing the image.
+        bytes: The PNG data of the icon.
     """
-    url=f'https://openweathermap.org/img/wn/{icon}@2x.png'
-    image = QImage()
-    image.loadFromData(requests.get(url, timeout=TIMEOUT).content)
+    return get_client().icon(icon)
 
-    return QPixmap(image).scaled(size[0], size[1])
+ICON_CACHE = IconCache(download_icon)
 
-def get_unix_to_datetime(data: int, mode: str = 'full') -> str:
+def prefetch_icons(data: dict) -> None:
     """
-    Convert a Unix timestamp to a datetime format.
+    Store the icons used by weather or forecast data in the icon cache.
+
+    Only raw PNG files are downloaded, so it is safe to call from worker threads.
 
     Args:
-        data (int): The Unix timestamp to be converted.
-        mode (str): The format mode for the conversion.
+        data (dict): Weather or forecast data.
 
     Returns:
-        str: The datetime in the specified format.
+        None
     """
-    if mode == 'full':
-        look = '%d.%m.%y - %H:%M'
-    elif mode == 'date':
-        look = '%d.%m.%y'
-    elif mode == 'short_date':
-        look = '%d.%m'
-    elif mode == 'hours':
-        look = '%H'
-    elif mode == 'day':
-        look = '%d'
-    elif mode == 'time':
-        look = '%H:%M'
+    if 'list' in data:
+        records = get_forecast_days(data)
     else:
-        raise ValueError('Wrong type of datetime mode...')
-
-    return str(datetime.fromtimestamp(data).strftime(look))
+        records = [data]
+    for record in records:
+        ICON_CACHE.get_raw(record['weather'][0]['icon'])
 
-def get_actual_time(timezone: int = 0) -> str:
+def get_image(icon: str, size: tuple[int]) -> QPixmap:
     """
-    Calculate the current time in a location based on the timezone.
-
-    Args:
-        timezone (int): The timezone offset.
+    Get an image from the icon cache and return it as a QPixmap.
 
-    Returns:
-        str: The current time in HH:MM format.
-    """
-    return str(datetime.fromtimestamp(get_unix() + timezone).strftime('%H:%M'))
-
-def get_unix_to_time(dt_time: int, timezone: int = 0, actual_time: int = 0) -> str:
-    """
-    Calculate the time for sunset and sunrise in a location based on the timezone.
+    The window never waits for the network, icons are downloaded by the fetch workers.
 
     Args:
-        dt_time (int): The Unix timestamp for the event.
-        timezone (int): The timezone offset.
-        actual_time (int): The actual time.
-
-    Returns:
-        str: The time of the event in HH:MM format.
-    """
-    delta = get_unix() + timezone - actual_time
-    return str(datetime.fromtimestamp(dt_time + delta).strftime('%H:%M'))
-
-def get_utc() -> datetime:
-    """
-    Get the current UTC time.
-
-    Returns:
-        datetime: The current UTC time.
-    """
-    return datetime.utcnow()
-
-def get_unix() -> int:
-    """
-    Get the current Unix timestamp based on UTC.
+        icon (str): The icon name.
+        size (tuple[int]): The desired size of the image.
 
     Returns:
-        int: The current Unix timestamp.
+        QPixmap: The QPixmap object representing the image, a null pixmap when the icon
+            was not downloaded yet.
     """
-    return int(time.mktime(get_utc().timetuple()))
+    return ICON_CACHE.get(icon, size, download=False)
 
 def get_timezone(timezone: int) -> str:
     """
@@ -202,78 +189,36 @@ def get_forecast_days(data: dict) -> list:
     """
     Select appropriate weather forecast records for the following days.
 
+    Hours are compared in the city's local time.
+
     Args:
         data (dict): The weather forecast data.
 
     Returns:
         list: A list of selected weather forecast records.
     """
-    data = data['list']
-    days = []
-    for number, day in enumerate(data):
-        day_number = int(get_unix_to_datetime(day['dt'], 'day'))
-        hour = int(get_unix_to_datetime(day['dt'], 'hours'))
-        days.append((number, day_number, hour))
-    new_days_indicators = []
-    active_day = days[0]
-    for day in days:
-        if day[1] == active_day[1]:
-            if day[2] > HOUR_MIN and day[2] < HOUR_MAX:
-                new_days_indicators.append(day)
-        if day[1] > active_day[1]:
-            active_day = day
-    new_days = []
-    for indicator in new_days_indicators:
-        for number, day in enumerate(data):
-            if indicator[0] == number:
-                new_days.append(day)
-
-    return new_days
-
-def get_country_codes() -> pd.DataFrame:
-    """
-    Get country names based on country codes from a website.
+    entries = data['list']
+    return [entries[index] for index in ForecastSeries.from_payload(data).midday_indices()]
 
-    Returns:
-        pd.DataFrame: A DataFrame containing country codes and names.
-    """
-    try:
-        data = pd.read_html(
-            'https://en.wikipedia.org/wiki/List_of_ISO_3166_country_codes', encoding="utf8")[0]
-    except ConnectionError:
-        print('There was problem with loading country codes')
-        return pd.DataFrame() # Return empty Data Frame
-    data = data.droplevel(0, axis=1)
-    data.reset_index(drop=True, inplace=True)
-    country_column = [columns for columns in data.columns if 'Country' in columns][0]
-    code_column = [columns for columns in data.columns if 'Alpha-2' in columns][0]
-    selected_columns = [country_column, code_column]
-    codes_data = data[selected_columns]
-    codes_data = codes_data.rename(
-        columns={'Country name[5]': 'Country', 'Alpha-2 code[5]': 'Code'})
-    condition = codes_data['Code'].str.len() <= 3
-    codes_data = codes_data[condition]
-    codes_data.set_index('Code', inplace=True)
-
-    return codes_data
-
-def read_country(code: str, code_list: pd.DataFrame) -> str:
+def read_country(code: str, code_list: Optional[dict] = None) -> str:
     """
     Convert a country code to a country name.
 
     Args:
         code (str): The country code to be converted.
-        code_list (pd.DataFrame): A DataFrame containing country codes and names.
+        code_list (Optional[dict]): A dictionary mapping country codes to names,
+            the bundled table is used when it is not given.
 
     Returns:
         str: The country name.
     """
-    try:
-        name = str(code_list.loc[code, 'Country'])
-        if len(name) > 10:
-            name = code
-    except (KeyError, AttributeError):
+    if code_list is None:
+        code_list = get_country_codes()
+    name = code_list.get(code)
+    if name is None:
         print('Code not found')
+        return code
+    if len(name) > 10:
         name = code
     return name
 
@@ -0,0 +1,131 @@
+'''
+This module is responsible for converting Unix timestamps to local times of cities.
+
+Every city has a fixed UTC offset in seconds, as given by the API in 'timezone'.
+Formatted texts are cached per time bucket, e.g. per minute for clock times and
+per day for dates, so repeated conversions cost one dictionary lookup.
+'''
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import lru_cache
+import numpy as np
+from src.settings import TIME_CACHE_SIZE
+
+SECONDS_PER_DAY = 86400
+
+FORMATS = {
+    'full': '%d.%m.%y - %H:%M',
+    'date': '%d.%m.%y',
+    'short_date': '%d.%m',
+    'hours': '%H',
+    'day': '%d',
+    'time': '%H:%M'
+}
+# The length of the time bucket in seconds, within which a format gives the same text
+BUCKETS = {
+    'full': 60,
+    'date': SECONDS_PER_DAY,
+    'short_date': SECONDS_PER_DAY,
+    'hours': 3600,
+    'day': SECONDS_PER_DAY,
+    'time': 60
+}
+
+
+def now() -> int:
+    """
+    Get the current Unix timestamp.
+
+    Returns:
+        int: The current Unix timestamp.
+    """
+    return int(time.time())
+
+def format_time(timestamp: int, offset: int = 0, mode: str = 'full') -> str:
+    """
+    Convert a Unix timestamp to the local time of a city.
+
+    Args:
+        timestamp (int): The Unix timestamp.
+        offset (int): The UTC offset of the city in seconds.
+        mode (str): The format mode, one of the keys of FORMATS.
+
+    Returns:
+        str: The local time in the specified format.
+    """
+    try:
+        size = BUCKETS[mode]
+    except KeyError as error:
+        raise ValueError('Wrong type of datetime mode...') from error
+    return _format_bucket((int(timestamp) + offset) // size, mode)
+
+def format_series(timestamps, offset: int = 0, mode: str = 'full') -> list:
+    """
+    Convert many Unix timestamps of one city at once, every distinct bucket is formatted once.
+
+    Args:
+        timestamps: The Unix timestamps, a sequence or a numpy array.
+        offset (int): The UTC offset of the city in seconds.
+        mode (str): The format mode, one of the keys of FORMATS.
+
+    Returns:
+        list: The local times in the specified format.
+    """
+    try:
+        size = BUCKETS[mode]
+    except KeyError as error:
+        raise ValueError('Wrong type of datetime mode...') from error
+    buckets = (np.asarray(timestamps, dtype=np.int64) + offset) // size
+    unique, inverse = np.unique(buckets, return_inverse=True)
+    texts = [_format_bucket(int(bucket), mode) for bucket in unique]
+    return [texts[index] for index in inverse.ravel()]
+
+def local_day(timestamp: int, offset: int = 0) -> int:
+    """
+    Get the number of the local day of a timestamp.
+
+    Args:
+        timestamp (int): The Unix timestamp.
+        offset (int): The UTC offset of the city in seconds.
+
+    Returns:
+        int: The number of days since 01.01.1970 in the local time.
+    """
+    return (int(timestamp) + offset) // SECONDS_PER_DAY
+
+def is_today(timestamp: int, offset: int = 0) -> bool:
+    """
+    Check whether a timestamp falls on the current day in the local time of a city.
+
+    Args:
+        timestamp (int): The Unix timestamp.
+        offset (int): The UTC offset of the city in seconds.
+
+    Returns:
+        bool: True if the timestamp is today in the city.
+    """
+    return local_day(timestamp, offset) == local_day(now(), offset)
+
+@lru_cache(maxsize=TIME_CACHE_SIZE)
+def _format_bucket(bucket: int, mode: str) -> str:
+    """
+    Format the beginning of a time bucket.
+
+    Args:
+        bucket (int): The number of the bucket, i.e. local seconds divided by its length.
+        mode (str): The format mode.
+
+    Returns:
+        str: The formatted text.
+    """
+    moment = datetime.fromtimestamp(bucket * BUCKETS[mode], dt_timezone.utc)
+    return moment.strftime(FORMATS[mode])
+
+def clear_time_cache() -> None:
+    """
+    Remove all cached time formats.
+
+    Returns:
+        None
+    """
+    _format_bucket.cache_clear()
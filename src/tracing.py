@@ -0,0 +1,260 @@
+'''
+This module is responsible for timing the phases of searches and rendering.
+
+Timings are kept in memory for p50/p95 summaries and written to a rotating
+JSON-lines trace. When tracing is disabled a span is a shared no-op object.
+'''
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque, defaultdict
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+from src.settings import TRACE_FILE, TRACE_MAX_BYTES, TRACE_BACKUPS, TRACE_SAMPLES
+
+
+class _Span:
+    """
+    This class measures the duration of a `with` block.
+    """
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str) -> None:
+        """
+        Initialize a span that has not started yet.
+
+        Args:
+            tracer (Tracer): The tracer recording the duration.
+            name (str): The name of the span.
+
+        Returns:
+            None
+        """
+        self.tracer = tracer
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> '_Span':
+        """
+        Start measuring.
+
+        Returns:
+            _Span: The span itself.
+        """
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Record the duration of the block, also when it raised.
+
+        Returns:
+            None
+        """
+        self.tracer.record(self.name, time.perf_counter() - self.start)
+
+
+class _NullSpan:
+    """
+    This class is a span that measures nothing, used when tracing is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        """
+        Do nothing.
+
+        Returns:
+            _NullSpan: The span itself.
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Do nothing, exceptions are not suppressed.
+
+        Returns:
+            None
+        """
+        return None
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    This class collects timing spans and counters.
+
+    Attributes:
+        enabled (bool): Whether anything is recorded.
+        last (dict): The most recent duration of every span in seconds.
+        counters (dict): The values of all counters.
+
+    Methods:
+        enable(): Turns recording on and opens the trace file.
+        span(): Returns a context manager timing a block.
+        record(): Records the duration of a span.
+        count(): Increments a counter.
+        summary(): Returns p50/p95 statistics of every span.
+        write_summary(): Writes the summary to the trace file.
+    """
+    def __init__(self) -> None:
+        """
+        Initialize a disabled tracer.
+
+        Returns:
+            None
+        """
+        self.enabled = False
+        self.last: dict = {}
+        self.counters: dict = defaultdict(int)
+        self._samples: dict = defaultdict(lambda: deque(maxlen=TRACE_SAMPLES))
+        self._lock = threading.Lock()
+        self._logger: Optional[logging.Logger] = None
+        self._handler: Optional[RotatingFileHandler] = None
+
+    def enable(self, path: str = TRACE_FILE) -> None:
+        """
+        Turn recording on and open the rotating trace file.
+
+        Enabling it again with the same path changes nothing, another path replaces the file.
+
+        Args:
+            path (str): The path of the trace file.
+
+        Returns:
+            None
+        """
+        logger = logging.getLogger('weather_app.trace')
+        if self._handler is not None:
+            if self._handler.baseFilename == os.path.abspath(path):
+                self.enabled = True
+                return
+            logger.removeHandler(self._handler)
+            self._handler.close()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = RotatingFileHandler(path, maxBytes=TRACE_MAX_BYTES,
+                                      backupCount=TRACE_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        self._handler = handler
+        self._logger = logger
+        self.enabled = True
+
+    def span(self, name: str):
+        """
+        Get a context manager timing a block.
+
+        Args:
+            name (str): The name of the span, e.g. 'http.weather'.
+
+        Returns:
+            A context manager, a shared no-op one when tracing is disabled.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Record the duration of a span.
+
+        Args:
+            name (str): The name of the span.
+            seconds (float): The duration.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._samples[name].append(seconds)
+            self.last[name] = seconds
+        self._write({'type': 'span', 'name': name, 'ms': round(seconds * 1000, 3),
+                     'time': time.time(), 'thread': threading.current_thread().name})
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Increment a counter, e.g. 'response_cache.hit'.
+
+        Args:
+            name (str): The name of the counter.
+            value (int): The increment.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+
+    def summary(self) -> dict:
+        """
+        Compute p50/p95 statistics of every span.
+
+        Returns:
+            dict: The count, p50 and p95 in milliseconds of every span.
+        """
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+        return {name: {'count': len(values),
+                       'p50': round(percentile(values, 50) * 1000, 3),
+                       'p95': round(percentile(values, 95) * 1000, 3)}
+                for name, values in samples.items() if values}
+
+    def write_summary(self) -> None:
+        """
+        Write the summary and the counters to the trace file.
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            counters = dict(self.counters)
+        self._write({'type': 'summary', 'time': time.time(), 'spans': self.summary(),
+                     'counters': counters})
+
+    def _write(self, record: dict) -> None:
+        """
+        Write one JSON line to the trace file.
+
+        Args:
+            record (dict): The record.
+
+        Returns:
+            None
+        """
+        if self._logger is not None:
+            self._logger.info(json.dumps(record))
+
+
+def percentile(values: list, rank: float) -> float:
+    """
+    Get a percentile of sorted values using the nearest-rank method.
+
+    Args:
+        values (list): The sorted values.
+        rank (float): The percentile, e.g. 95.
+
+    Returns:
+        float: The percentile value.
+    """
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(rank / 100 * len(values)) - 1))
+    return values[index]
+
+
+TRACER = Tracer()
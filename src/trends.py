@@ -0,0 +1,507 @@
+'''
+This module is responsible for the trend charts of archived weather data.
+
+Observations and the newest forecast of every moment are read from the archive
+in chunks around the visible time range, so panning and zooming load only what
+comes into view. Before drawing, every series is reduced to about one point per
+pixel with the Largest-Triangle-Three-Buckets algorithm, which keeps the shape
+of the curve, so months of history draw as fast as a single day.
+'''
+from typing import Optional
+import numpy as np
+from PyQt5.QtCore import Qt, QPointF, QRect, QThreadPool
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF
+from PyQt5.QtWidgets import QWidget, QComboBox, QHBoxLayout, QVBoxLayout, QLabel
+from src.archive import WeatherArchive
+from src.settings import TREND_DAYS, TREND_MIN_SPAN, TREND_LOAD_MARGIN, STYLE
+from src.timeconv import format_time
+from src.tracing import TRACER
+from src.workers import FetchWorker, FetchSignals
+
+SECONDS_PER_DAY = 86400
+# Label: (archive column, unit)
+VARIABLES = {
+    'temperature': ('temp', '°C'),
+    'pressure': ('pressure', 'hPa'),
+    'humidity': ('humidity', '%'),
+    'wind': ('wind_speed', 'm/s')
+}
+COLUMNS = tuple(column for column, _ in VARIABLES.values())
+# Table: (color, pen style)
+TABLES = {
+    'observations': ('#2f6fb0', Qt.SolidLine),
+    'forecasts': ('#d9822b', Qt.DashLine)
+}
+LEGEND = 'Solid: observations, dashed: newest forecast. Drag to pan, scroll to zoom.'
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Select points of a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    The first and the last point are kept, from every bucket in between the point
+    forming the largest triangle with the previous selected point and the mean of
+    the next bucket is selected.
+
+    Args:
+        x (np.ndarray): The sorted x values.
+        y (np.ndarray): The y values.
+        threshold (int): The number of selected points.
+
+    Returns:
+        np.ndarray: The indices of the selected points.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = np.asarray(x, np.float64) - x[0]
+    y = np.asarray(y, np.float64)
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_end = edges[bucket + 2]
+            mean_x, mean_y = x[end:next_end].mean(), y[end:next_end].mean()
+        else:
+            mean_x, mean_y = x[-1], y[-1]
+        area = np.abs((x[previous] - mean_x) * (y[start:end] - y[previous]) -
+                      (x[previous] - x[start:end]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+class SeriesLoader:
+    """
+    This class loads the archived series of a city in chunks as they are needed.
+
+    Args:
+        archive (WeatherArchive): The archive.
+        table (str): 'observations' or 'forecasts'.
+        city_id (int): The city ID.
+
+    Attributes:
+        dt (np.ndarray): The Unix timestamps of the loaded rows.
+        values (np.ndarray): The loaded rows, one column for every variable.
+        loaded (Optional[tuple]): The loaded (start, end) range.
+        queries (int): The number of queries sent to the archive.
+
+    Methods:
+        ensure(): Loads what is missing from a time range.
+        window(): Returns the loaded rows of a time range.
+    """
+    def __init__(self, archive: WeatherArchive, table: str, city_id: int) -> None:
+        """
+        Initialize the loader, nothing is loaded until ensure is called.
+
+        Args:
+            archive (WeatherArchive): The archive.
+            table (str): 'observations' or 'forecasts'.
+            city_id (int): The city ID.
+
+        Returns:
+            None
+        """
+        self.archive = archive
+        self.table = table
+        self.city_id = city_id
+        self.dt = np.empty(0, np.int64)
+        self.values = np.empty((0, len(COLUMNS)))
+        self.loaded: Optional[tuple] = None
+        self.queries = 0
+
+    def ensure(self, start: int, end: int) -> None:
+        """
+        Load the parts of a time range that are not loaded yet, with a margin for panning.
+
+        Args:
+            start (int): The Unix timestamp of the beginning of the range.
+            end (int): The Unix timestamp of the end of the range.
+
+        Returns:
+            None
+        """
+        margin = int((end - start) * TREND_LOAD_MARGIN)
+        if self.loaded is None:
+            self.dt, self.values = self._fetch(start - margin, end + margin)
+            self.loaded = (start - margin, end + margin)
+            return
+        loaded_start, loaded_end = self.loaded
+        if start < loaded_start:
+            dt, values = self._fetch(start - margin, loaded_start - 1)
+            self.dt = np.concatenate((dt, self.dt))
+            self.values = np.concatenate((values, self.values))
+            loaded_start = start - margin
+        if end > loaded_end:
+            dt, values = self._fetch(loaded_end + 1, end + margin)
+            self.dt = np.concatenate((self.dt, dt))
+            self.values = np.concatenate((self.values, values))
+            loaded_end = end + margin
+        self.loaded = (loaded_start, loaded_end)
+
+    def window(self, start: int, end: int) -> tuple:
+        """
+        Get the loaded rows of a time range and one row on each side of it,
+        so lines continue to the edges of the chart.
+
+        Args:
+            start (int): The Unix timestamp of the beginning of the range.
+            end (int): The Unix timestamp of the end of the range.
+
+        Returns:
+            tuple: The timestamps and the rows.
+        """
+        first = max(int(np.searchsorted(self.dt, start)) - 1, 0)
+        last = min(int(np.searchsorted(self.dt, end, 'right')) + 1, len(self.dt))
+        return self.dt[first:last], self.values[first:last]
+
+    def _fetch(self, start: int, end: int) -> tuple:
+        """
+        Read a time range from the archive.
+
+        Args:
+            start (int): The Unix timestamp of the beginning of the range.
+            end (int): The Unix timestamp of the end of the range.
+
+        Returns:
+            tuple: The timestamps and the rows, missing values are NaN.
+        """
+        self.queries += 1
+        with TRACER.span(f'trend.load.{self.table}'):
+            rows = self.archive.series(self.table, self.city_id, start, end, COLUMNS)
+        if not rows:
+            return np.empty(0, np.int64), np.empty((0, len(COLUMNS)))
+        data = np.array(rows, np.float64)
+        return data[:, 0].astype(np.int64), data[:, 1:]
+
+
+class TrendChart(QWidget):
+    """
+    This class represents a chart of one variable of a city over time.
+
+    Dragging pans the chart, the mouse wheel zooms around the cursor.
+
+    Args:
+        archive (WeatherArchive): The archive.
+        parent (Optional[QWidget]): The parent widget.
+
+    Attributes:
+        variable (str): The shown variable, one of the keys of VARIABLES.
+        view (tuple): The shown (start, end) time range.
+        extent (Optional[tuple]): The (first, last) time of the city's data.
+        offset (int): The UTC offset of the city in seconds.
+
+    Methods:
+        set_city(): Shows another city.
+        set_variable(): Shows another variable.
+    """
+    def __init__(self, archive: WeatherArchive, parent: Optional[QWidget] = None) -> None:
+        """
+        Initialize an empty chart.
+
+        Args:
+            archive (WeatherArchive): The archive.
+            parent (Optional[QWidget]): The parent widget.
+
+        Returns:
+            None
+        """
+        super().__init__(parent)
+        self.archive = archive
+        self.loaders: dict = {}
+        self.variable = 'temperature'
+        self.view = (0, 1)
+        self.extent: Optional[tuple] = None
+        self.offset = 0
+        self._drag: Optional[tuple] = None
+        self.setMinimumSize(640, 320)
+
+    def set_city(self, city_id: int) -> None:
+        """
+        Show another city, the view starts with its last TREND_DAYS days.
+
+        Args:
+            city_id (int): The city ID.
+
+        Returns:
+            None
+        """
+        self.loaders = {table: SeriesLoader(self.archive, table, city_id) for table in TABLES}
+        ranges = [self.archive.time_range(table, city_id) for table in TABLES]
+        ranges = [time_range for time_range in ranges if time_range is not None]
+        if not ranges:
+            self.extent = None
+        else:
+            first = min(time_range[0] for time_range in ranges)
+            last = max(time_range[1] for time_range in ranges)
+            self.extent = (first, last)
+            start = max(first, last - TREND_DAYS * SECONDS_PER_DAY)
+            self.view = (min(start, last - TREND_MIN_SPAN), last)
+            rows = self.archive.series('observations', city_id, first, last, ('timezone',))
+            self.offset = int(rows[-1][1]) if rows and rows[-1][1] is not None else 0
+        self.update()
+
+    def set_variable(self, variable: str) -> None:
+        """
+        Show another variable.
+
+        Args:
+            variable (str): One of the keys of VARIABLES.
+
+        Returns:
+            None
+        """
+        self.variable = variable
+        self.update()
+
+    def plot_rect(self) -> QRect:
+        """
+        Get the area of the chart inside the axis labels.
+
+        Returns:
+            QRect: The plot area.
+        """
+        return self.rect().adjusted(80, 10, -15, -30)
+
+    def paintEvent(self, event) -> None:  # pylint: disable=invalid-name,unused-argument
+        """
+        Draw the axes and the downsampled series.
+
+        Returns:
+            None
+        """
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor('white'))
+        plot = self.plot_rect()
+        if self.extent is None:
+            painter.drawText(self.rect(), Qt.AlignCenter, 'No archived data of this city')
+            return
+
+        with TRACER.span('render.trend'):
+            column = list(VARIABLES).index(self.variable)
+            start, end = self.view
+            series = {}
+            for table, loader in self.loaders.items():
+                loader.ensure(start, end)
+                dt, values = loader.window(start, end)
+                values = values[:, column]
+                known = ~np.isnan(values)
+                dt, values = dt[known], values[known]
+                keep = lttb(dt, values, max(plot.width(), 3))
+                series[table] = (dt[keep], values[keep])
+
+            shown = [values for _, values in series.values() if len(values)]
+            if shown:
+                low = min(float(values.min()) for values in shown)
+                high = max(float(values.max()) for values in shown)
+            else:
+                low, high = 0.0, 1.0
+            padding = (high - low) * 0.05 or 1.0
+            low, high = low - padding, high + padding
+
+            painter.setPen(QColor('#888888'))
+            painter.drawRect(plot)
+            unit = VARIABLES[self.variable][1]
+            painter.drawText(QRect(0, plot.top(), plot.left() - 5, 20),
+                             Qt.AlignRight, f'{high:.1f}{unit}')
+            painter.drawText(QRect(0, plot.bottom() - 20, plot.left() - 5, 20),
+                             Qt.AlignRight | Qt.AlignBottom, f'{low:.1f}{unit}')
+            bottom = QRect(plot.left(), plot.bottom() + 5, plot.width(), 20)
+            painter.drawText(bottom, Qt.AlignLeft, format_time(start, self.offset, 'full'))
+            painter.drawText(bottom, Qt.AlignRight, format_time(end, self.offset, 'full'))
+
+            painter.setClipRect(plot)
+            x_scale = plot.width() / (end - start)
+            y_scale = plot.height() / (high - low)
+            for table, (dt, values) in series.items():
+                color, style = TABLES[table]
+                painter.setPen(QPen(QColor(color), 1.5, style))
+                xs = plot.left() + (dt - start) * x_scale
+                ys = plot.bottom() - (values - low) * y_scale
+                painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs, ys)]))
+
+    def wheelEvent(self, event) -> None:  # pylint: disable=invalid-name
+        """
+        Zoom in or out around the time under the cursor.
+
+        Returns:
+            None
+        """
+        if self.extent is None:
+            return
+        plot = self.plot_rect()
+        start, end = self.view
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        span = end - start
+        new_span = min(max(span * factor, TREND_MIN_SPAN),
+                       (self.extent[1] - self.extent[0]) * 1.5 + TREND_MIN_SPAN)
+        ratio = min(max((event.pos().x() - plot.left()) / max(plot.width(), 1), 0.0), 1.0)
+        anchor = start + span * ratio
+        self._set_view(anchor - new_span * ratio, anchor + new_span * (1 - ratio))
+
+    def mousePressEvent(self, event) -> None:  # pylint: disable=invalid-name
+        """
+        Start panning.
+
+        Returns:
+            None
+        """
+        self._drag = (event.pos().x(), self.view)
+
+    def mouseMoveEvent(self, event) -> None:  # pylint: disable=invalid-name
+        """
+        Pan the chart with the mouse.
+
+        Returns:
+            None
+        """
+        if self._drag is None or self.extent is None:
+            return
+        x, (start, end) = self._drag
+        shift = (event.pos().x() - x) * (end - start) / max(self.plot_rect().width(), 1)
+        self._set_view(start - shift, end - shift)
+
+    def mouseReleaseEvent(self, event) -> None:  # pylint: disable=invalid-name,unused-argument
+        """
+        Stop panning.
+
+        Returns:
+            None
+        """
+        self._drag = None
+
+    def _set_view(self, start: float, end: float) -> None:
+        """
+        Change the shown time range, it is kept overlapping the city's data.
+
+        Args:
+            start (float): The Unix timestamp of the beginning of the range.
+            end (float): The Unix timestamp of the end of the range.
+
+        Returns:
+            None
+        """
+        span = end - start
+        first, last = self.extent
+        shift = max(first - span / 2 - start, 0) + min(last + span / 2 - end, 0)
+        self.view = (int(start + shift), int(end + shift))
+        self.update()
+
+
+class TrendWindow(QWidget):
+    """
+    This class represents the window with trend charts of archived cities.
+
+    Args:
+        archive (WeatherArchive): The archive.
+        city_id (Optional[int]): The city shown first.
+
+    Methods:
+        on_imported(): Receives the end of the import of saves.
+        on_import_failed(): Shows why the import failed.
+        fill_cities(): Lists the archived cities and shows the chosen one.
+    """
+    def __init__(self, archive: WeatherArchive, city_id: Optional[int] = None) -> None:
+        """
+        Initialize the window, saves that are not archived yet are imported in the background.
+
+        Args:
+            archive (WeatherArchive): The archive.
+            city_id (Optional[int]): The city shown first.
+
+        Returns:
+            None
+        """
+        super().__init__()
+        self.setWindowTitle('Weather trends')
+        self.setStyleSheet(STYLE)
+        self.archive = archive
+        self.city_id = city_id
+
+        self.city_box = QComboBox()
+        self.variable_box = QComboBox()
+        self.variable_box.addItems(list(VARIABLES))
+        self.chart = TrendChart(archive, self)
+        self.hint = QLabel(LEGEND)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel('City:'))
+        controls.addWidget(self.city_box, 1)
+        controls.addWidget(QLabel('Variable:'))
+        controls.addWidget(self.variable_box)
+        layout = QVBoxLayout(self)
+        layout.addLayout(controls)
+        layout.addWidget(self.chart, 1)
+        layout.addWidget(self.hint)
+
+        self.city_box.currentIndexChanged.connect(
+            lambda index: self.chart.set_city(self.city_box.itemData(index)))
+        self.variable_box.currentTextChanged.connect(self.chart.set_variable)
+        self.fill_cities()
+        # Saves made before the archive existed, or by other programs, are imported,
+        # the signals are not owned by the window, the import may finish after it is deleted
+        self.signals = FetchSignals()
+        self.signals.finished.connect(self.on_imported)
+        self.signals.failed.connect(self.on_import_failed)
+        self.hint.setText('Importing new saves into the archive...')
+        QThreadPool.globalInstance().start(
+            FetchWorker(0, 'import', archive.import_saves, self.signals))
+
+    def on_imported(self, search_id: int, kind: str, count: int) -> None:
+        """
+        Receive the end of the import of saves and list the cities again if anything was imported.
+
+        Args:
+            search_id (int): Not used, the import runs once.
+            kind (str): Not used.
+            count (int): The number of imported saves.
+
+        Returns:
+            None
+        """
+        self.hint.setText(LEGEND)
+        if count:
+            self.fill_cities()
+
+    def on_import_failed(self, search_id: int, kind: str, message: str) -> None:
+        """
+        Show why the import of saves failed.
+
+        Args:
+            search_id (int): Not used, the import runs once.
+            kind (str): Not used.
+            message (str): The error message.
+
+        Returns:
+            None
+        """
+        self.hint.setText(f'The saves could not be imported. {message}')
+
+    def fill_cities(self) -> None:
+        """
+        List the archived cities and show the chart of the chosen one.
+
+        The chosen city stays chosen when the list is filled again.
+
+        Returns:
+            None
+        """
+        if self.city_box.count():
+            self.city_id = self.city_box.currentData()
+        cities = {}
+        for row_id, city, country in self.archive.cities():
+            cities.setdefault(row_id, f'{city}, {country}')
+        self.city_box.blockSignals(True)
+        self.city_box.clear()
+        for row_id, label in sorted(cities.items(), key=lambda item: item[1]):
+            self.city_box.addItem(label, row_id)
+        index = self.city_box.findData(self.city_id) if self.city_id is not None else -1
+        self.city_box.setCurrentIndex(max(index, 0))
+        self.city_box.blockSignals(False)
+        if self.city_box.count():
+            self.chart.set_city(self.city_box.currentData())
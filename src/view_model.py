@@ -0,0 +1,149 @@
+'''
+This module is responsible for updating groups of labels of the main window.
+
+Label references are resolved once, new values are compared with the values on
+screen and only the differences are applied, in one batch with repainting suspended.
+'''
+from typing import Callable
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QWidget
+from src.settings import FRAMES_VARIABLES, FRAMES_COUNT
+
+_MISSING = object()
+
+
+class LabelView:
+    """
+    This class represents a group of labels updated in diff-based batches.
+
+    Args:
+        container (QWidget): The widget containing all labels, its repainting is suspended
+            while changes are applied.
+        texts (dict): The labels showing text, by value name.
+        images (dict): The labels showing an icon, by value name.
+        tooltips (dict): The lists of labels sharing a tooltip, by value name.
+        image_loader (Callable[[str, tuple[int]], QPixmap]): A callable returning
+            the pixmap of an icon in a size.
+
+    Methods:
+        apply(): Shows new values and returns the number of changed ones.
+        clear(): Forgets the values on screen, so the next apply sets everything.
+    """
+    def __init__(self, container: QWidget, texts: dict, images: dict, tooltips: dict,
+                 image_loader: Callable[[str, tuple[int]], QPixmap]) -> None:
+        """
+        Initialize the view.
+
+        Args:
+            container (QWidget): The widget containing all labels.
+            texts (dict): The labels showing text, by value name.
+            images (dict): The labels showing an icon, by value name.
+            tooltips (dict): The lists of labels sharing a tooltip, by value name.
+            image_loader (Callable[[str, tuple[int]], QPixmap]): A callable returning
+                the pixmap of an icon in a size.
+
+        Returns:
+            None
+        """
+        self.container = container
+        self.texts = texts
+        self.images = images
+        self.tooltips = tooltips
+        self.image_loader = image_loader
+        self._shown: dict = {}
+
+    def apply(self, values: dict) -> int:
+        """
+        Show new values, labels whose value did not change are not touched.
+
+        An icon that could not be loaded leaves its label empty and is loaded again
+        on the next apply.
+
+        Args:
+            values (dict): Texts of text and tooltip values, (icon, size) pairs of image values.
+
+        Returns:
+            int: The number of changed values.
+        """
+        changes = [(name, value) for name, value in values.items()
+                   if self._shown.get(name, _MISSING) != value]
+        if not changes:
+            return 0
+        self.container.setUpdatesEnabled(False)
+        try:
+            for name, value in changes:
+                if name in self.texts:
+                    self.texts[name].setText(value)
+                elif name in self.images:
+                    pixmap = self.image_loader(*value)
+                    self.images[name].setPixmap(pixmap)
+                    if pixmap.isNull():
+                        # The icon is not available yet, it is set again on the next apply
+                        continue
+                else:
+                    for label in self.tooltips[name]:
+                        label.setToolTip(value)
+                self._shown[name] = value
+        finally:
+            self.container.setUpdatesEnabled(True)
+        return len(changes)
+
+    def clear(self) -> None:
+        """
+        Forget the values on screen.
+
+        Returns:
+            None
+        """
+        self._shown.clear()
+
+
+def information_view(window: QWidget, image_loader: Callable) -> LabelView:
+    """
+    Build the view of the current weather labels of the main window.
+
+    Args:
+        window (QWidget): The main window.
+        image_loader (Callable): A callable returning the pixmap of an icon in a size.
+
+    Returns:
+        LabelView: The view with the values 'name', 'timezone', 'datetime', 'weather',
+            'temperature', 'humidity', 'pressure', 'wind', 'sunrise', 'sunset' and 'image'.
+    """
+    texts = {
+        'name': window.label_Name,
+        'timezone': window.label_Timezone,
+        'datetime': window.label_Datetime,
+        'weather': window.label_Weather,
+        'temperature': window.label_Temperature_display,
+        'humidity': window.label_Humidity_display,
+        'pressure': window.label_Pressure_display,
+        'wind': window.label_Wind_display,
+        'sunrise': window.label_Sunrise_display,
+        'sunset': window.label_Sunset_display
+    }
+    return LabelView(window.centralwidget, texts, {'image': window.label_main_image}, {},
+                     image_loader)
+
+def forecast_view(window: QWidget, image_loader: Callable) -> LabelView:
+    """
+    Build the view of the forecast frames of the main window.
+
+    Args:
+        window (QWidget): The main window.
+        image_loader (Callable): A callable returning the pixmap of an icon in a size.
+
+    Returns:
+        LabelView: The view with the values 'date_N', 'image_N', 'temp_N', 'weather_N'
+            and 'tooltip_N' for every frame N counted from 1.
+    """
+    date, image, temp, weather = FRAMES_VARIABLES
+    texts, images, tooltips = {}, {}, {}
+    for number in range(1, FRAMES_COUNT + 1):
+        labels = [getattr(window, f'{variable}_{number}') for variable in FRAMES_VARIABLES]
+        texts[f'date_{number}'] = getattr(window, f'{date}_{number}')
+        texts[f'temp_{number}'] = getattr(window, f'{temp}_{number}')
+        texts[f'weather_{number}'] = getattr(window, f'{weather}_{number}')
+        images[f'image_{number}'] = getattr(window, f'{image}_{number}')
+        tooltips[f'tooltip_{number}'] = labels
+    return LabelView(window.centralwidget, texts, images, tooltips, image_loader)
@@ -0,0 +1,86 @@
+'''
+This module is responsible for running network requests outside of the Qt event loop.
+'''
+from typing import Callable, Optional
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+from src.client import WeatherApiError
+from src.tracing import TRACER
+
+
+class FetchSignals(QObject):
+    """
+    This class holds the signals emitted by fetch workers.
+
+    Attributes:
+        finished (pyqtSignal): Emitted with (search id, kind, payload) when a fetch succeeds.
+        failed (pyqtSignal): Emitted with (search id, kind, message) when a fetch fails.
+    """
+    finished = pyqtSignal(int, str, object)
+    failed = pyqtSignal(int, str, str)
+
+
+class FetchWorker(QRunnable):
+    """
+    This class represents a single background fetch run in a QThreadPool.
+
+    Args:
+        search_id (int): The id of the search the fetch belongs to.
+        kind (str): The kind of the fetched data, e.g. 'weather' or 'forecast'.
+        fetch (Callable[[], dict]): A callable that performs the request and returns the payload.
+        signals (FetchSignals): The signals used to send the result back to the GUI thread.
+        prefetch (Optional[Callable[[dict], None]]): A callable run on the payload before
+            it is sent back, e.g. to download icons while still off the GUI thread.
+
+    Methods:
+        run(): Performs the fetch and emits the result.
+    """
+    def __init__(self, search_id: int, kind: str, fetch: Callable[[], dict],
+                 signals: FetchSignals,
+                 prefetch: Optional[Callable[[dict], None]] = None) -> None:
+        """
+        Initialize the fetch worker.
+
+        Args:
+            search_id (int): The id of the search the fetch belongs to.
+            kind (str): The kind of the fetched data.
+            fetch (Callable[[], dict]): A callable that performs the request.
+            signals (FetchSignals): The signals used to send the result back.
+            prefetch (Optional[Callable[[dict], None]]): A callable run on the payload.
+
+        Returns:
+            None
+        """
+        super().__init__()
+        self.search_id = search_id
+        self.kind = kind
+        self.fetch = fetch
+        self.signals = signals
+        self.prefetch = prefetch
+
+    def run(self) -> None:
+        """
+        Perform the fetch and emit either the finished or the failed signal.
+
+        Errors never leave the worker thread, the global exception hook of the
+        program shows a message box, which must not be done off the GUI thread.
+
+        Returns:
+            None
+        """
+        try:
+            data = self.fetch()
+        except WeatherApiError as error:
+            self.signals.failed.emit(self.search_id, self.kind, str(error))
+            return
+        except Exception as error:  # pylint: disable=broad-except
+            self.signals.failed.emit(self.search_id, self.kind,
+                                     f'Unexpected error: {type(error).__name__}: {error}')
+            return
+        if self.prefetch is not None:
+            try:
+                with TRACER.span(f'icons.{self.kind}'):
+                    self.prefetch(data)
+            except Exception:  # pylint: disable=broad-except
+                # The data is shown anyway, icons that are not stored are left empty
+                TRACER.count(f'icons.{self.kind}.failed')
+        self.signals.finished.emit(self.search_id, self.kind, data)